@@ -120,31 +120,32 @@ const TestHistory_PS: React.FC = () => {
           setLoading(false);
           return;
         }
-        const userDoc = await firestore()
-          .collection('User_Accounts')
-          .doc(user.uid)
+        const userRef = firestore().collection('User_Accounts').doc(user.uid);
+        // Every result is stored in its own document; the account's results map only
+        // keeps its scores, or the full result for tests taken before the move
+        const resultDoc = await userRef
+          .collection('Results')
+          .doc(`${testId}_PS_Check`)
           .get();
-
-        if (userDoc.exists) {
-          const userData = userDoc.data();
-          const psData = userData?.results?.PS_Check;
-          if (psData && psData[testId]) {
-            setResponseData(psData[testId]);
-            setData({
-              labels: ['Energy', 'Voice', 'Final'],
-              data: [
-                psData[testId]['Speech_Intensity_&_Energy_Data']
-                  .final_energy_score / 100,
-                psData[testId]['Voice_Quality_&_Stability_Data']
-                  .final_voice_score / 100,
-                psData[testId].final_public_speaking_score / 100,
-              ],
-            });
-          } else {
-            console.log('No test data found for testId:', testId);
-          }
+        const userDoc = resultDoc.exists ? null : await userRef.get();
+        const testData = resultDoc.exists
+          ? resultDoc.data()?.result
+          : userDoc?.data()?.results?.PS_Check?.[testId];
+
+        if (testData) {
+          setResponseData(testData);
+          setData({
+            labels: ['Energy', 'Voice', 'Final'],
+            data: [
+              testData['Speech_Intensity_&_Energy_Data']
+                .final_energy_score / 100,
+              testData['Voice_Quality_&_Stability_Data']
+                .final_voice_score / 100,
+              testData.final_public_speaking_score / 100,
+            ],
+          });
         } else {
-          console.log('No user document found.');
+          console.log('No test data found for testId:', testId);
         }
       } catch (error) {
         console.error('Error fetching test data:', error);
@@ -55,29 +55,30 @@ const TestHistory_S: React.FC = () => {
           setLoading(false);
           return;
         }
-        const userDoc = await firestore()
-          .collection('User_Accounts')
-          .doc(user.uid)
+        const userRef = firestore().collection('User_Accounts').doc(user.uid);
+        // Every result is stored in its own document; the account's results map only
+        // keeps its scores, or the full result for tests taken before the move
+        const resultDoc = await userRef
+          .collection('Results')
+          .doc(`${testId}_Stuttering_Check`)
           .get();
-
-        if (userDoc.exists) {
-          const userData = userDoc.data();
-          const stutteringData = userData?.results?.Stuttering_Check;
-          if (stutteringData && stutteringData[testId]) {
-            setResponseData(stutteringData[testId]);
-            setData({
-              labels: ['Fluency', 'Confidence', 'Stuttering'],
-              data: [
-                stutteringData[testId].fluency_score / 100,
-                stutteringData[testId].confidence_score / 100,
-                stutteringData[testId].stuttering_score / 100,
-              ],
-            });
-          } else {
-            console.log('No test data found for testId:', testId);
-          }
+        const userDoc = resultDoc.exists ? null : await userRef.get();
+        const testData = resultDoc.exists
+          ? resultDoc.data()?.result
+          : userDoc?.data()?.results?.Stuttering_Check?.[testId];
+
+        if (testData) {
+          setResponseData(testData);
+          setData({
+            labels: ['Fluency', 'Confidence', 'Stuttering'],
+            data: [
+              testData.fluency_score / 100,
+              testData.confidence_score / 100,
+              testData.stuttering_score / 100,
+            ],
+          });
         } else {
-          console.log('No user document found.');
+          console.log('No test data found for testId:', testId);
         }
       } catch (error) {
         console.error('Error fetching test data:', error);
@@ -0,0 +1,39 @@
+import os
+
+from src.admission import available_cpus
+from src.workers import enable_rss_recycling, preload_engines
+
+# Bind to the port provided by Heroku, or 8000 when running the container locally
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# One worker per CPU unless WEB_CONCURRENCY says otherwise. The value is written
+# back so the admission controller can split CPU and memory between workers.
+workers = int(os.getenv("WEB_CONCURRENCY", str(available_cpus())))
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Only librosa and parselmouth are loaded in the master (see on_starting), so
+# workers share them copy-on-write. The app is imported in each worker: it opens
+# its Firebase and Firestore clients at import, and their gRPC channels must not
+# be shared across a fork.
+preload_app = False
+
+# Recycle workers after a number of requests (jittered so they do not all restart
+# together) or once their RSS grows past WORKER_MAX_RSS_MB
+max_requests = int(os.getenv("MAX_REQUESTS", "200"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "20"))
+max_rss_mb = float(os.getenv("WORKER_MAX_RSS_MB", "0"))
+
+# Give in-flight analyses, including a long-running transcription, time to finish
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "330"))
+
+
+def on_starting(server):
+    """Warm up the audio libraries in the master before any worker is forked."""
+    preload_engines()
+
+
+def post_fork(server, worker):
+    """Enable RSS-based recycling in each new worker."""
+    enable_rss_recycling(max_rss_mb or None)
@@ -0,0 +1 @@
+"""Offline load testing of the app against fake external services."""
@@ -0,0 +1,47 @@
+"""App entry point for offline load tests.
+
+Run with ``uvicorn loadtest.app:app`` (or ``gunicorn -c gunicorn.conf.py loadtest.app:app``).
+Storage, Firestore, Google STT, Azure Speech and Gemini are replaced with the
+fakes in ``loadtest.fakes``; only the audio analysis itself is real.
+"""
+
+import json
+import os
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+def _dummy_credentials():
+    """Builds service-account credentials that parse but cannot reach any service."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    return json.dumps(
+        {
+            "type": "service_account",
+            "project_id": "saymore-loadtest",
+            "private_key_id": "loadtest",
+            "private_key": pem,
+            "client_email": "loadtest@saymore-loadtest.iam.gserviceaccount.com",
+            "client_id": "0",
+            "token_uri": "https://oauth2.googleapis.com/token",
+        }
+    )
+
+
+# The app refuses to start without credentials, so provide throwaway ones
+_credentials = _dummy_credentials()
+for name in ("FIREBASE_CREDENTIALS", "GOOGLE_APPLICATION_CREDENTIALS_JSON"):
+    os.environ[name] = _credentials
+for name in ("AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION", "GOOGLE_API_KEY"):
+    os.environ[name] = "loadtest"
+
+from loadtest.fakes import install_fakes  # noqa: E402
+import main  # noqa: E402
+
+install_fakes(main)
+app = main.app
@@ -0,0 +1,458 @@
+import copy
+import json
+import operator
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import types
+
+import azure.cognitiveservices.speech as speechsdk
+from firebase_admin import firestore
+from google.api_core import exceptions as google_exceptions
+
+# Directory holding the synthetic recordings the fake storage "downloads"
+AUDIO_DIR = os.getenv(
+    "LOADTEST_AUDIO_DIR", os.path.join(tempfile.gettempdir(), "saymore-loadtest")
+)
+
+# Default latency (milliseconds) of each fake service
+DEFAULT_LATENCY_MS = {
+    "storage": 80,
+    "firestore": 40,
+    "stt": 1500,
+    "azure": 1200,
+    "gemini": 2500,
+}
+
+
+class FakeService:
+    """Latency and error injection shared by every fake service.
+
+    ``FAKE_<SERVICE>_LATENCY_MS`` sets the mean latency, ``FAKE_<SERVICE>_JITTER``
+    the relative spread around it and ``FAKE_<SERVICE>_ERROR_RATE`` the fraction of
+    calls that fail with a quota error.
+    """
+
+    def __init__(self, name):
+        prefix = f"FAKE_{name.upper()}"
+        self.name = name
+        self.latency = (
+            float(os.getenv(f"{prefix}_LATENCY_MS", DEFAULT_LATENCY_MS[name])) / 1000
+        )
+        self.jitter = float(os.getenv(f"{prefix}_JITTER", "0.3"))
+        self.error_rate = float(os.getenv(f"{prefix}_ERROR_RATE", "0"))
+        self.rng = random.Random()
+        self.lock = threading.Lock()
+
+    def call(self):
+        """Sleeps for one sampled latency and then fails with the configured probability."""
+        with self.lock:
+            delay = max(0.0, self.rng.gauss(self.latency, self.latency * self.jitter))
+            failed = self.rng.random() < self.error_rate
+        time.sleep(delay)
+        if failed:
+            raise google_exceptions.ResourceExhausted(
+                f"Fake {self.name} quota exceeded"
+            )
+
+
+def source_recording(file_name):
+    """Maps an uploaded file name to the synthetic recording it stands for.
+
+    Load-test file names look like ``recordings/PS_Check/<request id>__<recording>.wav``
+    so every request gets its own path while sharing a few source recordings.
+    """
+    return os.path.join(AUDIO_DIR, os.path.basename(file_name).split("__")[-1])
+
+
+class FakeBlob:
+    def __init__(self, service, file_name, uploads):
+        self.service = service
+        self.file_name = file_name
+        self.name = file_name
+        self.uploads = uploads
+        self.size = None
+        self.content_type = None
+
+    def _data(self):
+        if self.file_name in self.uploads:
+            return self.uploads[self.file_name]
+        with open(source_recording(self.file_name), "rb") as f:
+            return f.read()
+
+    def reload(self):
+        self.service.call()
+        self.size = len(self._data())
+        self.content_type = "audio/wav"
+
+    def download_to_filename(self, filename):
+        self.service.call()
+        shutil.copyfile(source_recording(self.file_name), filename)
+
+    def upload_from_string(self, data, content_type=None):
+        self.service.call()
+        self.uploads[self.file_name] = data
+
+    def download_as_bytes(self, start=None, end=None):
+        self.service.call()
+        data = self._data()
+        # Like Cloud Storage, the end of a byte range is inclusive
+        return data[start or 0 : None if end is None else end + 1]
+
+    def exists(self):
+        return self.file_name in self.uploads
+
+    def delete(self):
+        self.service.call()
+
+
+class FakeBucket:
+    """Serves synthetic recordings and keeps uploaded files in memory."""
+
+    def __init__(self):
+        self.service = FakeService("storage")
+        self.uploads = {}
+
+    def blob(self, file_name):
+        return FakeBlob(self.service, file_name, self.uploads)
+
+
+class FakeDocument:
+    def __init__(self, service, store, path):
+        self.service = service
+        self.store = store
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def update(self, data):
+        """Applies an update; dotted keys address nested fields as in Firestore."""
+        self.service.call()
+        document = self.store.setdefault(self.path, {})
+        for key, value in data.items():
+            *parents, field = key.split(".")
+            target = document
+            for parent in parents:
+                # Setting a nested field replaces a parent that is not a map
+                if not isinstance(target.get(parent), dict):
+                    target[parent] = {}
+                target = target[parent]
+            if value is firestore.DELETE_FIELD:
+                target.pop(field, None)
+            elif isinstance(value, firestore.Increment):
+                target[field] = target.get(field, 0) + value.value
+            else:
+                target[field] = value
+
+    def set(self, data, merge=False):
+        self.service.call()
+        if merge:
+            self.store.setdefault(self.path, {}).update(data)
+        else:
+            self.store[self.path] = dict(data)
+
+    def get(self, transaction=None):
+        self.service.call()
+        return FakeSnapshot(self.store.get(self.path), self.id)
+
+    def collection(self, name):
+        return FakeCollection(self.service, self.store, f"{self.path}/{name}")
+
+
+class FakeSnapshot:
+    def __init__(self, data, doc_id=None):
+        self.exists = data is not None
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+# Comparison operators of Firestore field filters
+_FILTER_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda field, values: field in values,
+    "not-in": lambda field, values: field not in values,
+    "array_contains": lambda field, value: value in (field or []),
+    "array_contains_any": lambda field, values: any(
+        value in (field or []) for value in values
+    ),
+}
+
+
+def _matches(data, field_path, op_string, value):
+    field = data.get(field_path)
+    # Firestore leaves out documents without the field, except for ==/!= on None
+    if field is None and op_string not in ("==", "!="):
+        return False
+    try:
+        return _FILTER_OPERATORS[op_string](field, value)
+    except TypeError:
+        # Firestore only compares values of the same type
+        return False
+
+
+class FakeQuery:
+    """Field filters, one ordering, start_after and limit over a fake collection."""
+
+    def __init__(self, collection, filters=(), order=None, after=None, count=None):
+        self.collection = collection
+        self.filters = filters
+        self.order = order
+        self.after = after
+        self.count = count
+
+    def _with(self, **changes):
+        fields = dict(
+            filters=self.filters, order=self.order, after=self.after, count=self.count
+        )
+        fields.update(changes)
+        return FakeQuery(self.collection, **fields)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = (
+                filter.field_path,
+                filter.op_string,
+                filter.value,
+            )
+        assert op_string in _FILTER_OPERATORS, f"Unknown filter operator {op_string!r}"
+        return self._with(filters=(*self.filters, (field_path, op_string, value)))
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        return self._with(order=(field_path, direction == "DESCENDING"))
+
+    def start_after(self, snapshot):
+        return self._with(after=snapshot.id)
+
+    def limit(self, count):
+        return self._with(count=count)
+
+    def stream(self):
+        self.collection.service.call()
+        prefix = f"{self.collection.path}/"
+        documents = [
+            (path[len(prefix) :], data)
+            for path, data in self.collection.store.items()
+            if path.startswith(prefix) and "/" not in path[len(prefix) :]
+        ]
+        documents = [
+            (doc_id, data)
+            for doc_id, data in documents
+            if all(_matches(data, *condition) for condition in self.filters)
+        ]
+        documents.sort(key=lambda item: item[0])
+        if self.order:
+            field, descending = self.order
+            documents.sort(key=lambda item: item[1].get(field), reverse=descending)
+        if self.after is not None:
+            ids = [doc_id for doc_id, _ in documents]
+            documents = documents[ids.index(self.after) + 1 :]
+        if self.count is not None:
+            documents = documents[: self.count]
+        return iter(FakeSnapshot(data, doc_id) for doc_id, data in documents)
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, service, store, path):
+        super().__init__(self)
+        self.service = service
+        self.store = store
+        self.path = path
+
+    def document(self, doc_id):
+        return FakeDocument(self.service, self.store, f"{self.path}/{doc_id}")
+
+
+class FakeTransaction:
+    """Buffers writes and applies them together when the transaction commits."""
+
+    def __init__(self, lock):
+        self.lock = lock
+        self.writes = []
+
+    def update(self, ref, data):
+        self.writes.append(lambda: ref.update(data))
+
+    def set(self, ref, data, merge=False):
+        self.writes.append(lambda: ref.set(data, merge=merge))
+
+    def commit(self):
+        for write in self.writes:
+            write()
+
+
+def fake_transactional(func):
+    """Stand-in for firestore.transactional; transactions run one at a time."""
+
+    def run(transaction, *args, **kwargs):
+        with transaction.lock:
+            value = func(transaction, *args, **kwargs)
+            transaction.commit()
+        return value
+
+    return run
+
+
+def fake_firestore_module():
+    """Returns the firestore module with transactional replaced by the fake."""
+    return types.SimpleNamespace(
+        **{**vars(firestore), "transactional": fake_transactional}
+    )
+
+
+class FakeFirestore:
+    """In-memory Firestore stand-in; documents are kept in a dict keyed by path."""
+
+    def __init__(self):
+        self.service = FakeService("firestore")
+        self.store = {}
+        self.lock = threading.RLock()
+
+    def collection(self, name):
+        return FakeCollection(self.service, self.store, name)
+
+    def transaction(self):
+        return FakeTransaction(self.lock)
+
+
+class _Alternative:
+    def __init__(self, transcript, confidence):
+        self.transcript = transcript
+        self.confidence = confidence
+
+
+class _Result:
+    def __init__(self, transcript, confidence):
+        self.alternatives = [_Alternative(transcript, confidence)]
+
+
+class _Response:
+    def __init__(self, results):
+        self.results = results
+
+
+class _Operation:
+    """Long-running operation; FAKE_STT_POLL_MS adds the time spent polling it."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def result(self, timeout=None):
+        time.sleep(float(os.getenv("FAKE_STT_POLL_MS", "1000")) / 1000)
+        return self.client.respond()
+
+
+FAKE_TRANSCRIPT = (
+    "Good morning everyone, today I want to talk about why practice matters "
+    "when you speak in public and how small habits build confidence."
+)
+
+
+class FakeSpeechClient:
+    """Stand-in for google.cloud.speech.SpeechClient."""
+
+    service = None
+
+    def __init__(self, *args, **kwargs):
+        if FakeSpeechClient.service is None:
+            FakeSpeechClient.service = FakeService("stt")
+
+    def respond(self):
+        self.service.call()
+        return _Response([_Result(FAKE_TRANSCRIPT, 0.92)])
+
+    def recognize(self, config, audio):
+        return self.respond()
+
+    def long_running_recognize(self, config, audio):
+        return _Operation(self)
+
+
+class _AzureResult:
+    reason = speechsdk.ResultReason.RecognizedSpeech
+    text = "I w-w-want to to go to the the park today."
+
+
+class FakeRecognizer:
+    """Stand-in for azure.cognitiveservices.speech.SpeechRecognizer."""
+
+    service = None
+
+    def __init__(self, *args, **kwargs):
+        if FakeRecognizer.service is None:
+            FakeRecognizer.service = FakeService("azure")
+
+    def recognize_once(self):
+        self.service.call()
+        return _AzureResult()
+
+
+_GEMINI_ANALYSIS = {
+    "language": "English",
+    "stutter_count": 3,
+    "stuttered_words": [
+        {"word": "want", "type": "repetition"},
+        {"word": "to", "type": "repetition"},
+        {"word": "the", "type": "repetition"},
+    ],
+    "cluttering_detected": False,
+    "fluency_score": 72,
+    "stuttering_score": 28,
+    "dynamic_feedback": "Fake feedback for load testing.",
+    "confidence_score": 90,
+}
+
+
+class _GeminiResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Stand-in for google.generativeai.GenerativeModel."""
+
+    def __init__(self):
+        self.service = FakeService("gemini")
+
+    def generate_content(self, prompt):
+        self.service.call()
+        # Batched prompts number their transcripts and expect a JSON array back
+        count = len(re.findall(r"^Transcript \d+:$", prompt, flags=re.MULTILINE))
+        if count:
+            return _GeminiResponse(
+                json.dumps(
+                    [dict(_GEMINI_ANALYSIS, index=i) for i in range(1, count + 1)]
+                )
+            )
+        return _GeminiResponse(json.dumps(_GEMINI_ANALYSIS))
+
+
+def install_fakes(main_module):
+    """Replaces every external service used by the app with a local fake.
+
+    Parameters
+    ----------
+    main_module (module): The imported ``main`` module of the app.
+
+    """
+    from firebase_admin import storage
+
+    from src import results_store, speech_to_text, stutter_test
+
+    bucket = FakeBucket()
+    storage.bucket = lambda *args, **kwargs: bucket
+    main_module.db = FakeFirestore()
+    results_store.firestore = fake_firestore_module()
+    speech_to_text.speech.SpeechClient = FakeSpeechClient
+    stutter_test.speechsdk.SpeechRecognizer = FakeRecognizer
+    stutter_test.model = FakeGeminiModel()
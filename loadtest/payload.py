@@ -0,0 +1,90 @@
+"""Payload-size benchmark for the /test response detail levels.
+
+Start the app with fake external services, then run this script::
+
+    uvicorn loadtest.app:app --port 8000
+    python -m loadtest.payload --url http://127.0.0.1:8000 --durations 10,60
+
+For every recording, test type and detail level it reports the size of the
+JSON body, the size sent with gzip, the time to send it over a slow link and
+the time the standard json module and orjson take to serialize it.
+"""
+
+import argparse
+import gzip
+import json
+import time
+import urllib.request
+import uuid
+
+import orjson
+
+from loadtest.run import prepare_recordings
+from src.response import DETAIL_LEVELS
+
+
+def fetch(url, recording, ps_check, detail):
+    """Posts one analysis request accepting gzip and returns the raw and sent sizes and the body."""
+    folder = "PS_Check" if ps_check else "Stuttering_Check"
+    payload = {
+        "file_name": f"recordings/{folder}/{uuid.uuid4().hex}__{recording}",
+        "acc_id": "loadtest-user",
+        "test_type": ps_check,
+        "lan_flag": "en",
+        "detail": detail,
+    }
+    request = urllib.request.Request(
+        f"{url}/test",
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json", "Accept-Encoding": "gzip"},
+    )
+    with urllib.request.urlopen(request, timeout=600) as response:
+        sent = response.read()
+        compressed = response.headers.get("Content-Encoding") == "gzip"
+    body = gzip.decompress(sent) if compressed else sent
+    return len(body), len(sent), json.loads(body)
+
+
+def serialize_ms(content, dumps, repeat=200):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        dumps(content)
+    return 1000 * (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--durations",
+        default="10,60",
+        help="Comma-separated lengths in seconds of the synthetic recordings.",
+    )
+    parser.add_argument(
+        "--kbps",
+        type=float,
+        default=400,
+        help="Link speed used to estimate the transfer time, in kilobits per second.",
+    )
+    args = parser.parse_args()
+
+    recordings = prepare_recordings([float(d) for d in args.durations.split(",") if d])
+    print(
+        f"{'recording':<18}{'test':<7}{'detail':<10}{'bytes':>9}{'gzip':>8}"
+        f"{'send ms':>9}{'json ms':>9}{'orjson ms':>11}"
+    )
+    for recording in recordings:
+        for ps_check in (True, False):
+            for detail in DETAIL_LEVELS:
+                raw, sent, body = fetch(args.url, recording, ps_check, detail)
+                send_ms = 8 * sent / args.kbps
+                print(
+                    f"{recording:<18}{'PS' if ps_check else 'ST':<7}{detail:<10}"
+                    f"{raw:>9}{sent:>8}{send_ms:>9.1f}"
+                    f"{serialize_ms(body, json.dumps):>9.3f}"
+                    f"{serialize_ms(body, orjson.dumps):>11.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Offline load test for the /test endpoint.
+
+Start the app with fake external services, then run this script::
+
+    uvicorn loadtest.app:app --port 8000
+    python -m loadtest.run --url http://127.0.0.1:8000 --levels 1,2,4,8
+
+For every concurrency level it reports throughput, the error rate and the
+p50/p95/p99 latency of the whole request and of each stage reported by the
+server in the Server-Timing header.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import numpy as np
+
+from loadtest.fakes import AUDIO_DIR
+from src.synthetic import write_synthetic_wav
+
+
+def prepare_recordings(durations):
+    """Writes one synthetic recording per duration and returns their file names."""
+    os.makedirs(AUDIO_DIR, exist_ok=True)
+    names = []
+    for seed, seconds in enumerate(durations):
+        name = f"speech_{seconds:g}s.wav"
+        path = os.path.join(AUDIO_DIR, name)
+        if not os.path.exists(path):
+            write_synthetic_wav(path, seconds, seed=seed)
+        names.append(name)
+    return names
+
+
+def parse_server_timing(header):
+    """Parses a Server-Timing header into a dict of stage durations in seconds."""
+    stages = {}
+    for entry in filter(None, (part.strip() for part in (header or "").split(","))):
+        name, _, params = entry.partition(";")
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "dur":
+                stages[name] = stages.get(name, 0.0) + float(value) / 1000
+    return stages
+
+
+def send_request(url, recording, ps_check):
+    """Posts one analysis request and returns its status, latency and stage timings."""
+    folder = "PS_Check" if ps_check else "Stuttering_Check"
+    payload = {
+        "file_name": f"recordings/{folder}/{uuid.uuid4().hex}__{recording}",
+        "acc_id": "loadtest-user",
+        "test_type": ps_check,
+        "lan_flag": "en",
+    }
+    request = urllib.request.Request(
+        f"{url}/test",
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=600) as response:
+            response.read()
+            status = response.status
+            stages = parse_server_timing(response.headers.get("Server-Timing"))
+    except urllib.error.HTTPError as e:
+        status, stages = e.code, {}
+    except OSError:
+        status, stages = 0, {}
+    return status, time.perf_counter() - started, stages
+
+
+def percentiles(values):
+    if not values:
+        return "-", "-", "-"
+    return tuple(f"{v:.2f}" for v in np.percentile(values, [50, 95, 99]))
+
+
+def run_level(url, concurrency, total, recordings, ps_ratio, seed):
+    """Sends ``total`` requests with ``concurrency`` of them in flight at once."""
+    rng = np.random.default_rng(seed)
+    jobs = [
+        (recordings[rng.integers(len(recordings))], bool(rng.random() < ps_ratio))
+        for _ in range(total)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda job: send_request(url, *job), jobs))
+    elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r[0] == 200]
+    print(
+        f"\nconcurrency={concurrency} requests={total} "
+        f"throughput={len(ok) / elapsed:.2f} req/s "
+        f"errors={100 * (total - len(ok)) / total:.1f}% "
+        f"(429: {sum(r[0] == 429 for r in results)})"
+    )
+    print(f"  {'stage':<18}{'n':>5}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}")
+    rows = {"total": [r[1] for r in ok]}
+    for _, _, stages in ok:
+        for name, seconds in stages.items():
+            rows.setdefault(name, []).append(seconds)
+    for name, values in rows.items():
+        p50, p95, p99 = percentiles(values)
+        print(f"  {name:<18}{len(values):>5}{p50:>9}{p95:>9}{p99:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--levels", default="1,2,4,8", help="Comma-separated concurrency levels."
+    )
+    parser.add_argument(
+        "--requests", type=int, default=20, help="Requests sent per level."
+    )
+    parser.add_argument(
+        "--durations",
+        default="10,30,60",
+        help="Comma-separated lengths in seconds of the synthetic recordings.",
+    )
+    parser.add_argument(
+        "--ps-ratio",
+        type=float,
+        default=0.7,
+        help="Fraction of requests that are PS_Check rather than Stuttering_Check.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    recordings = prepare_recordings([float(d) for d in args.durations.split(",") if d])
+    for level in (int(x) for x in args.levels.split(",") if x):
+        run_level(args.url, level, args.requests, recordings, args.ps_ratio, args.seed)
+
+
+if __name__ == "__main__":
+    main()
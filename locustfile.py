@@ -1,19 +1,28 @@
-from locust import HttpUser, task, between
+import os
+import uuid
+
+from locust import HttpUser, between, task
+
+from loadtest.run import prepare_recordings
+
 
 class SayMoreUser(HttpUser):
-    host = "https://saymore-monorepo-8d4fc9b224ef.herokuapp.com"  # Ensure your FastAPI server is running at this URL
+    # Defaults to a local app started with fake services: uvicorn loadtest.app:app
+    host = os.getenv("LOCUST_HOST", "http://127.0.0.1:8000")
     wait_time = between(1, 3)
+    recordings = prepare_recordings([10, 30])
 
     @task(1)
     def test_root(self):
         self.client.get("/")
 
-    # @task(2)
-    # def test_audio_analysis(self):
-    #     payload = {
-    #         "file_name": "dummy_audio.wav",
-    #         "acc_id": "user123",
-    #         "test_type": True,
-    #         "lan_flag": "en"
-    #     }
-    #     self.client.post("/test", json=payload)
+    @task(2)
+    def test_audio_analysis(self):
+        recording = self.recordings[uuid.uuid4().int % len(self.recordings)]
+        payload = {
+            "file_name": f"recordings/PS_Check/{uuid.uuid4().hex}__{recording}",
+            "acc_id": "user123",
+            "test_type": True,
+            "lan_flag": "en",
+        }
+        self.client.post("/test", json=payload, name="/test")
@@ -1,20 +1,52 @@
+import asyncio
+from datetime import datetime
 import json
 import logging
 import os
-from datetime import datetime
+import tempfile
+import time
+import tracemalloc
+from typing import Literal, Optional
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from firebase_admin import credentials, firestore, initialize_app, storage
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
+from src.admission import AdmissionRejectedError, create_admission_controller
+from src.audio_probe import AudioTooLargeError, check_limits, expected_cost, probe_audio
+from src.feature_store import FeatureNotFoundError
+from src.governor import governor_metrics
 from src.logic import analysing_audio
+from src.memory_metrics import memory_metrics, start_memory_tracing, top_allocations
+from src.profiling import capture_profile, should_profile
+from src.ps_test import rescore_ps_test, stored_result
+from src.response import FastJSONResponse, select_detail, sse_event, to_native
+from src.results_store import get_progress, list_results, record_result, update_result
+from src.single_flight import create_single_flight
+from src.speech_to_text import configure_credentials
+from src.stage_metrics import (
+    record_stage,
+    request_stages,
+    server_timing,
+    stage,
+    stage_metrics,
+)
+from src.stutter_test import gemini_batch_metrics
+from src.workers import check_worker_rss, current_rss_mb
 
 # Load environment variables from a .env file
 load_dotenv()
 logging.basicConfig(level=logging.ERROR)
 # Initialize FastAPI app
 app = FastAPI()
+# Compress large bodies, such as full analysis results, for clients that accept gzip
+app.add_middleware(
+    GZipMiddleware, minimum_size=int(os.getenv("GZIP_MIN_BYTES", "1000"))
+)
 
 # Get Firebase credentials from environment variable
 firebase_credentials_json = os.getenv("FIREBASE_CREDENTIALS")
@@ -38,6 +70,28 @@ cred = credentials.Certificate(firebase_credentials)
 initialize_app(cred, {"storageBucket": "saymore-340e9.firebasestorage.app"})
 db = firestore.client()
 
+# Fail at startup rather than on the first transcription without Speech-to-Text credentials
+configure_credentials()
+
+# Trace allocations when MEMORY_TRACING is set, for /debug/memory
+start_memory_tracing()
+
+# Bound the number of analyses running at once in this worker
+admission = create_admission_controller()
+# Duplicate submissions of the same file share one analysis, and its result for a while after
+in_flight = create_single_flight()
+# Analyses started by /test/stream, kept until they finish
+streaming_tasks = set()
+
+
+# Recycle the worker once its memory grows past the configured limit
+@app.middleware("http")
+async def recycle_worker(request: Request, call_next):
+    """Checks the worker's RSS after every request and asks for a restart if it is too large."""
+    response = await call_next(request)
+    check_worker_rss()
+    return response
+
 
 # Define the request body model for the /test endpoint
 class RequestBody(BaseModel):
@@ -45,6 +99,14 @@ class RequestBody(BaseModel):
     acc_id: str
     test_type: bool
     lan_flag: str
+    detail: Literal["summary", "standard", "full"] = "full"
+
+
+# Define the request body model for the /rescore endpoint
+class RescoreBody(BaseModel):
+    feature_key: str
+    acc_id: Optional[str] = None
+    test_tag: Optional[str] = None
 
 
 # Define the root endpoint
@@ -57,13 +119,283 @@ async def root():
     }
 
 
+# Define the metrics endpoint
+@app.get("/metrics")
+async def metrics():
+    """Endpoint that reports the load-control metrics of this worker."""
+    return {
+        "admission": admission.snapshot(),
+        "coalescing": in_flight.snapshot(),
+        "memory": memory_metrics(),
+        "batching": {"gemini": gemini_batch_metrics()},
+        "providers": governor_metrics(),
+        "stages": stage_metrics(),
+    }
+
+
+# Define the memory debug endpoint
+@app.get("/debug/memory")
+async def debug_memory(limit: int = 20):
+    """Endpoint that lists the source lines whose allocations grew the most since startup.
+
+    Args:
+        limit (int): The number of allocation sites to return.
+
+    Returns:
+        dict: The RSS and traced memory of this worker and the top allocation sites.
+
+    Raises:
+        HTTPException: 404 if memory tracing is disabled.
+
+    """
+    if not tracemalloc.is_tracing():
+        raise HTTPException(
+            status_code=404,
+            detail="Memory tracing is disabled; set MEMORY_TRACING=1 to enable it.",
+        )
+    current, peak = tracemalloc.get_traced_memory()
+    sites = await run_in_threadpool(top_allocations, max(1, min(limit, 200)))
+    return {
+        "rss_mb": round(current_rss_mb(), 1),
+        "traced_mb": round(current / (1024 * 1024), 1),
+        "peak_traced_mb": round(peak / (1024 * 1024), 1),
+        "top_allocations": sites,
+    }
+
+
+# Define the progress endpoint
+@app.get("/users/{acc_id}/progress")
+async def progress(acc_id: str):
+    """Endpoint that returns the rolling score aggregates of a user.
+
+    The aggregates (count, mean, EWMA, best and last value of every tracked score) are
+    updated together with each stored result, so reading them costs one small document
+    read however many tests the user has taken.
+
+    Args:
+        acc_id (str): The account of the user.
+
+    Returns:
+        dict: The account and its progress keyed by test type and metric.
+
+    Raises:
+        HTTPException: 404 if the account does not exist.
+
+    """
+    user_progress = await run_in_threadpool(get_progress, db, acc_id)
+    if user_progress is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return {"acc_id": acc_id, "progress": user_progress}
+
+
+# Define the results history endpoint
+@app.get("/users/{acc_id}/results")
+async def results(
+    acc_id: str,
+    test_type: Optional[str] = None,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+):
+    """Endpoint that returns a user's test results page by page, newest first.
+
+    Each test is stored as its own document, so a page costs the same number of
+    reads however many tests the user has taken.
+
+    Args:
+        acc_id (str): The account of the user.
+        test_type (str): "PS_Check" or "Stuttering_Check" to only list one test type.
+        limit (int): The page size, at most 50.
+        cursor (str): The next_cursor returned with the previous page.
+
+    Returns:
+        dict: The results of the page and the cursor of the next page (null on the last page).
+
+    Raises:
+        HTTPException: 400 if the test type or cursor is invalid.
+
+    """
+    if test_type not in (None, "PS_Check", "Stuttering_Check"):
+        raise HTTPException(status_code=400, detail="Unknown test type")
+    try:
+        page, next_cursor = await run_in_threadpool(
+            list_results, db, acc_id, test_type, limit, cursor
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+    return {"acc_id": acc_id, "results": page, "next_cursor": next_cursor}
+
+
 # Define the /test endpoint
 @app.post("/test")
-async def test(request_body: RequestBody):
+async def test(request_body: RequestBody, x_profile: Optional[str] = Header(None)):
     """Endpoint to handle audio file analysis requests.
 
+    Concurrent requests for the same file, test type and language share one
+    analysis, so a double submission is neither analyzed twice nor races on the
+    cleanup. The upload's size and duration are read from its metadata and
+    header first, so oversized recordings are rejected before they are
+    downloaded and shorter ones can be scheduled ahead of longer ones. Slots are
+    shared fairly between accounts. The analysis only starts once the admission
+    controller grants a slot, and runs in a worker thread so the event loop
+    stays free to answer other requests. The time spent in each stage is
+    reported in the Server-Timing header. The full result, without the extra
+    segment summaries and energy curve, is stored; the response holds the
+    requested level of detail. The analysis is profiled when the X-Profile
+    header is set or the request is sampled.
+
+    Args:
+        request_body (RequestBody): The request body containing file_name, acc_id, test_type, lan_flag and optionally detail.
+        x_profile (str): The X-Profile header; "1" asks for a profile of the analysis.
+
+    Returns:
+        FastJSONResponse: The result of the audio analysis.
+
+    Raises:
+        HTTPException: 413 if the recording is too large or too long, 429 with a Retry-After header if the server is saturated, 500 if an error occurs during processing.
+
+    """
+    key = (request_body.file_name, request_body.test_type, request_body.lan_flag)
+    try:
+        with request_stages() as stages:
+            started = time.perf_counter()
+            profile = should_profile(x_profile)
+            result, shared = await in_flight.do(
+                key, lambda: run_test(request_body, profile)
+            )
+            if shared:
+                record_stage("coalesced", time.perf_counter() - started)
+        return FastJSONResponse(
+            {"result": select_detail(result["result"], request_body.detail)},
+            headers={"Server-Timing": server_timing(stages)},
+        )
+    except AudioTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
+
+
+# Define the /test/stream endpoint
+@app.post("/test/stream")
+async def test_stream(
+    request_body: RequestBody, x_profile: Optional[str] = Header(None)
+):
+    """Endpoint that runs an analysis like /test and streams its stages as Server-Sent Events.
+
+    A public speaking test sends an ``energy`` event, then a ``voice`` event with
+    the pitch variation, clarity and voice quality, then a ``transcription``
+    event, each as soon as it is ready. Every test ends with a ``result`` event
+    holding the same body as /test, or an ``error`` event with the HTTP status
+    and detail /test would have returned. The events are trimmed to the requested
+    level of detail. The stored result is the same as for /test, and the analysis
+    still finishes and is stored if the client disconnects. A request for a file
+    that is already being analyzed, or was analyzed moments ago, shares that
+    analysis and only receives the result event.
+
+    Args:
+        request_body (RequestBody): The request body containing file_name, acc_id, test_type, lan_flag and optionally detail.
+        x_profile (str): The X-Profile header; "1" asks for a profile of the analysis.
+
+    Returns:
+        StreamingResponse: The text/event-stream of the analysis stages.
+
+    """
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def on_stage(name, data):
+        # Called from the analysis thread
+        loop.call_soon_threadsafe(
+            events.put_nowait, (name, select_detail(data, request_body.detail))
+        )
+
+    async def analyze():
+        key = (request_body.file_name, request_body.test_type, request_body.lan_flag)
+        try:
+            with request_stages():
+                result, _ = await in_flight.do(
+                    key,
+                    lambda: run_test(request_body, should_profile(x_profile), on_stage),
+                )
+            detail = select_detail(result["result"], request_body.detail)
+            await events.put(("result", {"result": detail}))
+        except AudioTooLargeError as e:
+            await events.put(("error", {"status": 413, "detail": str(e)}))
+        except AdmissionRejectedError as e:
+            await events.put(
+                (
+                    "error",
+                    {"status": 429, "detail": e.reason, "retry_after": e.retry_after},
+                )
+            )
+        except HTTPException as e:
+            await events.put(("error", {"status": e.status_code, "detail": e.detail}))
+        except Exception as e:
+            logging.error("An unexpected error occurred: %s", str(e))
+            await events.put(
+                (
+                    "error",
+                    {"status": 500, "detail": "An unexpected error has occurred."},
+                )
+            )
+        finally:
+            await events.put(None)
+
+    # Keep a reference so the analysis is not collected if the client goes away
+    task = asyncio.create_task(analyze())
+    streaming_tasks.add(task)
+    task.add_done_callback(streaming_tasks.discard)
+
+    async def stream():
+        while True:
+            event = await events.get()
+            if event is None:
+                return
+            yield sse_event(*event)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def run_test(request_body: RequestBody, profile: bool = False, on_stage=None):
+    """Probes the upload, waits for an analysis slot and runs the analysis.
+
     Args:
         request_body (RequestBody): The request body containing file_name, acc_id, test_type, and lan_flag.
+        profile (bool): Whether to profile the analysis.
+        on_stage (callable): Receives the partial results of a public speaking test as each stage finishes.
+
+    Returns:
+        dict: The result of the audio analysis.
+
+    Raises:
+        AudioTooLargeError: If the recording is too large or too long.
+        AdmissionRejectedError: If the server is saturated.
+
+    """
+    with stage("probe"):
+        probe = await run_in_threadpool(
+            probe_audio, storage.bucket().blob(request_body.file_name)
+        )
+    check_limits(probe)
+    async with admission.slot(expected_cost(probe), request_body.acc_id) as waited:
+        record_stage("queue_wait", waited)
+        return await run_in_threadpool(process_test, request_body, profile, on_stage)
+
+
+def process_test(request_body: RequestBody, profile: bool = False, on_stage=None):
+    """Downloads, analyzes and stores the result of one audio file.
+
+    Args:
+        request_body (RequestBody): The request body containing file_name, acc_id, test_type, and lan_flag.
+        profile (bool): Whether to profile the analysis.
+        on_stage (callable): Receives the partial results of a public speaking test as each stage finishes.
 
     Returns:
         dict: The result of the audio analysis.
@@ -79,41 +411,37 @@ async def test(request_body: RequestBody):
         test_tag = datetime.now().strftime("%Y%m%d%H%M%S")
         lan_flag = request_body.lan_flag
 
-        # Create necessary directories
-        os.makedirs("recordings", exist_ok=True)
-        os.makedirs("recordings/PS_Check", exist_ok=True)
-        os.makedirs("recordings/Stuttering_Check", exist_ok=True)
-
-        # Download the audio file from Firebase storage
         bucket = storage.bucket()
         blob = bucket.blob(file_name)
-        blob.download_to_filename(file_name)
-
-        # Analyze the audio file
-        analysis_result = analysing_audio(file_name, test_type, lan_flag)
-
-        # Update Firestore with the analysis result
-        doc_ref = db.collection("User_Accounts").document(acc_id)
-        if test_type:
-            doc_ref.update(
-                {
-                    f"results.PS_Check.{test_tag}": json.loads(
-                        json.dumps(analysis_result)
-                    )
-                }
-            )
-        else:
-            doc_ref.update(
-                {
-                    f"results.Stuttering_Check.{test_tag}": json.loads(
-                        json.dumps(analysis_result)
-                    )
-                }
+        # Each request downloads into its own scratch directory, removed afterwards
+        with tempfile.TemporaryDirectory(prefix="saymore-") as scratch:
+            local_path = os.path.join(scratch, os.path.basename(file_name))
+            with stage("download"):
+                blob.download_to_filename(local_path)
+
+            # Analyze the audio file
+            with stage("analysis"), capture_profile(profile, test_type, lan_flag):
+                analysis_result = analysing_audio(
+                    local_path,
+                    test_type,
+                    lan_flag,
+                    blob_name=file_name,
+                    on_stage=on_stage,
+                )
+
+        # Store the analysis result and update the user's progress
+        test_kind = "PS_Check" if test_type else "Stuttering_Check"
+        with stage("firestore_write"):
+            record_result(
+                db,
+                acc_id,
+                test_kind,
+                test_tag,
+                to_native(stored_result(analysis_result)),
             )
 
-        # Clean up the downloaded file
+        # Clean up the uploaded file
         blob.delete()
-        os.remove(file_name)
         if "error" in analysis_result:
             raise HTTPException(status_code=500, detail=analysis_result["error"])
         return {"result": analysis_result}
@@ -129,6 +457,53 @@ async def test(request_body: RequestBody):
         ) from e
 
 
+# Define the /rescore endpoint
+@app.post("/rescore")
+async def rescore(request_body: RescoreBody):
+    """Endpoint to recompute the scores of a public speaking test from its stored features.
+
+    No audio is downloaded and no speech-to-text runs, so updated scoring weights can
+    be applied to historical results. When acc_id and test_tag are given, the stored
+    result and the user's progress are updated with the new scores.
+
+    Args:
+        request_body (RescoreBody): The request body containing feature_key and optionally acc_id and test_tag.
+
+    Returns:
+        FastJSONResponse: The recomputed result.
+
+    Raises:
+        HTTPException: 404 if no features or result are stored for the request, 500 if an error occurs during scoring.
+
+    """
+    try:
+        result = await run_in_threadpool(rescore_ps_test, request_body.feature_key)
+    except FeatureNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except Exception as e:
+        logging.error("An error occurred while rescoring: %s", str(e))
+        raise HTTPException(
+            status_code=500, detail="An internal error has occurred."
+        ) from e
+    if "error" in result["Voice_Quality_&_Stability_Data"]:
+        raise HTTPException(
+            status_code=500, detail=result["Voice_Quality_&_Stability_Data"]["error"]
+        )
+
+    if request_body.acc_id and request_body.test_tag:
+        found = await run_in_threadpool(
+            update_result,
+            db,
+            request_body.acc_id,
+            "PS_Check",
+            request_body.test_tag,
+            to_native(result),
+        )
+        if not found:
+            raise HTTPException(status_code=404, detail="Result not found")
+    return FastJSONResponse({"result": result})
+
+
 # Function to check if necessary environment variables are set
 def check_env_variables():
     """Check if the required environment variables are set.
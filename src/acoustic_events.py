@@ -0,0 +1,167 @@
+import os
+
+import numpy as np
+
+from src.frame_features import FrameFeatures
+from src.vad import HOP_LENGTH
+
+# Largest pitch change between neighbouring frames of a held sound, in semitones
+PROLONGATION_MAX_STEP_ST = 0.3
+# Largest pitch range over a whole held sound, in semitones
+PROLONGATION_MAX_RANGE_ST = 1.0
+# Shortest held sound reported as a prolongation, in seconds
+PROLONGATION_MIN_SECONDS = 0.6
+# Level relative to the loud (95th percentile) frames below which a frame is silent
+BLOCK_THRESHOLD_DB = -35.0
+# Silent gaps inside speech in this range are checked for blocks; longer ones are pauses
+BLOCK_MIN_SECONDS = 0.25
+BLOCK_MAX_SECONDS = 1.5
+# Voiced frames this close to a gap give the pitch on either side of it, in seconds
+BLOCK_CONTEXT_SECONDS = 0.1
+# Largest pitch change across a gap that still resumes the same sound, in semitones
+BLOCK_MAX_PITCH_JUMP_ST = 2.0
+
+
+def acoustic_detection_enabled():
+    """Returns whether stutter tests add acoustic events (ACOUSTIC_DETECTION, on by default)."""
+    return os.getenv("ACOUSTIC_DETECTION", "1") != "0"
+
+
+def _runs(mask):
+    """Returns the start and end (exclusive) indices of the runs of True values."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return edges[0::2], edges[1::2]
+
+
+def _event(kind, start, end):
+    return {
+        "type": kind,
+        "start": round(start, 2),
+        "end": round(end, 2),
+        "duration": round(end - start, 2),
+    }
+
+
+def detect_prolongations(times, semitones):
+    """Finds sustained voicing with an unchanging pitch.
+
+    Parameters
+    ----------
+    times (np.ndarray): The times of the voiced pitch frames.
+    semitones (np.ndarray): The pitch of those frames in semitones.
+
+    Returns
+    -------
+    list: One event per held sound longer than PROLONGATION_MIN_SECONDS.
+
+    """
+    if times.size < 2:
+        return []
+    steps = np.diff(times)
+    frame_step = np.min(steps)
+    # A link joins two neighbouring voiced frames whose pitch barely changes
+    held = (steps <= 1.5 * frame_step) & (
+        np.abs(np.diff(semitones)) <= PROLONGATION_MAX_STEP_ST
+    )
+    starts, ends = _runs(held)
+    if starts.size == 0:
+        return []
+    # Run i covers frames starts[i] to ends[i] inclusive; the appended value keeps
+    # the reduceat indices in range when a run ends on the last frame
+    bounds = np.column_stack((starts, ends + 1)).ravel()
+    padded = np.append(semitones, semitones[-1])
+    ranges = (
+        np.maximum.reduceat(padded, bounds)[0::2]
+        - np.minimum.reduceat(padded, bounds)[0::2]
+    )
+    durations = times[ends] - times[starts]
+    keep = (durations >= PROLONGATION_MIN_SECONDS) & (
+        ranges <= PROLONGATION_MAX_RANGE_ST
+    )
+    return [
+        _event("prolongation", times[s], times[e])
+        for s, e in zip(starts[keep], ends[keep], strict=True)
+    ]
+
+
+def _pitch_near(times, semitones, start, end):
+    """Returns the median pitch of the voiced frames from start to end, or None."""
+    lo, hi = np.searchsorted(times, (start, end))
+    return float(np.median(semitones[lo:hi])) if hi > lo else None
+
+
+def detect_gaps(rms, sr, times, semitones):
+    """Finds short silent gaps between stretches of speech and tells blocks from pauses.
+
+    A block stops a sound and resumes it, so the pitch on both sides of the
+    gap is about the same. Gaps between words or phrases usually come with a
+    pitch reset, or without voicing on one side, and are reported as pauses.
+
+    Parameters
+    ----------
+    rms (np.ndarray): The RMS energy of each frame.
+    sr (int): The sample rate of the audio.
+    times (np.ndarray): The times of the voiced pitch frames.
+    semitones (np.ndarray): The pitch of those frames in semitones.
+
+    Returns
+    -------
+    list: One block or pause event per gap between BLOCK_MIN_SECONDS and BLOCK_MAX_SECONDS long.
+
+    """
+    if rms.size == 0:
+        return []
+    reference = np.percentile(rms, 95)
+    if reference <= 0:
+        return []
+    level_db = 20 * np.log10(np.maximum(rms, 1e-10) / reference)
+    starts, ends = _runs(level_db < BLOCK_THRESHOLD_DB)
+    # Leading and trailing silence is not inside speech
+    inside = (starts > 0) & (ends < rms.size)
+    frame_seconds = HOP_LENGTH / sr
+    durations = (ends - starts) * frame_seconds
+    keep = inside & (durations >= BLOCK_MIN_SECONDS) & (durations <= BLOCK_MAX_SECONDS)
+
+    events = []
+    for s, e in zip(starts[keep], ends[keep], strict=True):
+        start, end = s * frame_seconds, e * frame_seconds
+        before = _pitch_near(times, semitones, start - BLOCK_CONTEXT_SECONDS, start)
+        after = _pitch_near(times, semitones, end, end + BLOCK_CONTEXT_SECONDS)
+        resumed = (
+            before is not None
+            and after is not None
+            and abs(after - before) <= BLOCK_MAX_PITCH_JUMP_ST
+        )
+        events.append(_event("block" if resumed else "pause", start, end))
+    return events
+
+
+def analyze_acoustic_events(audio_path, features=None):
+    """Detects prolongations, blocks and pauses from the pitch track and the RMS frames.
+
+    Speech recognition tends to clean these up, so they are found from the
+    signal instead of the transcript. Pauses are short gaps that do not look
+    like blocks; they are listed for context and are not disfluencies.
+
+    Parameters
+    ----------
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
+    features (FrameFeatures): Precomputed frame features of the same audio, if available.
+
+    Returns
+    -------
+    dict: The events ordered by time and the number of prolongations, blocks and pauses.
+
+    """
+    try:
+        features = features or FrameFeatures(audio_path)
+        prolongations = detect_prolongations(*features.pitch_track)
+        gaps = detect_gaps(features.rms[0], features.sr, *features.pitch_track)
+        return {
+            "events": sorted(prolongations + gaps, key=lambda e: e["start"]),
+            "prolongation_count": len(prolongations),
+            "block_count": sum(e["type"] == "block" for e in gaps),
+            "pause_count": sum(e["type"] == "pause" for e in gaps),
+        }
+    except Exception as e:
+        return {"error": str(e)}
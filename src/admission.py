@@ -0,0 +1,414 @@
+import asyncio
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+import hashlib
+import math
+import os
+import time
+
+# Rough peak memory of one analysis (decoded samples, Praat objects, librosa buffers)
+DEFAULT_ANALYSIS_MEMORY_MB = 300
+# Number of recent wait times kept for the wait-time percentiles
+WAIT_SAMPLE_SIZE = 500
+
+
+def account_label(account):
+    """Returns a short hash of an account id, so the metrics do not publish the id itself.
+
+    Parameters
+    ----------
+    account (str): The account id.
+
+    Returns
+    -------
+    str: The first 12 hex digits of the SHA-256 of the id.
+
+    """
+    return hashlib.sha256(str(account).encode()).hexdigest()[:12]
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request cannot be admitted and should be retried later."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("future", "cost", "enqueued", "account")
+
+    def __init__(self, future, cost, enqueued, account=None):
+        self.future = future
+        self.cost = cost
+        self.enqueued = enqueued
+        self.account = account
+
+
+def available_memory_mb():
+    """Returns the memory available to this container in megabytes.
+
+    The cgroup limit is preferred so the value matches the dyno size rather than
+    the host machine.
+
+    Returns
+    -------
+    float: The available memory in megabytes, or None if it cannot be determined.
+
+    """
+    for path in (
+        "/sys/fs/cgroup/memory.max",
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+    ):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value) / (1024 * 1024)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def available_cpus():
+    """Returns the number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_max_concurrency():
+    """Derives the number of concurrent analyses from the CPU count and memory.
+
+    The CPUs and memory of the container are shared between the WEB_CONCURRENCY
+    server workers, so each worker only gets its share.
+
+    Returns
+    -------
+    int: The concurrency limit, at least 1.
+
+    """
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    limit = available_cpus() // workers
+    memory_mb = available_memory_mb()
+    per_analysis_mb = float(
+        os.getenv("ANALYSIS_MEMORY_MB", str(DEFAULT_ANALYSIS_MEMORY_MB))
+    )
+    if memory_mb is not None and per_analysis_mb > 0:
+        limit = min(limit, int(memory_mb / workers // per_analysis_mb))
+    return max(1, limit)
+
+
+class AdmissionController:
+    """Bounds the number of analyses running at once in this worker.
+
+    Requests beyond ``max_concurrency`` wait in a queue of at most ``max_queue``
+    entries for up to ``queue_timeout`` seconds. Requests that find the queue
+    full, or time out while waiting, are rejected with a retry hint.
+
+    Slots are shared fairly between accounts. A freed slot goes to the account
+    with the fewest running analyses, and accounts that tie take turns, so one
+    account submitting many recordings cannot hold back the others. No account
+    runs more than ``max_per_account`` analyses at once. When the queue is full,
+    a newcomer displaces the most recent waiter of the account with the most
+    waiters, if that account has at least two more waiters than the newcomer's
+    account would have.
+
+    Within an account, the slot goes to the waiter with the highest response
+    ratio ``(waited + cost) / cost``, so short jobs overtake long ones while a
+    long job's claim grows the longer it waits. A waiter that has waited
+    ``max_bypass`` seconds is served before the account's other waiters, oldest
+    first. Waiters with equal costs are served in arrival order.
+    """
+
+    def __init__(
+        self,
+        max_concurrency,
+        max_queue,
+        queue_timeout,
+        clock=time.monotonic,
+        max_bypass=None,
+        max_per_account=None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_bypass = queue_timeout / 2 if max_bypass is None else max_bypass
+        self.max_per_account = max_per_account or max_concurrency
+        self.clock = clock
+        self.active = 0
+        # Running analyses per account, and the grant number of each account's last slot
+        self.running = defaultdict(int)
+        self.last_served = {}
+        self.grants = 0
+        self.waiters = []
+        self.avg_service_time = 1.0
+        self.wait_times = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self.metrics = {
+            "admitted": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "max_queue_depth": 0,
+            "reordered": 0,
+            "rejected_displaced": 0,
+        }
+
+    def retry_after(self):
+        """Estimates how many seconds a rejected client should wait before retrying."""
+        backlog = (len(self.waiters) + 1) / self.max_concurrency
+        return max(1, math.ceil(backlog * self.avg_service_time))
+
+    async def acquire(self, cost=None, account=None):
+        """Waits for an analysis slot.
+
+        Parameters
+        ----------
+        cost (float): The expected processing time in seconds; None if unknown.
+        account (str): The account the analysis is for; None if unknown.
+
+        Returns
+        -------
+        float: The time in seconds spent waiting in the queue.
+
+        Raises
+        ------
+        AdmissionRejectedError: If the queue is full, the wait timed out or a request of a less busy account took
+            the place in the queue.
+
+        """
+        # Waiters that could take a free slot are always handed one when it is
+        # freed, so a free slot means no waiter is eligible for it
+        if self.active < self.max_concurrency and self._eligible(account):
+            self.active += 1
+            self._grant(account)
+            self._admit(0.0)
+            return 0.0
+        if len(self.waiters) >= self.max_queue and not self._displace(account):
+            self.metrics["rejected_queue_full"] += 1
+            raise AdmissionRejectedError(
+                "Server is busy; the queue is full.", self.retry_after()
+            )
+
+        started = self.clock()
+        waiter = _Waiter(
+            asyncio.get_running_loop().create_future(), cost, started, account
+        )
+        self.waiters.append(waiter)
+        self.metrics["max_queue_depth"] = max(
+            self.metrics["max_queue_depth"], len(self.waiters)
+        )
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                self.metrics["rejected_timeout"] += 1
+                raise AdmissionRejectedError(
+                    "Server is busy; timed out waiting for a slot.", self.retry_after()
+                ) from None
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release(account=account)
+            raise
+        waited = self.clock() - started
+        self._admit(waited)
+        return waited
+
+    def _abandon(self, waiter):
+        """Drops a waiter that stopped waiting; returns True if it had been granted a slot."""
+        if waiter.future.done():
+            return not waiter.future.exception()
+        waiter.future.cancel()
+        self.waiters.remove(waiter)
+        return False
+
+    def _eligible(self, account):
+        return self.running.get(account, 0) < self.max_per_account
+
+    def _grant(self, account):
+        self.running[account] += 1
+        self.grants += 1
+        self.last_served[account] = self.grants
+
+    def _displace(self, account):
+        """Frees a queue place for an account by rejecting the newest waiter of the busiest account.
+
+        Returns
+        -------
+        bool: True if a waiter was displaced.
+
+        """
+        if not self.waiters:
+            return False
+        queued = defaultdict(int)
+        for waiter in self.waiters:
+            queued[waiter.account] += 1
+        busiest = max(queued, key=queued.get)
+        if queued[busiest] < queued[account] + 2:
+            return False
+        waiter = next(w for w in reversed(self.waiters) if w.account == busiest)
+        self.waiters.remove(waiter)
+        self.metrics["rejected_displaced"] += 1
+        waiter.future.set_exception(
+            AdmissionRejectedError(
+                "Server is busy; other accounts are waiting.", self.retry_after()
+            )
+        )
+        return True
+
+    def _next_waiter(self):
+        """Picks the waiter that receives the next free slot, or None if every waiting account is at its limit."""
+        eligible = [w for w in self.waiters if self._eligible(w.account)]
+        if not eligible:
+            return None
+        # Fewest running analyses first, then the account served longest ago
+        account = min(
+            (w.account for w in eligible),
+            key=lambda a: (self.running.get(a, 0), self.last_served.get(a, 0)),
+        )
+        candidates = [w for w in eligible if w.account == account]
+
+        now = self.clock()
+        overdue = [w for w in candidates if now - w.enqueued >= self.max_bypass]
+        if overdue:
+            return overdue[0]
+
+        def response_ratio(waiter):
+            # Unknown costs count as an average analysis
+            cost = max(waiter.cost or self.avg_service_time, 0.1)
+            return (now - waiter.enqueued + cost) / cost
+
+        # max() keeps the first of equal ratios, i.e. the oldest waiter
+        return max(candidates, key=response_ratio)
+
+    def _admit(self, waited):
+        self.metrics["admitted"] += 1
+        self.wait_times.append(waited)
+
+    def release(self, service_time=None, account=None):
+        """Frees a slot, handing it directly to the next waiter if there is one.
+
+        Parameters
+        ----------
+        service_time (float): How long the finished analysis held the slot, used for the retry estimate.
+        account (str): The account that held the slot.
+
+        """
+        if service_time is not None:
+            self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * service_time
+        self.running[account] -= 1
+        if not self.running[account]:
+            del self.running[account]
+        waiter = self._next_waiter()
+        if waiter is not None:
+            if waiter is not self.waiters[0]:
+                self.metrics["reordered"] += 1
+            self.waiters.remove(waiter)
+            self._grant(waiter.account)
+            waiter.future.set_result(None)
+        else:
+            self.active -= 1
+        self._forget_idle(account)
+
+    def _forget_idle(self, account):
+        if account not in self.running and all(
+            w.account != account for w in self.waiters
+        ):
+            self.last_served.pop(account, None)
+
+    @asynccontextmanager
+    async def slot(self, cost=None, account=None):
+        """Context manager that holds an analysis slot for the duration of the block.
+
+        Parameters
+        ----------
+        cost (float): The expected processing time in seconds; None if unknown.
+        account (str): The account the analysis is for; None if unknown.
+
+        Yields
+        ------
+        float: The time in seconds spent waiting in the queue.
+
+        """
+        waited = await self.acquire(cost, account)
+        started = self.clock()
+        try:
+            yield waited
+        finally:
+            self.release(self.clock() - started, account)
+
+    def account_metrics(self):
+        """Returns the running and queued analyses of every account with work in this worker."""
+        accounts = {
+            account: {"active": count, "queued": 0}
+            for account, count in self.running.items()
+        }
+        for waiter in self.waiters:
+            accounts.setdefault(waiter.account, {"active": 0, "queued": 0})
+            accounts[waiter.account]["queued"] += 1
+        return accounts
+
+    def snapshot(self):
+        """Returns the admission metrics, including queue depth and wait-time percentiles."""
+        waits = sorted(self.wait_times)
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3)
+
+        return {
+            **self.metrics,
+            "active": self.active,
+            "queue_depth": len(self.waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "max_bypass": self.max_bypass,
+            "max_per_account": self.max_per_account,
+            "queued_cost_seconds": round(
+                sum(w.cost or self.avg_service_time for w in self.waiters), 2
+            ),
+            "wait_seconds_p50": percentile(0.50),
+            "wait_seconds_p95": percentile(0.95),
+            "wait_seconds_max": round(waits[-1], 3) if waits else 0.0,
+            "accounts": {
+                account_label(account): counts
+                for account, counts in self.account_metrics().items()
+            },
+        }
+
+
+def create_admission_controller():
+    """Creates the admission controller from environment settings.
+
+    ADMISSION_MAX_CONCURRENCY defaults to a limit derived from the CPU count and
+    memory, ADMISSION_MAX_QUEUE to twice that, ADMISSION_QUEUE_TIMEOUT to 10 seconds,
+    ADMISSION_MAX_BYPASS to half the queue timeout and ADMISSION_MAX_PER_ACCOUNT
+    to the concurrency limit.
+
+    Returns
+    -------
+    AdmissionController: The configured controller.
+
+    """
+    max_concurrency = int(
+        os.getenv("ADMISSION_MAX_CONCURRENCY", str(default_max_concurrency()))
+    )
+    max_queue = int(os.getenv("ADMISSION_MAX_QUEUE", str(2 * max_concurrency)))
+    queue_timeout = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+    max_bypass = float(os.getenv("ADMISSION_MAX_BYPASS", str(queue_timeout / 2)))
+    max_per_account = int(os.getenv("ADMISSION_MAX_PER_ACCOUNT", str(max_concurrency)))
+    return AdmissionController(
+        max_concurrency,
+        max_queue,
+        queue_timeout,
+        max_bypass=max_bypass,
+        max_per_account=max_per_account,
+    )
@@ -0,0 +1,95 @@
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import threading
+
+from src.shared_audio import AudioSamples, SharedSamples, attach_samples, load_samples
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def pool_size():
+    """Returns the configured number of analysis processes; 0 runs analyzers inline."""
+    return int(os.getenv("ANALYSIS_POOL_WORKERS", "0"))
+
+
+def get_executor():
+    """Returns the shared process pool, creating it on first use.
+
+    Returns
+    -------
+    ProcessPoolExecutor: The pool, or None when analyzers run inline.
+
+    """
+    global _executor
+    workers = pool_size()
+    if workers <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            context = multiprocessing.get_context(
+                os.getenv("ANALYSIS_POOL_START_METHOD", "forkserver")
+            )
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return _executor
+
+
+def _discard_executor():
+    """Drops a pool whose worker died so the next request starts a fresh one."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _run_task(func, handle, args):
+    """Runs one analyzer in a pool process against the shared samples."""
+    return func(attach_samples(handle), *args)
+
+
+def run_analyzers(audio_path, tasks):
+    """Runs several analyzers over one recording, decoding it only once.
+
+    With a process pool configured the decoded samples are shared with the
+    workers through a memory-mapped file instead of being pickled per task.
+
+    Parameters
+    ----------
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
+    tasks (dict): Maps a result name to an ``(analyzer, extra_args)`` pair. Each analyzer is
+        called as ``analyzer(samples, *extra_args)``.
+
+    Returns
+    -------
+    dict: Maps each result name to the value returned by its analyzer.
+
+    """
+    audio = (
+        audio_path if isinstance(audio_path, AudioSamples) else load_samples(audio_path)
+    )
+    executor = get_executor()
+    if executor is None:
+        return {name: func(audio, *args) for name, (func, args) in tasks.items()}
+
+    with SharedSamples(audio) as handle:
+        futures = {
+            name: executor.submit(_run_task, func, handle, args)
+            for name, (func, args) in tasks.items()
+        }
+        done, pending = wait(futures.values(), return_when=FIRST_EXCEPTION)
+        for future in pending:
+            future.cancel()
+        # Wait for tasks that already started before the shared file is removed
+        wait(pending)
+
+    errors = [future.exception() for future in done if future.exception()]
+    if errors:
+        if isinstance(errors[0], BrokenProcessPool):
+            logging.error("An analysis worker died; restarting the process pool.")
+            _discard_executor()
+        raise errors[0]
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,148 @@
+import logging
+import os
+import struct
+
+# Bytes read from the start of a blob to find the WAV header
+HEADER_BYTES = 4096
+# Data rate assumed for uploads whose header cannot be read (16 kHz, 16-bit mono)
+ASSUMED_BYTES_PER_SECOND = 32000
+
+
+class AudioTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size or duration limit."""
+
+
+def parse_wav_header(header, total_size=None):
+    """Reads the format and duration of a WAV file from its first bytes.
+
+    Parameters
+    ----------
+    header (bytes): The start of the file.
+    total_size (int): The full size of the file, used when the data chunk size is not set.
+
+    Returns
+    -------
+    dict: sample_rate, channels, bits_per_sample and duration, or None if the bytes hold no readable WAV header.
+
+    """
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(header):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", header, offset)
+        body = offset + 8
+        if chunk_id == b"fmt " and body + 16 <= len(header):
+            _, channels, sample_rate, byte_rate, _, bits = struct.unpack_from(
+                "<HHIIHH", header, body
+            )
+            fmt = (channels, sample_rate, byte_rate, bits)
+        elif chunk_id == b"data" and fmt:
+            channels, sample_rate, byte_rate, bits = fmt
+            # Streamed files leave the size unset; the rest of the file is data then
+            if chunk_size in (0, 0xFFFFFFFF) and total_size:
+                chunk_size = total_size - body
+            if not byte_rate:
+                return None
+            return {
+                "sample_rate": sample_rate,
+                "channels": channels,
+                "bits_per_sample": bits,
+                "duration": chunk_size / byte_rate,
+            }
+        # Chunks are padded to an even size
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def file_duration(path):
+    """Reads the duration of a downloaded recording from its WAV header, without decoding it.
+
+    Parameters
+    ----------
+    path (str): The path to the recording.
+
+    Returns
+    -------
+    float: The duration in seconds, or None if the file has no readable WAV header.
+
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER_BYTES)
+    wav = parse_wav_header(header, os.path.getsize(path))
+    return wav["duration"] if wav else None
+
+
+def probe_audio(blob):
+    """Estimates the duration of an upload from its metadata and header, without downloading it.
+
+    Parameters
+    ----------
+    blob (storage.Blob): The uploaded recording.
+
+    Returns
+    -------
+    dict: size, content_type and duration (None where unknown) and the source of the duration ("wav_header" or "size").
+
+    """
+    probe = {"size": None, "content_type": None, "duration": None, "source": None}
+    try:
+        blob.reload()
+        probe["size"], probe["content_type"] = blob.size, blob.content_type
+        header = blob.download_as_bytes(start=0, end=HEADER_BYTES - 1)
+    except Exception as e:
+        logging.warning("Could not probe %s: %s", getattr(blob, "name", blob), e)
+        return probe
+
+    wav = parse_wav_header(header, probe["size"])
+    if wav:
+        probe.update(duration=wav["duration"], source="wav_header")
+    elif probe["size"]:
+        probe.update(duration=probe["size"] / ASSUMED_BYTES_PER_SECOND, source="size")
+    return probe
+
+
+def check_limits(probe):
+    """Rejects uploads over MAX_AUDIO_BYTES or MAX_AUDIO_SECONDS before they are downloaded.
+
+    Parameters
+    ----------
+    probe (dict): The result of probe_audio.
+
+    Raises
+    ------
+    AudioTooLargeError: If the upload is too large or too long.
+
+    """
+    max_bytes = int(os.getenv("MAX_AUDIO_BYTES", str(100 * 1024 * 1024)))
+    max_seconds = float(os.getenv("MAX_AUDIO_SECONDS", "600"))
+    if probe["size"] is not None and probe["size"] > max_bytes:
+        raise AudioTooLargeError(
+            f"The recording is {probe['size']} bytes; the limit is {max_bytes}."
+        )
+    if probe["duration"] is not None and probe["duration"] > max_seconds:
+        raise AudioTooLargeError(
+            f"The recording is {probe['duration']:.0f} s long; the limit is {max_seconds:.0f} s."
+        )
+
+
+def expected_cost(probe):
+    """Estimates the processing time of an upload in seconds from its duration.
+
+    The estimate is ADMISSION_COST_BASE_SECONDS plus ADMISSION_COST_PER_AUDIO_SECOND
+    for every second of audio.
+
+    Parameters
+    ----------
+    probe (dict): The result of probe_audio.
+
+    Returns
+    -------
+    float: The expected processing time, or None if the duration is unknown.
+
+    """
+    if probe["duration"] is None:
+        return None
+    base = float(os.getenv("ADMISSION_COST_BASE_SECONDS", "2"))
+    per_second = float(os.getenv("ADMISSION_COST_PER_AUDIO_SECOND", "0.2"))
+    return base + per_second * probe["duration"]
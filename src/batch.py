@@ -0,0 +1,297 @@
+"""Resumable batch analysis of a directory of recordings.
+
+Runs analyze_speech_1 and analyze_speech_2 on every WAV file under a
+directory, one file per process, and appends one JSON line per file::
+
+    python -m src.batch corpus/ --out corpus.jsonl --workers 8 --transcripts sidecar
+
+Files already in the output are skipped, so an interrupted run continues
+where it stopped when started again with the same arguments. Files that
+failed are retried.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import fnmatch
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from src.response import dumps
+
+# BLAS and OpenMP thread pools are limited to one thread per worker process so
+# that throughput scales with the number of workers instead of oversubscribing cores
+_THREAD_LIMITS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMBA_NUM_THREADS",
+)
+TRANSCRIPT_MODES = ("stt", "sidecar", "none")
+
+
+def find_recordings(root, pattern="*.wav"):
+    """Returns the paths of the matching files under root, relative to it and sorted."""
+    found = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if fnmatch.fnmatch(name.lower(), pattern):
+                found.append(os.path.relpath(os.path.join(directory, name), root))
+    return sorted(found)
+
+
+def load_completed(out_path):
+    """Reads the files already analyzed without an error from an output file.
+
+    A line cut short by an interrupted run is ignored, and a newline is added so
+    the next result starts on a line of its own.
+
+    Parameters
+    ----------
+    out_path (str): The JSONL output file.
+
+    Returns
+    -------
+    set: The relative paths of the completed files.
+
+    """
+    if not os.path.exists(out_path):
+        return set()
+    completed = set()
+    with open(out_path, "rb") as f:
+        data = f.read()
+    for line in data.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if "error" not in record:
+            completed.add(record["file"])
+    if data and not data.endswith(b"\n"):
+        with open(out_path, "ab") as f:
+            f.write(b"\n")
+    return completed
+
+
+def read_transcript(path, mode, lan_flag, gcs_uri=None):
+    """Returns the transcript of a recording.
+
+    Speech-to-text takes the same path as the public speaking test: short
+    recordings are sent inline for synchronous recognition and longer ones use
+    long-running recognition, and every recognized utterance is kept.
+
+    Parameters
+    ----------
+    path (str): The path to the recording.
+    mode (str): "sidecar" reads the .txt file next to the recording, "stt" transcribes
+        the recording with Google Speech-to-Text and "none" uses no transcript.
+    lan_flag (str): The language flag ("en", "si", "ta") for speech-to-text.
+    gcs_uri (str): The Cloud Storage URI of the recording, needed by "stt" for files
+        over 10 MB, which cannot be sent inline.
+
+    Returns
+    -------
+    str: The transcript.
+
+    Raises
+    ------
+    FileNotFoundError: If mode is "sidecar" and the recording has no .txt file.
+    ValueError: If mode is "stt" and the recording cannot be transcribed.
+
+    """
+    if mode == "sidecar":
+        with open(os.path.splitext(path)[0] + ".txt", encoding="utf-8") as f:
+            return f.read().strip()
+    if mode == "stt":
+        # Imported here so the other modes need no speech service credentials
+        from src.audio_probe import file_duration
+        from src.ps_test import transcript_text
+        from src.speech_to_text import (
+            SYNC_INLINE_MAX_BYTES,
+            transcribe_gcs,
+            use_long_running,
+        )
+
+        duration = file_duration(path)
+        if duration is None:
+            raise ValueError(f"{path} has no readable WAV header")
+        size = os.path.getsize(path)
+        long_flag = use_long_running(duration, size)
+        content = None
+        # Without a Cloud Storage copy, long recordings are sent inline as well
+        if not long_flag or gcs_uri is None:
+            if size > SYNC_INLINE_MAX_BYTES:
+                raise ValueError(f"{path} is over 10 MB; pass --gcs-prefix")
+            with open(path, "rb") as f:
+                content = f.read()
+        segments = transcribe_gcs(gcs_uri, long_flag, lan_flag, content)
+        errors = [segment["error"] for segment in segments if "error" in segment]
+        if errors:
+            raise ValueError(f"Speech-to-text failed: {errors[0]}")
+        return transcript_text(segments)[0]
+    return ""
+
+
+def analyze_file(root, relative_path, transcripts, lan_flag, engine, gcs_prefix=None):
+    """Analyzes one recording; runs in a worker process.
+
+    Parameters
+    ----------
+    root (str): The corpus directory.
+    relative_path (str): The path of the recording relative to root.
+    transcripts (str): One of TRANSCRIPT_MODES.
+    lan_flag (str): The language flag for speech-to-text.
+    engine (str): The voice quality engine, or None for VOICE_QUALITY_ENGINE.
+    gcs_prefix (str): The Cloud Storage URI the corpus is mirrored under, if any.
+
+    Returns
+    -------
+    dict: The file, its duration, transcript, voice and energy results and the time
+    taken, or the file and an error message.
+
+    """
+    from src.frame_features import FrameFeatures
+    from src.ps_test_cat1 import analyze_speech_1
+    from src.ps_test_cat2 import analyze_speech_2
+
+    started = time.perf_counter()
+    path = os.path.join(root, relative_path)
+    try:
+        gcs_uri = f"{gcs_prefix.rstrip('/')}/{relative_path}" if gcs_prefix else None
+        text = read_transcript(path, transcripts, lan_flag, gcs_uri)
+        features = FrameFeatures(path)
+        voice = analyze_speech_1(features.audio, text, features, engine)
+        energy = analyze_speech_2(features.audio, features=features)
+    except Exception as e:
+        return {"file": relative_path, "error": str(e)}
+    return {
+        "file": relative_path,
+        "duration": round(features.duration, 3),
+        "transcript": text,
+        "voice": voice,
+        "energy": energy,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _init_worker():
+    # Each file is one task; analyzers run inline in the worker
+    os.environ["ANALYSIS_POOL_WORKERS"] = "0"
+
+
+def run_batch(
+    root,
+    out_path,
+    workers,
+    transcripts="stt",
+    lan_flag="en",
+    engine=None,
+    gcs_prefix=None,
+):
+    """Analyzes every recording under root that is not yet in the output file.
+
+    Parameters
+    ----------
+    root (str): The corpus directory.
+    out_path (str): The JSONL output file, appended to.
+    workers (int): The number of worker processes.
+    transcripts (str): One of TRANSCRIPT_MODES.
+    lan_flag (str): The language flag for speech-to-text.
+    engine (str): The voice quality engine, or None for VOICE_QUALITY_ENGINE.
+    gcs_prefix (str): The Cloud Storage URI the corpus is mirrored under, for
+        transcribing recordings over 10 MB.
+
+    Returns
+    -------
+    tuple: The numbers of files analyzed, failed and skipped as already done.
+
+    """
+    recordings = find_recordings(root)
+    completed = load_completed(out_path)
+    pending = [path for path in recordings if path not in completed]
+    skipped = len(recordings) - len(pending)
+    if not pending:
+        return 0, 0, skipped
+
+    for name in _THREAD_LIMITS:
+        os.environ.setdefault(name, "1")
+    context = multiprocessing.get_context(
+        os.getenv("ANALYSIS_POOL_START_METHOD", "forkserver")
+    )
+    analyzed = failed = 0
+    started = time.perf_counter()
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=context, initializer=_init_worker
+    )
+    with open(out_path, "ab") as out, executor:
+        futures = [
+            executor.submit(
+                analyze_file, root, path, transcripts, lan_flag, engine, gcs_prefix
+            )
+            for path in pending
+        ]
+        try:
+            for future in as_completed(futures):
+                record = future.result()
+                # One flushed line per file is the progress record for resuming
+                out.write(dumps(record) + b"\n")
+                out.flush()
+                failed += "error" in record
+                analyzed += "error" not in record
+                done = analyzed + failed
+                rate = done / (time.perf_counter() - started)
+                print(
+                    f"\r{done}/{len(pending)} files, {failed} failed, "
+                    f"{rate:.2f} files/s, ETA {(len(pending) - done) / rate:.0f} s",
+                    end="",
+                    file=sys.stderr,
+                )
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            print(file=sys.stderr)
+    return analyzed, failed, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="Directory searched recursively for .wav files.")
+    parser.add_argument("--out", required=True, help="JSONL file the results go to.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes; defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--transcripts",
+        choices=TRANSCRIPT_MODES,
+        default="stt",
+        help="Transcribe with Google Speech-to-Text (stt), read <recording>.txt (sidecar) or use none.",
+    )
+    parser.add_argument("--lan-flag", default="en")
+    parser.add_argument("--engine", choices=("praat", "numpy"), default=None)
+    parser.add_argument(
+        "--gcs-prefix",
+        default=None,
+        help="gs:// URI the corpus is mirrored under; needed by stt for files over 10 MB.",
+    )
+    args = parser.parse_args()
+
+    analyzed, failed, skipped = run_batch(
+        args.root,
+        args.out,
+        args.workers,
+        args.transcripts,
+        args.lan_flag,
+        args.engine,
+        args.gcs_prefix,
+    )
+    print(f"{analyzed} analyzed, {failed} failed, {skipped} already done")
+
+
+if __name__ == "__main__":
+    main()
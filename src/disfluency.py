@@ -0,0 +1,165 @@
+from collections import Counter
+import re
+import string
+
+# Filler tokens, matched after collapsing repeated letters ("ummm" -> "um")
+FILLERS = {"um", "uhm", "uh", "er", "erm", "ah", "eh", "hm", "mm", "hmm"}
+# Words that are doubled in fluent speech ("had had", "very very")
+ALLOWED_DOUBLES = {"had", "that", "very", "really", "bye", "no", "ha", "hey"}
+# Longest repeated phrase, in words, that counts as one repetition
+MAX_NGRAM = 3
+# Percentage of disfluent words that maps to a stuttering score of 100
+SEVERE_PERCENT = 20.0
+
+LANGUAGES = {"en": "English", "si": "Sinhala", "ta": "Tamil"}
+# Languages whose fillers and doubled words the detector knows; others go to Gemini
+LOCAL_LANGUAGES = {"en"}
+
+_PUNCTUATION = string.punctuation.replace("-", "") + "…“”‘’«»"
+_PROLONGATION = re.compile(r"([^\W\d_])\1{2,}")
+
+
+def tokenize(transcript):
+    """Splits a transcript into lowercase words without surrounding punctuation."""
+    tokens = (word.strip(_PUNCTUATION).lower() for word in transcript.split())
+    return [token for token in tokens if token.strip("-")]
+
+
+def _collapse(token):
+    """Collapses letters repeated three or more times ("sssso" -> "so")."""
+    return _PROLONGATION.sub(r"\1", token)
+
+
+def _part_word_repetition(token):
+    """Returns the stem of a hyphenated repetition such as "b-b-ball", or None."""
+    parts = [part for part in token.split("-") if part]
+    if len(parts) < 2:
+        return None
+    *fragments, word = parts
+    first = fragments[0]
+    if all(fragment == first for fragment in fragments) and word.startswith(first):
+        return word
+    return None
+
+
+def _match_repetition(tokens, i):
+    """Matches a repetition starting at tokens[i].
+
+    Returns the event (or None) and the number of tokens it covers.
+    """
+    token = tokens[i]
+    # A short fragment said twice or more right before the word it starts
+    run = 1
+    while i + run < len(tokens) and tokens[i + run] == token:
+        run += 1
+    following = tokens[i + run] if i + run < len(tokens) else ""
+    if run >= 2 and len(token) <= 3 and following.startswith(token):
+        return {"word": following, "type": "part-word repetition"}, run
+
+    # A word or phrase repeated right after itself, possibly several times
+    for n in range(MAX_NGRAM, 0, -1):
+        gram = tokens[i : i + n]
+        if len(gram) < n or tokens[i + n : i + 2 * n] != gram:
+            continue
+        if n == 1 and token in ALLOWED_DOUBLES:
+            continue
+        repeats = 1
+        while tokens[i + (repeats + 1) * n : i + (repeats + 2) * n] == gram:
+            repeats += 1
+        kind = "word repetition" if n == 1 else "phrase repetition"
+        return {"word": " ".join(gram), "type": kind}, repeats * n
+    return None, 1
+
+
+def detect_disfluencies(transcript):
+    """Finds repetitions, fillers and prolongations in a transcript.
+
+    Word and phrase repetitions are found by comparing each n-gram of up to
+    MAX_NGRAM words with the one that follows it; part-word repetitions by
+    hyphenated fragments ("b-b-ball") or fragments repeated before the word
+    ("st st stop"); prolongations by letters spelled three or more times.
+
+    Parameters
+    ----------
+    transcript (str): The transcript text.
+
+    Returns
+    -------
+    tuple: The number of words and a list of {"word", "type"} events in transcript order.
+
+    """
+    tokens = tokenize(transcript)
+    events = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        collapsed = _collapse(token)
+
+        if collapsed in FILLERS:
+            events.append({"word": collapsed, "type": "filler"})
+            i += 1
+            continue
+
+        stem = _part_word_repetition(token)
+        if stem:
+            events.append({"word": stem, "type": "part-word repetition"})
+            i += 1
+            continue
+
+        event, consumed = _match_repetition(tokens, i)
+        if event:
+            events.append(event)
+        elif collapsed != token:
+            events.append({"word": collapsed, "type": "prolongation"})
+        i += consumed
+    return len(tokens), events
+
+
+def _feedback(events, stuttering_score):
+    if not events:
+        return "Your speech was fluent, with no repetitions, fillers or prolongations detected. Keep it up!"
+    common = Counter(event["type"] for event in events).most_common(1)[0][0]
+    if stuttering_score < 30:
+        opening = "Your speech was mostly fluent."
+    elif stuttering_score < 60:
+        opening = "Your speech showed some disfluencies."
+    else:
+        opening = "Your speech showed frequent disfluencies."
+    return (
+        f"{opening} The most common pattern was {common}, out of "
+        f"{len(events)} disfluencies in total. Slowing down slightly and pausing "
+        "instead of repeating or filling gaps can help."
+    )
+
+
+def analyze_disfluency_local(transcript, lan_flag="en"):
+    """Analyze a transcript for stuttering patterns without calling a model.
+
+    Returns the same keys as the Gemini analysis so the two can be used
+    interchangeably.
+
+    Parameters
+    ----------
+    transcript (str): The transcript text.
+    lan_flag (str): The language flag of the test ("en", "si", "ta").
+
+    Returns
+    -------
+    dict: The analysis results.
+
+    """
+    word_count, events = detect_disfluencies(transcript)
+    percent = 100 * len(events) / word_count if word_count else 0.0
+    stuttering_score = round(min(100.0, 100 * percent / SEVERE_PERCENT))
+    return {
+        "language": LANGUAGES.get(lan_flag, "English"),
+        "stutter_count": len(events),
+        "stuttered_words": events,
+        "cluttering_detected": False,
+        "fluency_score": 100 - stuttering_score,
+        "stuttering_score": stuttering_score,
+        "dynamic_feedback": _feedback(events, stuttering_score),
+        # A handful of words says little about fluency
+        "confidence_score": round(min(95, 50 + 2 * word_count)),
+        "analysis_source": "local",
+    }
@@ -0,0 +1,164 @@
+import hashlib
+import io
+import os
+import re
+
+from firebase_admin import storage
+import numpy as np
+
+from src.frame_features import FrameFeatures
+
+# Version of the stored array layout, bumped whenever fields change meaning
+FORMAT_VERSION = 1
+# Folder of the Firebase bucket that holds the feature files
+STORAGE_PREFIX = "features/"
+KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class FeatureNotFoundError(LookupError):
+    """Raised when no features are stored under a key."""
+
+
+def audio_digest(audio_path, lan_flag):
+    """Computes the key of a recording: the SHA-256 of its language and file contents.
+
+    The stored transcript depends on the language, so the same audio tested in
+    another language gets its own key.
+
+    Parameters
+    ----------
+    audio_path (str): The path to the audio file.
+    lan_flag (str): The language flag used in the transcription.
+
+    Returns
+    -------
+    str: The hexadecimal digest.
+
+    """
+    digest = hashlib.sha256(lan_flag.encode() + b"\0")
+    with open(audio_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _local_path(key):
+    return os.path.join(os.getenv("FEATURE_STORE_DIR"), f"{key}.npz")
+
+
+def _write(key, data):
+    if os.getenv("FEATURE_STORE_DIR"):
+        os.makedirs(os.getenv("FEATURE_STORE_DIR"), exist_ok=True)
+        with open(_local_path(key), "wb") as f:
+            f.write(data)
+    else:
+        blob = storage.bucket().blob(f"{STORAGE_PREFIX}{key}.npz")
+        blob.upload_from_string(data, content_type="application/octet-stream")
+
+
+def _read(key):
+    if os.getenv("FEATURE_STORE_DIR"):
+        try:
+            with open(_local_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    blob = storage.bucket().blob(f"{STORAGE_PREFIX}{key}.npz")
+    return blob.download_as_bytes() if blob.exists() else None
+
+
+def pack_features(features, transcribe):
+    """Serialises the features and transcript of a public speaking test.
+
+    Parameters
+    ----------
+    features (FrameFeatures): The measured features of the recording.
+    transcribe (list): The transcription segments with their confidence.
+
+    Returns
+    -------
+    bytes: A compressed ``.npz`` archive.
+
+    """
+    arrays = features.to_arrays()
+    arrays["transcripts"] = np.array(
+        [t.get("transcript", "") for t in transcribe], dtype=str
+    )
+    arrays["confidences"] = np.array(
+        [t.get("confidence", np.nan) for t in transcribe], dtype=float
+    )
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, version=np.asarray(FORMAT_VERSION), **arrays)
+    return buffer.getvalue()
+
+
+def unpack_features(data):
+    """Restores the features and transcript written by pack_features.
+
+    Parameters
+    ----------
+    data (bytes): The ``.npz`` archive.
+
+    Returns
+    -------
+    tuple: The restored FrameFeatures and the transcription segments.
+
+    """
+    with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+        arrays = {name: archive[name] for name in archive.files}
+    if int(arrays["version"]) != FORMAT_VERSION:
+        raise ValueError(f"Unsupported feature format {int(arrays['version'])}")
+    transcribe = []
+    for transcript, confidence in zip(
+        arrays["transcripts"], arrays["confidences"], strict=True
+    ):
+        segment = {"transcript": str(transcript)}
+        if not np.isnan(confidence):
+            segment["confidence"] = float(confidence)
+        transcribe.append(segment)
+    return FrameFeatures.from_arrays(arrays), transcribe
+
+
+def save_features(audio_path, features, transcribe, lan_flag):
+    """Stores the features of a recording under the digest of its language and audio.
+
+    Files are written to FEATURE_STORE_DIR when it is set, otherwise to the
+    ``features/`` folder of the Firebase bucket.
+
+    Parameters
+    ----------
+    audio_path (str): The path to the audio file, still on disk.
+    features (FrameFeatures): The measured features of the recording.
+    transcribe (list): The transcription segments with their confidence.
+    lan_flag (str): The language flag used in the transcription.
+
+    Returns
+    -------
+    str: The key to pass to load_features.
+
+    """
+    key = audio_digest(audio_path, lan_flag)
+    _write(key, pack_features(features, transcribe))
+    return key
+
+
+def load_features(key):
+    """Loads the features stored under a key.
+
+    Parameters
+    ----------
+    key (str): The key returned by save_features.
+
+    Returns
+    -------
+    tuple: The restored FrameFeatures and the transcription segments.
+
+    Raises
+    ------
+    FeatureNotFoundError: If the key is malformed or nothing is stored under it.
+
+    """
+    data = _read(key) if KEY_PATTERN.fullmatch(key) else None
+    if data is None:
+        raise FeatureNotFoundError(f"No features stored for {key!r}")
+    return unpack_features(data)
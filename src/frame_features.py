@@ -0,0 +1,491 @@
+from functools import cache, cached_property
+import logging
+import os
+
+import numpy as np
+
+from src.shared_audio import as_sound, load_samples
+from src.vad import frame_rms, speech_intervals, vad_enabled
+
+# Segment duration of the per-segment data in every result
+DEFAULT_SEGMENT_DURATION = 2.0
+# Samples squared at once for the segment energies, bounding their memory
+ENERGY_BLOCK_SAMPLES = 1 << 20
+# Extra segment durations of the summaries, unless SEGMENT_RESOLUTIONS sets them
+DEFAULT_SEGMENT_RESOLUTIONS = "0.5,10"
+
+
+def hz_to_semitones(pitch_hz, reference_pitch=100.0):
+    """Converts pitch in Hertz to semitones.
+
+    Parameters
+    ----------
+    pitch_hz (float): The pitch in Hertz.
+    reference_pitch (float): The reference pitch in Hertz.
+
+    Returns
+    -------
+    float: The pitch in semitones.
+
+    """
+    return 12 * np.log2(pitch_hz / reference_pitch)
+
+
+def pitch_track(audio_path):
+    """Computes the voiced frames of the pitch track of an audio file.
+
+    Parameters
+    ----------
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
+
+    Returns
+    -------
+    tuple: The times of the voiced frames and their pitch in semitones.
+
+    """
+    pitch = as_sound(audio_path).to_pitch()
+    values = pitch.selected_array["frequency"]
+    times = pitch.xs()
+    voiced = values > 0
+    return times[voiced], hz_to_semitones(values[voiced])
+
+
+def formant_tracks(audio_path, speech=None):
+    """Samples the first two formants every 10 ms.
+
+    Parameters
+    ----------
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
+    speech (list): Speech intervals from the VAD; if given, formants are only sampled inside them.
+
+    Returns
+    -------
+    tuple: The F1 and F2 values in Hertz, NaN where Praat finds no formant.
+
+    """
+    snd = as_sound(audio_path)
+    formants = snd.to_formant_burg()
+    times = np.arange(0, snd.get_total_duration(), 0.01)
+    if speech is not None:
+        voiced = np.zeros(times.shape, dtype=bool)
+        for start, end in speech:
+            voiced |= (times >= start) & (times < end)
+        times = times[voiced]
+    f1 = np.array([formants.get_value_at_time(1, t) for t in times], dtype=float)
+    f2 = np.array([formants.get_value_at_time(2, t) for t in times], dtype=float)
+    return f1, f2
+
+
+def log_energy(energy):
+    """Scales the summed squared samples of a segment to the reported log energy."""
+    # Use log10 to compress the range and then scale up
+    return round(max(np.log10(energy + 1e-8) * 10, 0) * 10, 2)
+
+
+def segment_starts(duration, segment_duration, hop=None):
+    """Returns the start times of the analysis segments of a recording.
+
+    Segments start every hop seconds, so they overlap when the hop is shorter
+    than the segment; by default they follow each other without overlap.
+    """
+    return np.arange(0, duration, hop or segment_duration)
+
+
+def _prefix_sums(values):
+    """Returns running sums with a leading zero, so sum(values[i:j]) = s[j] - s[i]."""
+    return np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+
+
+def _energy_sums_at(y, indexes, block=ENERGY_BLOCK_SAMPLES):
+    """Running sums of the squared samples before each index, read block by block.
+
+    Gives the entries ``indexes`` of ``_prefix_sums(y**2)`` while holding at most
+    one block of squared samples, instead of a float64 copy of the whole signal.
+
+    Parameters
+    ----------
+    y (np.ndarray): The samples.
+    indexes (np.ndarray): Sample indexes from 0 to len(y).
+    block (int): The number of samples squared and summed at once.
+
+    Returns
+    -------
+    np.ndarray: The sum of the squared samples before each index.
+
+    """
+    sums = np.zeros(len(indexes))
+    total = 0.0
+    for lo in range(0, len(y), block):
+        running = np.cumsum(np.square(y[lo : lo + block], dtype=np.float64))
+        inside = (indexes > lo) & (indexes <= lo + len(running))
+        sums[inside] = total + running[indexes[inside] - lo - 1]
+        total += running[-1]
+    return sums
+
+
+class FrameFeatures:
+    """Frame-level features of one recording, computed once and summarised at any resolution.
+
+    The pitch track and the RMS frames are reduced to prefix sums when first
+    needed. A summary at any segment duration and hop then costs O(1) per
+    segment for means and deviations, one pass over the frames for medians and
+    extremes, and one blockwise pass over the samples for energies, without
+    touching Praat or librosa again. Overlapping segments read the same sums,
+    so memory does not grow with the overlap.
+    """
+
+    def __init__(self, audio_path):
+        self.audio = load_samples(audio_path)
+        self.y, self.sr = self.audio.samples, self.audio.sr
+        self.duration = self.audio.duration
+        # Jitter, shimmer and HNR results, filled in by the voice analysis
+        self.voice_quality = None
+        self._stored_energies = {}
+
+    @cached_property
+    def pitch_track(self):
+        """Times and semitone values of the voiced pitch frames.
+
+        Callers that computed the track elsewhere (e.g. in a pool worker) may
+        assign it instead so it is not computed twice.
+        """
+        return pitch_track(self.audio)
+
+    @cached_property
+    def speech(self):
+        """Speech intervals from the VAD, or None when VAD_ENABLED is off."""
+        return speech_intervals(self.audio) if vad_enabled() else None
+
+    @cached_property
+    def formants(self):
+        """F1 and F2 values sampled inside the speech intervals."""
+        return formant_tracks(self.audio, self.speech)
+
+    @cached_property
+    def _pitch_sums(self):
+        times, semitones = self.pitch_track
+        # Centre the values so the sum of squares does not lose precision
+        offset = float(np.mean(semitones)) if semitones.size else 0.0
+        centred = semitones - offset
+        return offset, _prefix_sums(centred), _prefix_sums(centred**2)
+
+    @cached_property
+    def rms(self):
+        """RMS energy of each frame and the time assigned to each frame."""
+        rms_energy = frame_rms(self.y)
+        return rms_energy, np.linspace(0, self.duration, num=len(rms_energy))
+
+    @cached_property
+    def _rms_sums(self):
+        return _prefix_sums(self.rms[0])
+
+    def pitch_analysis(self, segment_duration=2.0, hop=None):
+        """Summarises the pitch track per segment.
+
+        Parameters
+        ----------
+        segment_duration (float): The duration of each segment in seconds.
+        hop (float): The time between segment starts in seconds; defaults to segment_duration.
+
+        Returns
+        -------
+        dict: Segment start times mapped to mean, median, min, max, std and range of the pitch in semitones.
+
+        """
+        times, semitones = self.pitch_track
+        offset, sums, squares = self._pitch_sums
+        starts = segment_starts(self.duration, segment_duration, hop)
+        lo = np.searchsorted(times, starts, side="left")
+        hi = np.searchsorted(times, starts + segment_duration, side="left")
+
+        pitch_data = {}
+        for t, i, j in zip(starts.tolist(), lo, hi, strict=True):
+            count = j - i
+            if count == 0:
+                pitch_data[round(t, 2)] = {
+                    "mean_pitch_ST": 0.0,
+                    "median_pitch_ST": 0.0,
+                    "min_pitch_ST": 0.0,
+                    "max_pitch_ST": 0.0,
+                    "std_pitch_ST": 0.0,
+                    "pitch_range_ST": 0.0,
+                }
+                continue
+            mean = (sums[j] - sums[i]) / count
+            variance = max(0.0, (squares[j] - squares[i]) / count - mean**2)
+            segment = semitones[i:j]
+            low, high = segment.min(), segment.max()
+            pitch_data[round(t, 2)] = {
+                "mean_pitch_ST": round(mean + offset, 2),
+                "median_pitch_ST": round(np.median(segment), 2),
+                "min_pitch_ST": round(low, 2),
+                "max_pitch_ST": round(high, 2),
+                "std_pitch_ST": round(np.sqrt(variance), 2),
+                "pitch_range_ST": round(high - low, 2),
+            }
+        return pitch_data
+
+    def intensity_analysis(self, segment_duration=2.0, hop=None):
+        """Summarises the RMS frames per segment.
+
+        Parameters
+        ----------
+        segment_duration (float): The duration of each segment in seconds.
+        hop (float): The time between segment starts in seconds; defaults to segment_duration.
+
+        Returns
+        -------
+        dict: Segment start times mapped to the mean RMS energy scaled by 200.
+
+        """
+        _, frame_times = self.rms
+        sums = self._rms_sums
+        starts = segment_starts(self.duration, segment_duration, hop)
+        lo = np.searchsorted(frame_times, starts, side="left")
+        hi = np.searchsorted(frame_times, starts + segment_duration, side="left")
+        counts = hi - lo
+        # Multiply by 200 to scale up the raw RMS values
+        means = (sums[hi] - sums[lo]) / np.maximum(counts, 1) * 200
+
+        return {
+            round(t, 2): round(mean, 4) if count else 0.0
+            for t, mean, count in zip(starts.tolist(), means, counts, strict=True)
+        }
+
+    def segment_energies(self, segment_duration=2.0, hop=None):
+        """Sums the squared samples of every segment.
+
+        Each sum is the difference of two entries of the running sum of the
+        squared samples, so its cost does not depend on the segment duration.
+        The running sums are read in blocks of ENERGY_BLOCK_SAMPLES, so no copy
+        of the whole signal is kept.
+
+        Parameters
+        ----------
+        segment_duration (float): The duration of each segment in seconds.
+        hop (float): The time between segment starts in seconds; defaults to segment_duration.
+
+        Returns
+        -------
+        tuple: The segment start times and their energies; empty segments are NaN.
+
+        Raises
+        ------
+        ValueError: If the features were restored without samples and the energies at this duration were not stored.
+
+        """
+        starts = segment_starts(self.duration, segment_duration, hop)
+        non_overlapping = hop is None or hop == segment_duration
+        if non_overlapping and segment_duration in self._stored_energies:
+            return starts, self._stored_energies[segment_duration]
+        if self.y is None:
+            raise ValueError(f"No energies stored for {segment_duration:g}s segments")
+        start = (starts * self.sr).astype(np.int64)
+        end = np.minimum(
+            ((starts + segment_duration) * self.sr).astype(np.int64), len(self.y)
+        )
+        sums = _energy_sums_at(self.y, np.concatenate((start, end)))
+        energies = np.where(
+            end > start, sums[len(start) :] - sums[: len(start)], np.nan
+        )
+        return starts, energies
+
+    def energy_analysis(self, segment_duration=2.0, hop=None):
+        """Summarises the signal energy per segment on a log scale.
+
+        Parameters
+        ----------
+        segment_duration (float): The duration of each segment in seconds.
+        hop (float): The time between segment starts in seconds; defaults to segment_duration.
+
+        Returns
+        -------
+        dict: Segment start times mapped to the scaled log energy.
+
+        """
+        starts, energies = self.segment_energies(segment_duration, hop)
+        return {
+            round(t, 2): 0.0 if np.isnan(energy) else log_energy(energy)
+            for t, energy in zip(starts.tolist(), energies, strict=True)
+        }
+
+    def summaries(self, resolutions):
+        """Builds pitch, intensity and energy summaries for several segment durations.
+
+        Parameters
+        ----------
+        resolutions (list): The segment durations in seconds.
+
+        Returns
+        -------
+        dict: Each resolution (as a string) mapped to its pitch_analysis, intensity_analysis and energy_analysis.
+
+        """
+        return {
+            f"{resolution:g}": {
+                "pitch_analysis": self.pitch_analysis(resolution),
+                "intensity_analysis": self.intensity_analysis(resolution),
+                "energy_analysis": self.energy_analysis(resolution),
+            }
+            for resolution in resolutions
+        }
+
+    def energy_curve(self, window, hop):
+        """Summarises intensity and energy over overlapping windows for a smoother curve.
+
+        Parameters
+        ----------
+        window (float): The duration of each window in seconds.
+        hop (float): The time between window starts in seconds.
+
+        Returns
+        -------
+        dict: The window, the hop, and window start times mapped to intensity and energy.
+
+        """
+        return {
+            "window": window,
+            "hop": hop,
+            "intensity_analysis": self.intensity_analysis(window, hop),
+            "energy_analysis": self.energy_analysis(window, hop),
+        }
+
+    def to_arrays(self):
+        """Flattens the features into named arrays for storage.
+
+        The pitch track, RMS frames, formants and speech intervals are kept at
+        frame level; energies and the jitter, shimmer and HNR values are kept
+        per default segment.
+
+        Returns
+        -------
+        dict: Array names mapped to NumPy arrays.
+
+        """
+        times, semitones = self.pitch_track
+        f1, f2 = self.formants
+        arrays = {
+            "sr": np.asarray(self.sr),
+            "duration": np.asarray(self.duration),
+            "pitch_times": times,
+            "pitch_semitones": semitones,
+            "rms": self.rms[0],
+            "segment_energy": self.segment_energies(DEFAULT_SEGMENT_DURATION)[1],
+            "formant_f1": f1,
+            "formant_f2": f2,
+            "vad": np.asarray(self.speech is not None),
+            "speech": np.asarray(self.speech or [], dtype=float).reshape(-1, 2),
+        }
+        for name, result in (self.voice_quality or {}).items():
+            arrays[name] = np.asarray(list(result[f"{name}_data"].values()), float)
+            arrays[f"overall_{name}"] = np.asarray(result[f"overall_{name}"])
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Restores features saved with to_arrays, without the audio samples.
+
+        Parameters
+        ----------
+        arrays (dict): Array names mapped to NumPy arrays.
+
+        Returns
+        -------
+        FrameFeatures: Features that summarise pitch and intensity at any resolution and energy per default segment.
+
+        """
+        features = cls.__new__(cls)
+        features.audio = features.y = None
+        features.sr = int(arrays["sr"])
+        features.duration = float(arrays["duration"])
+        features.pitch_track = (arrays["pitch_times"], arrays["pitch_semitones"])
+        rms = arrays["rms"]
+        features.rms = (rms, np.linspace(0, features.duration, num=len(rms)))
+        features.formants = (arrays["formant_f1"], arrays["formant_f2"])
+        features.speech = (
+            [tuple(map(float, span)) for span in arrays["speech"]]
+            if bool(arrays["vad"])
+            else None
+        )
+        features._stored_energies = {DEFAULT_SEGMENT_DURATION: arrays["segment_energy"]}
+
+        keys = [
+            round(t, 2)
+            for t in segment_starts(
+                features.duration, DEFAULT_SEGMENT_DURATION
+            ).tolist()
+        ]
+        features.voice_quality = {
+            name: {
+                f"{name}_data": dict(zip(keys, map(float, arrays[name]), strict=True)),
+                f"overall_{name}": float(arrays[f"overall_{name}"]),
+            }
+            for name in ("jitter", "shimmer", "hnr")
+            if name in arrays
+        }
+        return features
+
+
+def energy_curve_window():
+    """Returns the window and hop in seconds of the overlapping energy curve (ENERGY_CURVE).
+
+    ENERGY_CURVE is "<window>:<hop>", "2:0.5" by default; an empty value turns the curve
+    off, and so does an invalid one, with a warning.
+
+    Returns
+    -------
+    tuple: The window and hop, or None when the curve is off.
+
+    """
+    return _parse_energy_curve(os.getenv("ENERGY_CURVE", "2:0.5").strip())
+
+
+@cache
+def _parse_energy_curve(value):
+    """Parses an ENERGY_CURVE value once, warning once about an invalid one."""
+    if not value:
+        return None
+    try:
+        window, hop = (float(part) for part in value.split(":"))
+    except ValueError:
+        window = hop = float("nan")
+    if not (window > 0 and hop > 0):
+        logging.warning("Invalid ENERGY_CURVE %r, the energy curve is off", value)
+        return None
+    return window, hop
+
+
+def summary_resolutions():
+    """Returns the extra segment durations reported with every result (SEGMENT_RESOLUTIONS).
+
+    SEGMENT_RESOLUTIONS is a comma-separated list of durations in seconds, "0.5,10" by
+    default; an empty value reports none, and an invalid one is replaced by the
+    default, with a warning.
+
+    Returns
+    -------
+    list: The segment durations in seconds.
+
+    """
+    return list(
+        _parse_resolutions(
+            os.getenv("SEGMENT_RESOLUTIONS", DEFAULT_SEGMENT_RESOLUTIONS)
+        )
+    )
+
+
+@cache
+def _parse_resolutions(value):
+    """Parses a SEGMENT_RESOLUTIONS value once, warning once about an invalid one."""
+    try:
+        durations = tuple(float(part) for part in value.split(",") if part.strip())
+    except ValueError:
+        durations = (float("nan"),)
+    if not all(duration > 0 for duration in durations):
+        logging.warning(
+            "Invalid SEGMENT_RESOLUTIONS %r, using %r",
+            value,
+            DEFAULT_SEGMENT_RESOLUTIONS,
+        )
+        return _parse_resolutions(DEFAULT_SEGMENT_RESOLUTIONS)
+    return durations
@@ -0,0 +1,359 @@
+import logging
+import os
+import random
+import threading
+import time
+
+from google.api_core import exceptions as google_exceptions
+
+# Default limits for each external provider. Every value can be overridden with
+# an environment variable named after the provider, e.g. GEMINI_MAX_CONCURRENCY.
+PROVIDER_DEFAULTS = {
+    "gemini": {
+        "max_concurrency": 4,
+        "rate_per_second": 2.0,
+        "burst": 4,
+    },
+    "google_stt": {
+        "max_concurrency": 8,
+        "rate_per_second": 5.0,
+        "burst": 8,
+    },
+    "azure_speech": {
+        "max_concurrency": 8,
+        "rate_per_second": 5.0,
+        "burst": 8,
+    },
+}
+
+COMMON_DEFAULTS = {
+    "max_retries": 3,
+    "base_delay": 0.5,
+    "max_delay": 8.0,
+    "failure_threshold": 5,
+    "reset_timeout": 30.0,
+    "acquire_timeout": 30.0,
+}
+
+# Google API errors that signal quota pressure or a transient outage
+RETRYABLE_GOOGLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+
+
+class RetryableProviderError(Exception):
+    """Raised by a provider call to mark a failure as transient and worth retrying."""
+
+
+class ProviderUnavailableError(RuntimeError):
+    """Raised when the governor refuses or gives up on a provider call."""
+
+
+def is_retryable(exc):
+    """Checks whether an exception raised by a provider call is transient.
+
+    Parameters
+    ----------
+    exc (Exception): The exception raised by the provider call.
+
+    Returns
+    -------
+    bool: True if the call should be retried, False otherwise.
+
+    """
+    return isinstance(
+        exc,
+        (RetryableProviderError, TimeoutError, ConnectionError)
+        + RETRYABLE_GOOGLE_ERRORS,
+    )
+
+
+class TokenBucket:
+    """Token-bucket rate limiter that refills continuously at a fixed rate."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self, timeout=None):
+        """Takes one token, waiting for a refill if the bucket is empty.
+
+        Parameters
+        ----------
+        timeout (float): The maximum time in seconds to wait, or None to wait indefinitely.
+
+        Returns
+        -------
+        float: The time in seconds spent waiting for the token.
+
+        Raises
+        ------
+        ProviderUnavailableError: If no token became available within the timeout.
+
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            if timeout is not None and waited + delay > timeout:
+                raise ProviderUnavailableError("Rate limit wait exceeded the timeout.")
+            self.sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    """Circuit breaker that stops calling a provider after repeated failures.
+
+    The breaker opens after ``failure_threshold`` consecutive failures, rejects
+    calls for ``reset_timeout`` seconds and then lets a single probe through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self.probe_in_flight:
+                    return False
+                self.probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def release_probe(self):
+        with self.lock:
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            if (
+                self.state == self.HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+            self.probe_in_flight = False
+
+
+class ProviderGovernor:
+    """Guards calls to one external provider.
+
+    Each call passes through the circuit breaker, a concurrency limit and a
+    token-bucket rate limiter. Transient failures are retried with full-jitter
+    exponential backoff; the concurrency slot is released while backing off.
+    """
+
+    def __init__(
+        self,
+        name,
+        max_concurrency,
+        rate_per_second,
+        burst,
+        max_retries,
+        base_delay,
+        max_delay,
+        failure_threshold,
+        reset_timeout,
+        acquire_timeout,
+        retryable=is_retryable,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        rng=None,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+        self.retryable = retryable
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.bucket = TokenBucket(rate_per_second, burst, clock=clock, sleep=sleep)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock=clock)
+        self.metrics_lock = threading.Lock()
+        self.metrics = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "rejected": 0,
+            "in_flight": 0,
+            "rate_limit_wait_seconds": 0.0,
+        }
+
+    def _count(self, key, amount=1):
+        with self.metrics_lock:
+            self.metrics[key] += amount
+
+    def backoff_delay(self, attempt):
+        """Returns the full-jitter backoff delay for a zero-based retry attempt."""
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def _attempt(self, func, args, kwargs):
+        if not self.slots.acquire(timeout=self.acquire_timeout):
+            raise ProviderUnavailableError(
+                f"{self.name} concurrency limit reached; no slot became free."
+            )
+        try:
+            waited = self.bucket.acquire(timeout=self.acquire_timeout)
+            if waited:
+                self._count("rate_limit_wait_seconds", waited)
+            self._count("in_flight")
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._count("in_flight", -1)
+        finally:
+            self.slots.release()
+
+    def call(self, func, *args, **kwargs):
+        """Calls a provider function under the governor's limits.
+
+        Parameters
+        ----------
+        func (callable): The provider function to call.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+        Returns
+        -------
+        Any: The return value of the function.
+
+        Raises
+        ------
+        ProviderUnavailableError: If the circuit is open, no slot became free, or retries were exhausted.
+        Exception: Any non-retryable error raised by the function.
+
+        """
+        self._count("calls")
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise ProviderUnavailableError(
+                    f"{self.name} circuit is open; calls are paused."
+                )
+            try:
+                result = self._attempt(func, args, kwargs)
+            except ProviderUnavailableError:
+                self._count("rejected")
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                if not self.retryable(e):
+                    # The provider answered, so the circuit is left as it was
+                    self.breaker.release_probe()
+                    self._count("failures")
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    self._count("failures")
+                    raise ProviderUnavailableError(
+                        f"{self.name} call failed after {attempt + 1} attempts: {e}"
+                    ) from e
+                delay = self.backoff_delay(attempt)
+                logging.warning(
+                    "%s call failed (%s); retrying in %.2fs", self.name, e, delay
+                )
+                self._count("retries")
+                self.sleep(delay)
+            else:
+                self.breaker.record_success()
+                self._count("successes")
+                return result
+
+    def snapshot(self):
+        """Returns a copy of the governor's metrics and circuit state."""
+        with self.metrics_lock:
+            data = dict(self.metrics)
+        data["rate_limit_wait_seconds"] = round(data["rate_limit_wait_seconds"], 3)
+        data["max_concurrency"] = self.max_concurrency
+        data["circuit_state"] = self.breaker.state
+        return data
+
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def _setting(provider, key, default):
+    value = os.getenv(f"{provider.upper()}_{key.upper()}")
+    if value is None:
+        return default
+    return type(default)(value)
+
+
+def get_governor(provider):
+    """Returns the shared governor for a provider, creating it on first use.
+
+    Parameters
+    ----------
+    provider (str): The provider name ("gemini", "google_stt" or "azure_speech").
+
+    Returns
+    -------
+    ProviderGovernor: The governor for the provider.
+
+    """
+    with _governors_lock:
+        governor = _governors.get(provider)
+        if governor is None:
+            settings = {**COMMON_DEFAULTS, **PROVIDER_DEFAULTS.get(provider, {})}
+            governor = ProviderGovernor(
+                provider,
+                **{
+                    key: _setting(provider, key, value)
+                    for key, value in settings.items()
+                },
+            )
+            _governors[provider] = governor
+        return governor
+
+
+def governor_metrics():
+    """Returns the metrics of every governor created so far, keyed by provider."""
+    with _governors_lock:
+        governors = dict(_governors)
+    return {name: governor.snapshot() for name, governor in governors.items()}
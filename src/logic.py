@@ -1,10 +1,11 @@
 import logging
 
+from src.memory_metrics import track_memory
 from src.ps_test import ps_test
 from src.stutter_test import stutter_test
 
 
-def analysing_audio(file_name, test_type, lan_flag):
+def analysing_audio(file_name, test_type, lan_flag, blob_name=None, on_stage=None):
     """Analyzes an audio file based on the specified test type.
 
     Parameters
@@ -12,6 +13,8 @@ def analysing_audio(file_name, test_type, lan_flag):
     file_name (str): The name of the audio file to be analyzed.
     test_type (bool): The type of test to perform. If True, perform ps_test; otherwise, perform stutter_test.
     lan_flag (str): The language flag to be used in the ps_test.
+    blob_name (str): The name of the upload in Firebase storage, if it differs from file_name.
+    on_stage (callable): Receives the partial results of a ps_test as each stage finishes.
 
     Returns
     -------
@@ -20,9 +23,10 @@ def analysing_audio(file_name, test_type, lan_flag):
     """
     try:
         if test_type:
-            analysis_result = ps_test(file_name, lan_flag)
+            analysis_result = ps_test(file_name, lan_flag, blob_name, on_stage)
         else:
-            analysis_result = stutter_test(file_name, lan_flag)
+            with track_memory("stutter_test"):
+                analysis_result = stutter_test(file_name, lan_flag)
         if "error" in analysis_result:
             logging.error("Error during audio analysis: %s", analysis_result["error"])
             return {"error": "An internal error has occurred during audio analysis."}
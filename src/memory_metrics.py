@@ -0,0 +1,146 @@
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import linecache
+import os
+import threading
+import tracemalloc
+
+from src.workers import current_rss_mb
+
+# Number of recent runs kept per stage for the means and maxima
+MEMORY_SAMPLE_SIZE = 1000
+
+_MB = 1024 * 1024
+
+_rss_deltas = defaultdict(lambda: deque(maxlen=MEMORY_SAMPLE_SIZE))
+_peaks = defaultdict(lambda: deque(maxlen=MEMORY_SAMPLE_SIZE))
+_totals = defaultdict(lambda: {"count": 0, "rss_delta_mb": 0.0, "retained_mb": 0.0})
+_lock = threading.Lock()
+_active = 0
+_entered = 0
+_baseline = None
+
+
+def start_memory_tracing():
+    """Starts tracemalloc when MEMORY_TRACING is set and remembers the allocations at startup.
+
+    Tracing slows allocation-heavy code down, so it is off by default.
+    MEMORY_TRACE_FRAMES (1) sets how many frames are kept per allocation.
+
+    Returns
+    -------
+    bool: True if tracing is on.
+
+    """
+    global _baseline
+    if os.getenv("MEMORY_TRACING", "0") != "1":
+        return tracemalloc.is_tracing()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(int(os.getenv("MEMORY_TRACE_FRAMES", "1")))
+        _baseline = tracemalloc.take_snapshot()
+    return True
+
+
+@contextmanager
+def track_memory(name):
+    """Records the RSS change and, when tracing, the peak and retained allocations of a stage.
+
+    Peak and retained allocations are process-wide counters, so they are only
+    recorded for runs that did not overlap with another tracked stage.
+
+    Parameters
+    ----------
+    name (str): The stage name.
+
+    """
+    global _active, _entered
+    tracing = tracemalloc.is_tracing()
+    with _lock:
+        alone = _active == 0
+        _active += 1
+        _entered += 1
+        entered = _entered
+        if tracing and alone:
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+    rss_before = current_rss_mb()
+    try:
+        yield
+    finally:
+        rss_delta = current_rss_mb() - rss_before
+        with _lock:
+            _active -= 1
+            totals = _totals[name]
+            totals["count"] += 1
+            totals["rss_delta_mb"] += rss_delta
+            _rss_deltas[name].append(rss_delta)
+            if tracing and alone and _entered == entered:
+                current, peak = tracemalloc.get_traced_memory()
+                _peaks[name].append((peak - traced_before) / _MB)
+                totals["retained_mb"] += (current - traced_before) / _MB
+
+
+def memory_metrics():
+    """Returns the RSS of this worker and, per stage, its RSS deltas and allocations in megabytes."""
+    with _lock:
+        deltas = {name: list(values) for name, values in _rss_deltas.items()}
+        peaks = {name: list(values) for name, values in _peaks.items()}
+        totals = {name: dict(values) for name, values in _totals.items()}
+    stages = {}
+    for name, values in deltas.items():
+        stages[name] = {
+            "count": totals[name]["count"],
+            "rss_delta_mb_mean": round(sum(values) / len(values), 2),
+            "rss_delta_mb_max": round(max(values), 2),
+            "rss_delta_mb_total": round(totals[name]["rss_delta_mb"], 2),
+        }
+        if peaks.get(name):
+            stages[name].update(
+                peak_alloc_mb_mean=round(sum(peaks[name]) / len(peaks[name]), 2),
+                peak_alloc_mb_max=round(max(peaks[name]), 2),
+                retained_alloc_mb_total=round(totals[name]["retained_mb"], 2),
+            )
+    return {
+        "rss_mb": round(current_rss_mb(), 1),
+        "tracing": tracemalloc.is_tracing(),
+        "stages": stages,
+    }
+
+
+def top_allocations(limit=20):
+    """Lists the source lines whose allocations grew the most since tracing started.
+
+    Parameters
+    ----------
+    limit (int): The number of allocation sites to return.
+
+    Returns
+    -------
+    list: One dict per site with its size and allocation count, and their growth since startup.
+
+    """
+    # Lazy imports are not leaks; leave them and tracemalloc's own allocations out
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib.*>"),
+        ]
+    )
+    if _baseline is None:
+        stats = snapshot.statistics("lineno")
+    else:
+        stats = snapshot.compare_to(_baseline, "lineno")
+    sites = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        sites.append(
+            {
+                "site": f"{frame.filename}:{frame.lineno}",
+                "line": linecache.getline(frame.filename, frame.lineno).strip(),
+                "size_mb": round(stat.size / _MB, 3),
+                "size_diff_mb": round(getattr(stat, "size_diff", stat.size) / _MB, 3),
+                "count": stat.count,
+                "count_diff": getattr(stat, "count_diff", stat.count),
+            }
+        )
+    return sites
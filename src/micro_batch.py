@@ -0,0 +1,132 @@
+import threading
+import time
+
+
+class _Entry:
+    __slots__ = ("item", "taken", "done", "value", "error")
+
+    def __init__(self, item):
+        self.item = item
+        self.taken = False
+        self.done = False
+        self.value = None
+        self.error = None
+
+    def outcome(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class MicroBatcher:
+    """Groups concurrent blocking calls into batches for one handler call.
+
+    The first caller to arrive becomes the leader: it waits up to ``max_wait``
+    seconds (or until ``max_batch_size`` items are pending), takes the pending
+    items and runs ``handler`` on them while the next leader already collects
+    the following batch. Every caller blocks until its own result is ready.
+
+    Parameters
+    ----------
+    handler (callable): Takes a list of items and returns a list of results in the same order.
+    max_batch_size (int): The most items passed to one handler call.
+    max_wait (float): The longest time in seconds a batch waits for more items.
+    clock (callable): Monotonic clock, replaceable in tests.
+
+    """
+
+    def __init__(self, handler, max_batch_size=8, max_wait=0.02, clock=time.monotonic):
+        self.handler = handler
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._pending = []
+        self._leading = False
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+
+    def submit(self, item):
+        """Adds an item to the next batch and waits for its result.
+
+        Parameters
+        ----------
+        item: The input for the handler.
+
+        Returns
+        -------
+        The handler's result for this item.
+
+        Raises
+        ------
+        Exception: Whatever the handler raised for the batch holding the item.
+
+        """
+        entry = _Entry(item)
+        with self._cond:
+            self._pending.append(entry)
+            self._cond.notify_all()
+        while True:
+            with self._cond:
+                # Only a caller whose item is still pending may lead the next batch
+                while not entry.done and (self._leading or entry.taken):
+                    self._cond.wait()
+                if entry.done:
+                    return entry.outcome()
+                batch = self._collect()
+            self._run(batch)
+            with self._cond:
+                self._cond.notify_all()
+
+    def _collect(self):
+        """Leads one batch: waits for more items, then takes them. Holds the lock."""
+        self._leading = True
+        deadline = self._clock() + self.max_wait
+        while len(self._pending) < self.max_batch_size:
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining)
+        batch = self._pending[: self.max_batch_size]
+        del self._pending[: self.max_batch_size]
+        for entry in batch:
+            entry.taken = True
+        self._leading = False
+        self._batches += 1
+        self._items += len(batch)
+        self._largest = max(self._largest, len(batch))
+        # Let a waiting caller lead the next batch while this one runs
+        self._cond.notify_all()
+        return batch
+
+    def _run(self, batch):
+        if not batch:
+            return
+        try:
+            results = self.handler([entry.item for entry in batch])
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"Batch handler returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as e:
+            for entry in batch:
+                entry.error = e
+                entry.done = True
+            return
+        for entry, value in zip(batch, results, strict=True):
+            entry.value = value
+            entry.done = True
+
+    def snapshot(self):
+        """Returns the number of batches and items handled and the mean and largest batch size."""
+        with self._cond:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": (
+                    round(self._items / self._batches, 2) if self._batches else 0.0
+                ),
+                "largest_batch_size": self._largest,
+                "pending": len(self._pending),
+            }
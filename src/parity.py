@@ -0,0 +1,244 @@
+"""Numerical parity harness for the public speaking analysis.
+
+Analyzes a golden corpus of deterministic synthetic recordings and compares
+the results field by field with reference outputs stored from the current
+implementation::
+
+    python -m src.parity --engine numpy        # compare an engine with the reference
+    python -m src.parity --engine praat --update  # store new reference outputs
+
+The largest deviations, measured against the tolerance of each metric, and
+the score changes they cause are printed. The exit status is 1 if any field
+is outside its tolerance.
+"""
+
+import argparse
+import fnmatch
+import json
+import math
+import os
+import sys
+import tempfile
+
+from src.response import to_native
+from src.synthetic import write_synthetic_wav
+
+REFERENCE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "tests",
+    "golden",
+    "reference.json",
+)
+# Recordings of the golden corpus; the same seed always gives the same samples
+GOLDEN_CORPUS = [
+    {"name": "short", "seconds": 3, "seed": 101, "sr": 16000, "pause_ratio": 0.3},
+    {"name": "medium", "seconds": 12, "seed": 102, "sr": 16000, "pause_ratio": 0.3},
+    {"name": "long", "seconds": 40, "seed": 103, "sr": 16000, "pause_ratio": 0.3},
+    {"name": "pausy", "seconds": 16, "seed": 104, "sr": 16000, "pause_ratio": 0.6},
+    {"name": "fluent", "seconds": 10, "seed": 105, "sr": 16000, "pause_ratio": 0.05},
+    {"name": "wideband", "seconds": 8, "seed": 106, "sr": 44100, "pause_ratio": 0.3},
+]
+GOLDEN_TRANSCRIPT = "the quick brown fox jumps over the lazy dog " * 4
+# Transcription confidence used for the overall score
+GOLDEN_CONFIDENCE = 90
+# (absolute, relative) tolerance per field; the first matching pattern applies
+TOLERANCES = [
+    ("*/jitter_data/*", (1e-5, 0.01)),
+    ("*/shimmer_data/*", (1e-4, 0.02)),
+    ("*/hnr_data/*", (1.0, 0.0)),
+    ("*_score", (1.0, 0.0)),
+    ("*", (1e-6, 1e-6)),
+]
+
+
+def analyze(path, text, engine):
+    """Runs both public speaking analyses and the overall score on one recording."""
+    from src.frame_features import FrameFeatures
+    from src.ps_test import generate_overall_score
+    from src.ps_test_cat1 import analyze_speech_1
+    from src.ps_test_cat2 import analyze_speech_2
+
+    features = FrameFeatures(path)
+    voice = analyze_speech_1(features.audio, text, features, engine)
+    energy = analyze_speech_2(features.audio, features=features)
+    return to_native(
+        {
+            "final_public_speaking_score": generate_overall_score(
+                voice, energy, GOLDEN_CONFIDENCE
+            ),
+            "voice": voice,
+            "energy": energy,
+        }
+    )
+
+
+# Engines the harness can compare; each analyzes a recording and its transcript
+ENGINES = {
+    "praat": lambda path, text: analyze(path, text, "praat"),
+    "numpy": lambda path, text: analyze(path, text, "numpy"),
+}
+
+
+def run_corpus(engine, directory, names=None):
+    """Writes the golden corpus to a directory and analyzes every recording with an engine.
+
+    Parameters
+    ----------
+    engine (str): A key of ENGINES.
+    directory (str): Where the recordings are written.
+    names (list): The recordings to analyze; all of them when None.
+
+    Returns
+    -------
+    dict: Maps each recording name to its results.
+
+    """
+    results = {}
+    for spec in GOLDEN_CORPUS:
+        if names is not None and spec["name"] not in names:
+            continue
+        path = os.path.join(directory, f"{spec['name']}.wav")
+        write_synthetic_wav(
+            path,
+            spec["seconds"],
+            seed=spec["seed"],
+            sr=spec["sr"],
+            pause_ratio=spec["pause_ratio"],
+        )
+        results[spec["name"]] = ENGINES[engine](path, GOLDEN_TRANSCRIPT)
+    return results
+
+
+def flatten(value, prefix=""):
+    """Flattens nested dicts and lists into a dict of slash-separated paths."""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return {prefix: value}
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f"{prefix}/{key}" if prefix else str(key)))
+    return flat
+
+
+def tolerance(path):
+    """Returns the (absolute, relative) tolerance of a field."""
+    return next(tol for pattern, tol in TOLERANCES if fnmatch.fnmatch(path, pattern))
+
+
+def _deviation(path, expected, actual):
+    """Compares one field; returns its difference and how far outside the tolerance it is."""
+    numeric = all(
+        isinstance(v, (int, float)) and not isinstance(v, bool)
+        for v in (expected, actual)
+    )
+    if not numeric:
+        return None, 0.0 if expected == actual else math.inf
+    if math.isnan(expected) and math.isnan(actual):
+        return 0.0, 0.0
+    delta = actual - expected
+    absolute, relative = tolerance(path)
+    allowed = max(absolute, relative * abs(expected))
+    if not allowed:
+        return delta, math.inf if delta else 0.0
+    return delta, abs(delta) / allowed
+
+
+def compare(reference, candidate):
+    """Compares the results of two engines field by field.
+
+    Parameters
+    ----------
+    reference (dict): Results per recording from run_corpus.
+    candidate (dict): Results per recording from run_corpus.
+
+    Returns
+    -------
+    list: One dict per differing field with the recording, path, both values, the
+    difference and its ratio to the tolerance (above 1 fails), largest ratio first.
+
+    """
+    deviations = []
+    for name, expected in reference.items():
+        expected = flatten(expected)
+        actual = flatten(candidate.get(name, {}))
+        for path in sorted(set(expected) | set(actual)):
+            if path not in expected or path not in actual:
+                delta, ratio = None, math.inf
+            else:
+                delta, ratio = _deviation(path, expected[path], actual[path])
+            if ratio > 0:
+                deviations.append(
+                    {
+                        "recording": name,
+                        "path": path,
+                        "reference": expected.get(path),
+                        "candidate": actual.get(path),
+                        "delta": delta,
+                        "ratio": ratio,
+                    }
+                )
+    return sorted(deviations, key=lambda d: d["ratio"], reverse=True)
+
+
+def score_deltas(reference, candidate):
+    """Returns every score field that changed, per recording, largest change first."""
+    deltas = []
+    for name, expected in reference.items():
+        actual = flatten(candidate.get(name, {}))
+        for path, value in flatten(expected).items():
+            if path.endswith("_score") and isinstance(actual.get(path), (int, float)):
+                if actual[path] != value:
+                    deltas.append((name, path, actual[path] - value))
+    return sorted(deltas, key=lambda d: abs(d[2]), reverse=True)
+
+
+def report(deviations, deltas, top=15):
+    """Prints the largest deviations and score changes; returns the number of failing fields."""
+    failing = [d for d in deviations if d["ratio"] > 1]
+    print(f"{len(deviations)} fields differ, {len(failing)} outside tolerance")
+    for d in deviations[:top]:
+        mark = "FAIL" if d["ratio"] > 1 else "ok"
+        print(
+            f"  {mark:<5}{d['recording']:<10}{d['path']:<52}"
+            f"{d['reference']!s:>12} -> {d['candidate']!s:<12} x{d['ratio']:.2f}"
+        )
+    print(f"{len(deltas)} scores changed")
+    for name, path, delta in deltas[:top]:
+        print(f"  {name:<10}{path:<52}{delta:+.2f}")
+    return len(failing)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="praat")
+    parser.add_argument("--reference", default=REFERENCE_PATH)
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Store the engine's results as the new reference outputs.",
+    )
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = run_corpus(args.engine, directory)
+    if args.update:
+        os.makedirs(os.path.dirname(args.reference), exist_ok=True)
+        with open(args.reference, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"Stored the {args.engine} results in {args.reference}")
+        return
+    with open(args.reference) as f:
+        reference = json.load(f)
+    failing = report(
+        compare(reference, results), score_deltas(reference, results), args.top
+    )
+    sys.exit(1 if failing else 0)
+
+
+if __name__ == "__main__":
+    main()
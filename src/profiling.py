@@ -0,0 +1,155 @@
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+# Header that asks for a profile of one request
+PROFILE_HEADER = "X-Profile"
+# Capture file names: <time>_<test>_<lan_flag>_<duration>ms_<id>.folded
+_CAPTURE_NAME = re.compile(r"^\d{8}T\d{6}_\w+_\w+_(\d+)ms_[0-9a-f]+\.folded$")
+
+
+def profile_sample_rate():
+    """Returns the fraction of analyses profiled without being asked (PROFILE_SAMPLE_RATE, 0 by default)."""
+    return float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+
+def should_profile(header_value=None):
+    """Decides whether to profile a request.
+
+    Parameters
+    ----------
+    header_value (str): The value of the X-Profile header, if sent.
+
+    Returns
+    -------
+    bool: True if the header asks for a profile or the request was sampled.
+
+    """
+    if header_value is not None and header_value.strip().lower() in ("1", "true"):
+        return True
+    rate = profile_sample_rate()
+    return rate > 0 and random.random() < rate
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval.
+
+    The samples are counted per distinct stack, which is the folded format read
+    by flamegraph.pl, speedscope and inferno. Nothing runs in the sampled thread
+    itself; a daemon thread reads its frames from ``sys._current_frames``.
+
+    Parameters
+    ----------
+    thread_id (int): The ident of the thread to sample.
+    interval (float): The time between samples in seconds.
+
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self):
+        """Returns the samples as folded stacks, one "frame;frame;... count" line each."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+def _prune(directory, keep_recent, keep_slowest):
+    """Deletes captures that are neither among the most recent nor the slowest."""
+    captures = []
+    for name in os.listdir(directory):
+        match = _CAPTURE_NAME.match(name)
+        if match:
+            captures.append((name, int(match.group(1))))
+    # Names start with the capture time, so they sort oldest first
+    by_time = sorted(captures)
+    by_duration = sorted(captures, key=lambda c: c[1])
+    recent = {name for name, _ in by_time[max(0, len(captures) - keep_recent) :]}
+    slowest = {name for name, _ in by_duration[max(0, len(captures) - keep_slowest) :]}
+    for name, _ in captures:
+        if name not in recent and name not in slowest:
+            os.remove(os.path.join(directory, name))
+
+
+@contextmanager
+def capture_profile(enabled, test_type, lan_flag):
+    """Profiles the enclosed block and writes the samples as a folded-stack file.
+
+    The file goes to PROFILE_DIR (``profiles`` by default) under a name holding
+    the capture time, the test, the language and the duration of the block.
+    Only the PROFILE_KEEP_RECENT (20) most recent and PROFILE_KEEP_SLOWEST (20)
+    slowest captures are kept. Samples are taken every PROFILE_INTERVAL_MS (5)
+    milliseconds; only the calling thread is sampled.
+
+    Parameters
+    ----------
+    enabled (bool): Whether to profile; when False the block runs unchanged.
+    test_type (bool): The type of the test, True for public speaking.
+    lan_flag (str): The language flag of the test.
+
+    """
+    if not enabled:
+        yield
+        return
+    interval = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+    sampler = StackSampler(threading.get_ident(), interval)
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        elapsed_ms = round(1000 * (time.perf_counter() - started))
+        try:
+            directory = os.getenv("PROFILE_DIR", "profiles")
+            os.makedirs(directory, exist_ok=True)
+            name = (
+                f"{datetime.now().strftime('%Y%m%dT%H%M%S')}_"
+                f"{'ps' if test_type else 'stutter'}_"
+                f"{re.sub(r'[^A-Za-z0-9]', '', lan_flag)[:8] or 'none'}_"
+                f"{elapsed_ms}ms_{uuid.uuid4().hex[:8]}.folded"
+            )
+            with open(os.path.join(directory, name), "w") as f:
+                f.write(sampler.folded())
+            _prune(
+                directory,
+                int(os.getenv("PROFILE_KEEP_RECENT", "20")),
+                int(os.getenv("PROFILE_KEEP_SLOWEST", "20")),
+            )
+        except OSError as e:
+            logging.error("Could not write the profile: %s", str(e))
@@ -0,0 +1,153 @@
+import os
+
+# Subcollection and document of an account that hold its progress aggregates
+PROGRESS_COLLECTION = "Progress"
+PROGRESS_DOCUMENT = "aggregates"
+
+# Score that represents each test type in listings and account summaries
+PRIMARY_METRIC = {
+    "PS_Check": "final_public_speaking_score",
+    "Stuttering_Check": "fluency_score",
+}
+
+# Metrics tracked per test type, mapped to their path inside a stored result
+TRACKED_METRICS = {
+    "PS_Check": {
+        "final_public_speaking_score": ("final_public_speaking_score",),
+        "final_voice_score": ("Voice_Quality_&_Stability_Data", "final_voice_score"),
+        "final_energy_score": (
+            "Speech_Intensity_&_Energy_Data",
+            "final_energy_score",
+        ),
+        "overall_confidence": ("overall_confidence",),
+    },
+    "Stuttering_Check": {
+        "fluency_score": ("fluency_score",),
+        "stuttering_score": ("stuttering_score",),
+        "stutter_count": ("stutter_count",),
+        "confidence_score": ("confidence_score",),
+    },
+}
+
+
+def ewma_alpha():
+    """Returns the weight of the newest test in the moving average (PROGRESS_EWMA_ALPHA)."""
+    return float(os.getenv("PROGRESS_EWMA_ALPHA", "0.3"))
+
+
+def metric_values(test_kind, result):
+    """Extracts the tracked metrics of one stored result.
+
+    Parameters
+    ----------
+    test_kind (str): "PS_Check" or "Stuttering_Check".
+    result (dict): The stored analysis result.
+
+    Returns
+    -------
+    dict: Metric names mapped to their numeric value; missing or non-numeric metrics are left out.
+
+    """
+    values = {}
+    for name, path in TRACKED_METRICS.get(test_kind, {}).items():
+        value = result
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[name] = float(value)
+    return values
+
+
+def update_aggregate(aggregate, value, test_tag, alpha):
+    """Folds one value into a rolling aggregate in O(1).
+
+    Parameters
+    ----------
+    aggregate (dict): The aggregate so far, or None for the first value.
+    value (float): The new value.
+    test_tag (str): The tag of the test the value comes from.
+    alpha (float): The weight of the new value in the moving average.
+
+    Returns
+    -------
+    dict: The new aggregate with count, mean, ewma, best, last and the tags of the best and last tests.
+
+    """
+    if not aggregate:
+        return {
+            "count": 1,
+            "mean": value,
+            "ewma": value,
+            "best": value,
+            "best_tag": test_tag,
+            "last": value,
+            "last_tag": test_tag,
+        }
+    count = aggregate["count"] + 1
+    updated = {
+        "count": count,
+        "mean": aggregate["mean"] + (value - aggregate["mean"]) / count,
+        "ewma": alpha * value + (1 - alpha) * aggregate["ewma"],
+        "best": aggregate["best"],
+        "best_tag": aggregate["best_tag"],
+        "last": value,
+        "last_tag": test_tag,
+    }
+    if value > aggregate["best"]:
+        updated["best"], updated["best_tag"] = value, test_tag
+    return updated
+
+
+def apply_result(progress, test_kind, test_tag, result, alpha=None):
+    """Returns the progress after one more result, leaving the input unchanged.
+
+    Parameters
+    ----------
+    progress (dict): The progress so far, keyed by test type and metric.
+    test_kind (str): "PS_Check" or "Stuttering_Check".
+    test_tag (str): The tag of the test.
+    result (dict): The stored analysis result.
+    alpha (float): The moving-average weight; defaults to PROGRESS_EWMA_ALPHA.
+
+    Returns
+    -------
+    dict: The updated progress.
+
+    """
+    alpha = ewma_alpha() if alpha is None else alpha
+    progress = {kind: dict(metrics) for kind, metrics in (progress or {}).items()}
+    metrics = progress.setdefault(test_kind, {})
+    for name, value in metric_values(test_kind, result).items():
+        metrics[name] = update_aggregate(metrics.get(name), value, test_tag, alpha)
+    return progress
+
+
+def rebuild_progress(results, alpha=None):
+    """Recomputes the progress from every stored result, oldest test first.
+
+    Parameters
+    ----------
+    results (dict): The stored results of an account, keyed by test type and tag.
+    alpha (float): The moving-average weight; defaults to PROGRESS_EWMA_ALPHA.
+
+    Returns
+    -------
+    dict: The progress keyed by test type and metric.
+
+    """
+    progress = {}
+    for test_kind, tests in (results or {}).items():
+        for test_tag in sorted(tests):
+            progress = apply_result(
+                progress, test_kind, test_tag, tests[test_tag], alpha
+            )
+    return progress
+
+
+def progress_ref(db, acc_id):
+    return (
+        db.collection("User_Accounts")
+        .document(acc_id)
+        .collection(PROGRESS_COLLECTION)
+        .document(PROGRESS_DOCUMENT)
+    )
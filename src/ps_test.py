@@ -1,8 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import logging
+import os
+
 import numpy as np
 
-from src.ps_test_cat1 import analyze_speech_1
+from src.audio_probe import file_duration
+from src.feature_store import load_features, save_features
+from src.frame_features import (
+    FrameFeatures,
+    energy_curve_window,
+    summary_resolutions,
+)
+from src.memory_metrics import track_memory
+from src.ps_test_cat1 import measure_speech_1, score_speech_1, voice_measurements
 from src.ps_test_cat2 import analyze_speech_2
-from src.speech_to_text import transcribe_gcs
+from src.speech_to_text import transcribe_gcs, use_long_running
+from src.stage_metrics import stage
+
+# Returned with the /test response only; recomputed per request and never stored
+RESPONSE_ONLY_KEYS = ("segment_summaries", "energy_curve")
 
 
 def generate_overall_score(
@@ -71,23 +88,18 @@ def generate_final_public_speaking_feedback(final_public_speaking_score):
         )
 
 
-def ps_test(audio_path, lan_flag):
-    """Performs a public speaking test on the given audio file.
+def transcript_text(transcribe):
+    """Joins the transcription segments and averages their confidence.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
-    lan_flag (str): The language flag to be used in the transcription.
+    transcribe (list): The transcription segments with their confidence.
 
     Returns
     -------
-    dict: A dictionary containing the final public speaking score, feedback, overall confidence, transcription,
-    voice quality and stability data, and speech intensity and energy data.
+    tuple: The full transcript and the average confidence (100 if none was reported).
 
     """
-    gcs_uri = f"gs://saymore-340e9.firebasestorage.app/{audio_path}"
-
-    transcribe = transcribe_gcs(gcs_uri, long_flag=True, lan_flag=lan_flag)
     text = ""
     confidences = []
     for t in transcribe:
@@ -95,10 +107,25 @@ def ps_test(audio_path, lan_flag):
         if "confidence" in t:
             confidences.append(t["confidence"])
     avg_confidence = round(np.mean(confidences), 2) if confidences else 100
+    return text, avg_confidence
 
-    voice_data = analyze_speech_1(audio_path, text)
-    energy_data = analyze_speech_2(audio_path)
 
+def score_ps_test(transcribe, voice_data, energy_data):
+    """Combines the category results into the public speaking test result.
+
+    Parameters
+    ----------
+    transcribe (list): The transcription segments with their confidence.
+    voice_data (dict): The voice quality and stability result.
+    energy_data (dict): The speech intensity and energy result.
+
+    Returns
+    -------
+    dict: A dictionary containing the final public speaking score, feedback, overall confidence, transcription,
+    voice quality and stability data, and speech intensity and energy data.
+
+    """
+    _, avg_confidence = transcript_text(transcribe)
     overall_score = generate_overall_score(voice_data, energy_data, avg_confidence)
 
     final_feedback = generate_final_public_speaking_feedback(overall_score)
@@ -111,3 +138,148 @@ def ps_test(audio_path, lan_flag):
         "Voice_Quality_&_Stability_Data": voice_data,
         "Speech_Intensity_&_Energy_Data": energy_data,
     }
+
+
+def stored_result(result):
+    """Returns the part of an analysis result that is written to Firestore.
+
+    The extra segment summaries and the energy curve are several times larger
+    than the scores and can be recomputed, so they are left out.
+
+    Parameters
+    ----------
+    result (dict): The analysis result.
+
+    Returns
+    -------
+    dict: The result without the keys in RESPONSE_ONLY_KEYS.
+
+    """
+    return {
+        key: value for key, value in result.items() if key not in RESPONSE_ONLY_KEYS
+    }
+
+
+def _transcribe(gcs_uri, long_flag, lan_flag, content):
+    path_stage = "transcription_long" if long_flag else "transcription_sync"
+    with stage("transcription"), stage(path_stage):
+        return transcribe_gcs(
+            gcs_uri, long_flag=long_flag, lan_flag=lan_flag, content=content
+        )
+
+
+def ps_test(audio_path, lan_flag, blob_name=None, on_stage=None):
+    """Performs a public speaking test on the given audio file.
+
+    Speech-to-text runs while the audio is analyzed locally. Partial results
+    are passed to on_stage as soon as they are ready: "energy" (the speech
+    intensity and energy data), "voice" (pitch variation, clarity and voice
+    quality, from voice_measurements) and "transcription" (the transcription
+    and its confidence). The speaking speed and the scores that depend on it
+    need the transcript, so they only come with the full result.
+
+    Parameters
+    ----------
+    audio_path (str): The path to the downloaded audio file.
+    lan_flag (str): The language flag to be used in the transcription.
+    blob_name (str): The name of the upload in Firebase storage, if it differs from audio_path.
+    on_stage (callable): Called with the name and result of every finished stage, from the calling thread.
+
+    Returns
+    -------
+    dict: A dictionary containing the final public speaking score, feedback, overall confidence, transcription,
+    voice quality and stability data, speech intensity and energy data, pitch, intensity and energy
+    summaries at the extra segment durations from SEGMENT_RESOLUTIONS, intensity and energy over the
+    overlapping windows from ENERGY_CURVE, and the key of the stored features. The summaries and the curve
+    are only for the response; see stored_result.
+
+    """
+    gcs_uri = f"gs://saymore-340e9.firebasestorage.app/{blob_name or audio_path}"
+
+    # The WAV header gives the duration without decoding, so transcription can
+    # start first; other formats are decoded to find it
+    features = None
+    duration = file_duration(audio_path)
+    if duration is None:
+        features = FrameFeatures(audio_path)
+        duration = features.duration
+
+    # Short recordings are sent inline and recognized synchronously, which skips
+    # the long-running operation and its polling
+    long_flag = use_long_running(duration, os.path.getsize(audio_path))
+    content = None
+    if not long_flag:
+        with open(audio_path, "rb") as f:
+            content = f.read()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        transcription = pool.submit(
+            contextvars.copy_context().run,
+            _transcribe,
+            gcs_uri,
+            long_flag,
+            lan_flag,
+            content,
+        )
+        # Decode once; every analysis and resolution reads the same frame features
+        if features is None:
+            features = FrameFeatures(audio_path)
+
+        # The energy summaries only read running sums, so they are ready first
+        with stage("energy_analysis"), track_memory("analyze_speech_2"):
+            energy_data = analyze_speech_2(features.audio, features=features)
+            segment_summaries = features.summaries(summary_resolutions())
+            curve = energy_curve_window()
+            energy_curve = features.energy_curve(*curve) if curve else None
+        if on_stage is not None:
+            on_stage("energy", energy_data)
+
+        with stage("voice_analysis"), track_memory("analyze_speech_1"):
+            measure_speech_1(features)
+        if on_stage is not None:
+            on_stage("voice", voice_measurements(features))
+
+        transcribe = transcription.result()
+    text, avg_confidence = transcript_text(transcribe)
+    if on_stage is not None:
+        on_stage(
+            "transcription",
+            {"transcription": transcribe, "overall_confidence": avg_confidence},
+        )
+
+    voice_data = score_speech_1(features, text)
+    result = score_ps_test(transcribe, voice_data, energy_data)
+    result["segment_summaries"] = segment_summaries
+    if energy_curve is not None:
+        result["energy_curve"] = energy_curve
+
+    # Keep the features so the scores can be recomputed after the audio is deleted
+    feature_key = None
+    if "error" not in voice_data:
+        try:
+            with stage("feature_store"):
+                feature_key = save_features(audio_path, features, transcribe, lan_flag)
+        except Exception as e:
+            logging.error("Could not store the features: %s", str(e))
+    result["feature_key"] = feature_key
+    return result
+
+
+def rescore_ps_test(feature_key):
+    """Recomputes the scores and feedback of a public speaking test from its stored features.
+
+    Parameters
+    ----------
+    feature_key (str): The key returned with the original result.
+
+    Returns
+    -------
+    dict: The same fields as the original result, except the extra segment summaries and the energy curve.
+
+    """
+    features, transcribe = load_features(feature_key)
+    text, _ = transcript_text(transcribe)
+    voice_data = score_speech_1(features, text)
+    energy_data = analyze_speech_2(None, features=features)
+    result = score_ps_test(transcribe, voice_data, energy_data)
+    result["feature_key"] = feature_key
+    return result
@@ -1,9 +1,14 @@
 import re
 
-import librosa
 import numpy as np
 import parselmouth
 
+from src.analysis_pool import run_analyzers
+from src.frame_features import FrameFeatures, formant_tracks, pitch_track
+from src.shared_audio import as_array, as_sound
+from src.vad import has_speech, speaking_time
+from src.voice_kernels import voice_quality, voice_quality_engine
+
 
 def normalize_metric(value, best, worst, invert=False):
     """Normalizes a metric to a score between 0 and 100.
@@ -26,32 +31,17 @@ def normalize_metric(value, best, worst, invert=False):
         score = (1 - (value - best) / (worst - best)) * 100
     else:
         score = ((value - best) / (worst - best)) * 100
-    return float(max(0, min(100, round(score, 2))))
-
-
-def hz_to_semitones(pitch_hz, reference_pitch=100.0):
-    """Converts pitch in Hertz to semitones.
-
-    Parameters
-    ----------
-    pitch_hz (float): The pitch in Hertz.
-    reference_pitch (float): The reference pitch in Hertz.
+    return max(0.0, min(100.0, round(score, 2)))
 
-    Returns
-    -------
-    float: The pitch in semitones.
 
-    """
-    return 12 * np.log2(pitch_hz / reference_pitch)
-
-
-def analyze_pitch(audio_path, segment_duration=2.0):
+def analyze_pitch(audio_path, segment_duration=2.0, features=None):
     """Analyzes the pitch of an audio file.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
     segment_duration (float): The duration of each segment for analysis.
+    features (FrameFeatures): Frame-level features already computed for the recording.
 
     Returns
     -------
@@ -59,74 +49,47 @@ def analyze_pitch(audio_path, segment_duration=2.0):
 
     """
     try:
-        snd = parselmouth.Sound(audio_path)
-        duration = snd.get_total_duration()
-        pitch = snd.to_pitch()
-        pitch_values = pitch.selected_array["frequency"]
-        time_stamps = pitch.xs()
-
-        voiced_indices = pitch_values > 0
-        pitch_values = pitch_values[voiced_indices]
-        time_stamps = time_stamps[voiced_indices]
+        if features is None:
+            features = FrameFeatures(audio_path)
+        _, semitone_values = features.pitch_track
 
-        if pitch_values.size == 0:
+        if semitone_values.size == 0:
             return {"error": "No voiced pitch detected."}
 
-        semitone_values = hz_to_semitones(pitch_values)
         overall_std = np.std(semitone_values)
         overall_range = np.max(semitone_values) - np.min(semitone_values)
         monotony_score = 100 * (1 - (overall_std / (overall_range + 1e-5)))
-        monotony_score = float(max(0, min(100, round(monotony_score, 2))))
-
-        pitch_data = {}
-        for t in np.arange(0, duration, segment_duration):
-            segment_indices = (time_stamps >= t) & (time_stamps < t + segment_duration)
-            segment_pitches = semitone_values[segment_indices]
-            if segment_pitches.size > 0:
-                pitch_data[round(t, 2)] = {
-                    "mean_pitch_ST": float(round(np.mean(segment_pitches), 2)),
-                    "median_pitch_ST": float(round(np.median(segment_pitches), 2)),
-                    "min_pitch_ST": float(round(np.min(segment_pitches), 2)),
-                    "max_pitch_ST": float(round(np.max(segment_pitches), 2)),
-                    "std_pitch_ST": float(round(np.std(segment_pitches), 2)),
-                    "pitch_range_ST": float(
-                        round(np.max(segment_pitches) - np.min(segment_pitches), 2)
-                    ),
-                }
-            else:
-                pitch_data[round(t, 2)] = {
-                    "mean_pitch_ST": 0.0,
-                    "median_pitch_ST": 0.0,
-                    "min_pitch_ST": 0.0,
-                    "max_pitch_ST": 0.0,
-                    "std_pitch_ST": 0.0,
-                    "pitch_range_ST": 0.0,
-                }
+        monotony_score = max(0.0, min(100.0, round(monotony_score, 2)))
+
         return {
             "monotony_score": monotony_score,
-            "pitch_analysis": pitch_data,
+            "pitch_analysis": features.pitch_analysis(segment_duration),
         }
     except Exception as e:
         return {"error": str(e)}
 
 
-def analyze_jitter(audio_path, segment_duration=2.0):
+def analyze_jitter(audio_path, segment_duration=2.0, speech=None):
     """Analyzes the jitter of an audio file.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
     segment_duration (float): The duration of each segment for analysis.
+    speech (list): Speech intervals from the VAD; segments without speech are skipped and scored 0.0.
 
     Returns
     -------
     dict: A dictionary containing jitter data and overall jitter.
 
     """
-    snd = parselmouth.Sound(audio_path)
+    snd = as_sound(audio_path)
     duration = snd.get_total_duration()
     jitter_data = {}
-    for t in np.arange(0, duration, segment_duration):
+    for t in np.arange(0, duration, segment_duration).tolist():
+        if speech is not None and not has_speech(speech, t, t + segment_duration):
+            jitter_data[round(t, 2)] = 0.0
+            continue
         segment = snd.extract_part(
             from_time=t, to_time=min(t + segment_duration, duration)
         )
@@ -136,31 +99,33 @@ def analyze_jitter(audio_path, segment_duration=2.0):
         jitter_local = parselmouth.praat.call(
             point_process, "Get jitter (local)", 0, 0, 0.0001, 0.02, 1.3
         )
-        jitter_value = (
-            float(round(jitter_local, 6)) if not np.isnan(jitter_local) else 0.0
-        )
+        jitter_value = round(jitter_local, 6) if not np.isnan(jitter_local) else 0.0
         jitter_data[round(t, 2)] = jitter_value
     overall_jitter = float(np.nanmean(list(jitter_data.values())))
     return {"jitter_data": jitter_data, "overall_jitter": overall_jitter}
 
 
-def analyze_shimmer(audio_path, segment_duration=2.0):
+def analyze_shimmer(audio_path, segment_duration=2.0, speech=None):
     """Analyzes the shimmer of an audio file.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
     segment_duration (float): The duration of each segment for analysis.
+    speech (list): Speech intervals from the VAD; segments without speech are skipped and scored 0.0.
 
     Returns
     -------
     dict: A dictionary containing shimmer data and overall shimmer.
 
     """
-    snd = parselmouth.Sound(audio_path)
+    snd = as_sound(audio_path)
     duration = snd.get_total_duration()
     shimmer_data = {}
-    for t in np.arange(0, duration, segment_duration):
+    for t in np.arange(0, duration, segment_duration).tolist():
+        if speech is not None and not has_speech(speech, t, t + segment_duration):
+            shimmer_data[round(t, 2)] = 0.0
+            continue
         segment = snd.extract_part(
             from_time=t, to_time=min(t + segment_duration, duration)
         )
@@ -177,31 +142,33 @@ def analyze_shimmer(audio_path, segment_duration=2.0):
             1.3,
             1.6,
         )
-        shimmer_value = (
-            float(round(shimmer_local, 4)) if not np.isnan(shimmer_local) else 0.0
-        )
+        shimmer_value = round(shimmer_local, 4) if not np.isnan(shimmer_local) else 0.0
         shimmer_data[round(t, 2)] = shimmer_value
     overall_shimmer = float(np.nanmean(list(shimmer_data.values())))
     return {"shimmer_data": shimmer_data, "overall_shimmer": overall_shimmer}
 
 
-def analyze_hnr(audio_path, segment_duration=2.0):
+def analyze_hnr(audio_path, segment_duration=2.0, speech=None):
     """Analyzes the Harmonics-to-Noise Ratio (HNR) of an audio file.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
     segment_duration (float): The duration of each segment for analysis.
+    speech (list): Speech intervals from the VAD; segments without speech are skipped and scored 0.0.
 
     Returns
     -------
     dict: A dictionary containing HNR data and overall HNR.
 
     """
-    snd = parselmouth.Sound(audio_path)
+    snd = as_sound(audio_path)
     duration = snd.get_total_duration()
     hnr_data = {}
-    for t in np.arange(0, duration, segment_duration):
+    for t in np.arange(0, duration, segment_duration).tolist():
+        if speech is not None and not has_speech(speech, t, t + segment_duration):
+            hnr_data[round(t, 2)] = 0.0
+            continue
         segment = snd.extract_part(
             from_time=t, to_time=min(t + segment_duration, duration)
         )
@@ -209,55 +176,65 @@ def analyze_hnr(audio_path, segment_duration=2.0):
             segment, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0
         )
         hnr_value = parselmouth.praat.call(harmonicity, "Get mean", 0, 0)
-        hnr_value = float(max(round(hnr_value, 2), 0.0))
+        hnr_value = max(round(hnr_value, 2), 0.0)
         hnr_data[round(t, 2)] = hnr_value
     overall_hnr = float(np.mean(list(hnr_data.values())))
     return {"hnr_data": hnr_data, "overall_hnr": overall_hnr}
 
 
-def analyze_speaking_speed(audio_path, text):
-    """Analyzes the speaking speed of an audio file.
+def words_per_minute(text, duration):
+    """Computes the speaking speed of a transcript spoken over a duration.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
-    text (str): The transcribed text of the audio file.
+    text (str): The transcribed text.
+    duration (float): The speaking time in seconds.
 
     Returns
     -------
     float: The speaking speed in words per minute.
 
     """
-    y, sr = librosa.load(audio_path, sr=None)
-    duration = librosa.get_duration(y=y, sr=sr)
     words = len(re.findall(r"\b\w+\b", text))
     words_per_minute = words / (duration / 60) if duration > 0 else 0
-    return float(round(words_per_minute, 2))
+    return round(words_per_minute, 2)
 
 
-def analyze_clarity(audio_path):
-    """Analyzes the clarity of an audio file.
+def analyze_speaking_speed(audio_path, text, speech=None):
+    """Analyzes the speaking speed of an audio file.
+
+    Parameters
+    ----------
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
+    text (str): The transcribed text of the audio file.
+    speech (list): Speech intervals from the VAD; if given, the speed is measured over speaking time only.
+
+    Returns
+    -------
+    float: The speaking speed in words per minute.
+
+    """
+    y, sr = as_array(audio_path)
+    duration = len(y) / sr
+    if speech:
+        duration = speaking_time(speech)
+    return words_per_minute(text, duration)
+
+
+def clarity_score(f1_vals, f2_vals):
+    """Scores clarity from the spread of the first two formants.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
+    f1_vals (np.ndarray): The sampled F1 values in Hertz.
+    f2_vals (np.ndarray): The sampled F2 values in Hertz.
 
     Returns
     -------
     float: The clarity score between 0 and 100.
 
     """
-    snd = parselmouth.Sound(audio_path)
-    formants = snd.to_formant_burg()
-    f1_vals = []
-    f2_vals = []
-    for t in np.arange(0, snd.get_total_duration(), 0.01):
-        f1 = formants.get_value_at_time(1, t)
-        f2 = formants.get_value_at_time(2, t)
-        if f1 is not None and f2 is not None:
-            f1_vals.append(f1)
-            f2_vals.append(f2)
-    if not f1_vals or not f2_vals:
+    if len(f1_vals) == 0 or len(f2_vals) == 0:
         return 0.0
     mean_f1 = np.mean(f1_vals)
     std_f1 = np.std(f1_vals)
@@ -266,10 +243,26 @@ def analyze_clarity(audio_path):
     cv1 = std_f1 / mean_f1 if mean_f1 != 0 else 0
     cv2 = std_f2 / mean_f2 if mean_f2 != 0 else 0
     clarity_score = 100 * (1 - ((cv1 + cv2) / 2))
-    clarity_score = float(max(0, min(100, round(clarity_score, 2))))
+    clarity_score = max(0.0, min(100.0, round(clarity_score, 2)))
     return clarity_score
 
 
+def analyze_clarity(audio_path, speech=None):
+    """Analyzes the clarity of an audio file.
+
+    Parameters
+    ----------
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
+    speech (list): Speech intervals from the VAD; if given, formants are only sampled inside them.
+
+    Returns
+    -------
+    float: The clarity score between 0 and 100.
+
+    """
+    return clarity_score(*formant_tracks(audio_path, speech))
+
+
 def generate_speaking_score(
     variation_score, speaking_speed, clarity, jitter, shimmer, hnr
 ):
@@ -297,15 +290,15 @@ def generate_speaking_score(
     }
     stability_score = 100 - ((jitter * 100) + (shimmer * 100))
     stability_score += hnr / 2
-    stability_score = float(max(0, min(100, round(stability_score, 2))))
-    speed_score = float(max(0, 100 - abs(speaking_speed - 130)))
+    stability_score = max(0.0, min(100.0, round(stability_score, 2)))
+    speed_score = max(0.0, 100 - abs(speaking_speed - 130))
     final_score = (
         variation_score * weights["variation"]
         + speed_score * weights["speed"]
         + clarity * weights["clarity"]
         + stability_score * weights["stability"]
     )
-    final_score = float(max(0, min(100, round(final_score, 2))))
+    final_score = max(0.0, min(100.0, round(final_score, 2)))
     return final_score
 
 
@@ -455,79 +448,182 @@ def generate_dynamic_feedback(
     return dynamic_feedback
 
 
-def analyze_speech_1(audio_path, text):
+def silent_segments(duration, speech, segment_duration=2.0):
+    """Lists the segments that the VAD found to contain no speech.
+
+    Parameters
+    ----------
+    duration (float): The length of the recording in seconds.
+    speech (list): Speech intervals from the VAD, or None if the VAD was not run.
+    segment_duration (float): The duration of each segment for analysis.
+
+    Returns
+    -------
+    list: The start times of the silent segments, matching the keys of the per-segment data.
+
+    """
+    if speech is None:
+        return []
+    return [
+        round(t, 2)
+        for t in np.arange(0, duration, segment_duration).tolist()
+        if not has_speech(speech, t, t + segment_duration)
+    ]
+
+
+def analyze_speech_1(audio_path, text, features=None, engine=None):
     """Analyzes various aspects of speech from an audio file.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
     text (str): The transcribed text of the audio file.
+    features (FrameFeatures): Frame-level features shared with the other analyses; the measurements are stored on it.
+    engine (str): "praat" or "numpy" for jitter, shimmer and HNR; defaults to VOICE_QUALITY_ENGINE.
 
     Returns
     -------
     dict: A dictionary containing various analysis results and feedback.
 
     """
-    pitch_data = analyze_pitch(audio_path)
-    speaking_speed = analyze_speaking_speed(audio_path, text)
-    clarity = analyze_clarity(audio_path)
-    jitter_data = analyze_jitter(audio_path)
-    shimmer_data = analyze_shimmer(audio_path)
-    hnr_data = analyze_hnr(audio_path)
+    if features is None:
+        features = FrameFeatures(audio_path)
+    measure_speech_1(features, engine)
+    return score_speech_1(features, text)
+
 
+def measure_speech_1(features, engine=None):
+    """Measures the pitch track, formants, jitter, shimmer and HNR of a recording.
+
+    Parameters
+    ----------
+    features (FrameFeatures): Frame-level features of the recording; the measurements are stored on it.
+    engine (str): "praat" or "numpy" for jitter, shimmer and HNR; defaults to VOICE_QUALITY_ENGINE.
+
+    """
+    engine = engine or voice_quality_engine()
+    # Find speech once so the Praat loops and the speed only cover voiced spans
+    speech = features.speech
+    tasks = {
+        "pitch": (pitch_track, ()),
+        "formants": (formant_tracks, (speech,)),
+    }
+    if engine == "numpy":
+        tasks["voice_quality"] = (voice_quality, (2.0, speech))
+    else:
+        tasks["jitter"] = (analyze_jitter, (2.0, speech))
+        tasks["shimmer"] = (analyze_shimmer, (2.0, speech))
+        tasks["hnr"] = (analyze_hnr, (2.0, speech))
+    results = run_analyzers(features.audio, tasks)
+    features.pitch_track = results["pitch"]
+    features.formants = results["formants"]
+    features.voice_quality = results.get("voice_quality") or {
+        name: results[name] for name in ("jitter", "shimmer", "hnr")
+    }
+
+
+def voice_measurements(features):
+    """Scores the pitch variation, clarity and voice quality, which do not need the transcript.
+
+    Parameters
+    ----------
+    features (FrameFeatures): Features holding the pitch track, formants, speech intervals and voice quality results.
+
+    Returns
+    -------
+    dict: The variation, stability, clarity and normalized jitter, shimmer and HNR scores and the per-segment data,
+    or an error message.
+
+    """
+    pitch_data = analyze_pitch(features.audio, features=features)
     if "error" in pitch_data:
         return {"error": pitch_data["error"]}
+    clarity = clarity_score(*features.formants)
+    jitter_data = features.voice_quality["jitter"]
+    shimmer_data = features.voice_quality["shimmer"]
+    hnr_data = features.voice_quality["hnr"]
 
-    variation_score = float(
-        max(0, min(100, round(100 - pitch_data["monotony_score"], 2)))
-    )
-
-    final_voice_score = generate_speaking_score(
-        variation_score,
-        speaking_speed,
-        clarity,
-        jitter_data["overall_jitter"],
-        shimmer_data["overall_shimmer"],
-        hnr_data["overall_hnr"],
-    )
+    variation_score = max(0.0, min(100.0, round(100 - pitch_data["monotony_score"], 2)))
 
     stability_score = 100 - (
         (jitter_data["overall_jitter"] * 100) + (shimmer_data["overall_shimmer"] * 100)
     )
     stability_score += hnr_data["overall_hnr"] / 2
-    stability_score = float(max(0, min(100, round(stability_score, 2))))
+    stability_score = max(0.0, min(100.0, round(stability_score, 2)))
+
+    return {
+        "variation_score": variation_score,
+        "stability_score": stability_score,
+        "clarity": clarity,
+        "overall_jitter_score": normalize_metric(
+            jitter_data["overall_jitter"], best=0, worst=0.1, invert=True
+        ),
+        "overall_shimmer_score": normalize_metric(
+            shimmer_data["overall_shimmer"], best=0, worst=0.3, invert=True
+        ),
+        "overall_hnr_score": normalize_metric(
+            hnr_data["overall_hnr"], best=0, worst=30, invert=False
+        ),
+        "jitter_data": jitter_data["jitter_data"],
+        "shimmer_data": shimmer_data["shimmer_data"],
+        "hnr_data": hnr_data["hnr_data"],
+        "pitch_data": pitch_data["pitch_analysis"],
+        "silent_segments": silent_segments(features.duration, features.speech),
+    }
+
+
+def score_speech_1(features, text):
+    """Scores the voice quality and stability from measured features.
+
+    Parameters
+    ----------
+    features (FrameFeatures): Features holding the pitch track, formants, speech intervals and voice quality results.
+    text (str): The transcribed text of the audio file.
+
+    Returns
+    -------
+    dict: A dictionary containing various analysis results and feedback.
+
+    """
+    measurements = voice_measurements(features)
+    if "error" in measurements:
+        return measurements
+    duration = features.duration
+    if features.speech:
+        duration = speaking_time(features.speech)
+    speaking_speed = words_per_minute(text, duration)
+
+    final_voice_score = generate_speaking_score(
+        measurements["variation_score"],
+        speaking_speed,
+        measurements["clarity"],
+        features.voice_quality["jitter"]["overall_jitter"],
+        features.voice_quality["shimmer"]["overall_shimmer"],
+        features.voice_quality["hnr"]["overall_hnr"],
+    )
 
     base_feedback = generate_base_feedback(final_voice_score)
     dynamic_feedback = generate_dynamic_feedback(
-        variation_score=variation_score,
-        stability_score=stability_score,
+        variation_score=measurements["variation_score"],
+        stability_score=measurements["stability_score"],
         speaking_speed=speaking_speed,
-        clarity=clarity,
-    )
-
-    normalized_jitter = normalize_metric(
-        jitter_data["overall_jitter"], best=0, worst=0.1, invert=True
-    )
-    normalized_shimmer = normalize_metric(
-        shimmer_data["overall_shimmer"], best=0, worst=0.3, invert=True
-    )
-    normalized_hnr = normalize_metric(
-        hnr_data["overall_hnr"], best=0, worst=30, invert=False
+        clarity=measurements["clarity"],
     )
 
     return {
         "final_voice_score": final_voice_score,
-        "variation_score": variation_score,
-        "stability_score": stability_score,
+        "variation_score": measurements["variation_score"],
+        "stability_score": measurements["stability_score"],
         "speaking_speed": speaking_speed,
-        "clarity": clarity,
-        "overall_jitter_score": normalized_jitter,
-        "overall_shimmer_score": normalized_shimmer,
-        "overall_hnr_score": normalized_hnr,
+        "clarity": measurements["clarity"],
+        "overall_jitter_score": measurements["overall_jitter_score"],
+        "overall_shimmer_score": measurements["overall_shimmer_score"],
+        "overall_hnr_score": measurements["overall_hnr_score"],
         "base_feedback": base_feedback,
         "dynamic_feedback": dynamic_feedback,
-        "jitter_data": jitter_data["jitter_data"],
-        "shimmer_data": shimmer_data["shimmer_data"],
-        "hnr_data": hnr_data["hnr_data"],
-        "pitch_data": pitch_data["pitch_analysis"],
+        "jitter_data": measurements["jitter_data"],
+        "shimmer_data": measurements["shimmer_data"],
+        "hnr_data": measurements["hnr_data"],
+        "pitch_data": measurements["pitch_data"],
+        "silent_segments": measurements["silent_segments"],
     }
@@ -1,69 +1,46 @@
-import librosa
 import numpy as np
 
+from src.frame_features import FrameFeatures
 
-def analyze_intensity(audio_path, segment_duration=2.0):
+
+def analyze_intensity(audio_path, segment_duration=2.0, features=None, hop=None):
     """Analyzes the intensity of an audio file by calculating the root mean square (RMS) energy for segments of the audio.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
     segment_duration (float): The duration of each segment in seconds. Default is 2.0 seconds.
+    features (FrameFeatures): Frame-level features already computed for the recording.
+    hop (float): The time between segment starts in seconds; segments overlap when it is below segment_duration.
 
     Returns
     -------
     dict: A dictionary where keys are segment start times and values are the calculated intensity for each segment.
 
     """
-    y, sr = librosa.load(audio_path, sr=None)
-    rms_energy = librosa.feature.rms(y=y)[0]
-    duration = librosa.get_duration(y=y, sr=sr)
-    frame_times = np.linspace(0, duration, num=len(rms_energy))
-    intensity_data = {}
-
-    for t in np.arange(0, duration, segment_duration):
-        mask = (frame_times >= t) & (frame_times < t + segment_duration)
-        segment_rms = rms_energy[mask]
-        if segment_rms.size > 0:
-            # Multiply by 200 to scale up the raw RMS values
-            segment_intensity = np.mean(segment_rms) * 200
-            intensity_data[round(t, 2)] = float(round(segment_intensity, 4))
-        else:
-            intensity_data[round(t, 2)] = 0.0
-
-    return intensity_data
-
-
-def analyze_energy(audio_path, segment_duration=2.0):
+    if features is None:
+        features = FrameFeatures(audio_path)
+    return features.intensity_analysis(segment_duration, hop)
+
+
+def analyze_energy(audio_path, segment_duration=2.0, features=None, hop=None):
     """Analyzes the energy of an audio file by calculating the log-scaled energy for segments of the audio.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
     segment_duration (float): The duration of each segment in seconds. Default is 2.0 seconds.
+    features (FrameFeatures): Frame-level features already computed for the recording.
+    hop (float): The time between segment starts in seconds; segments overlap when it is below segment_duration.
 
     Returns
     -------
     dict: A dictionary where keys are segment start times and values are the calculated energy for each segment.
 
     """
-    y, sr = librosa.load(audio_path, sr=None)
-    duration = librosa.get_duration(y=y, sr=sr)
-    energy_data = {}
-
-    for t in np.arange(0, duration, segment_duration):
-        start = int(t * sr)
-        end = min(int((t + segment_duration) * sr), len(y))
-        segment = y[start:end]
-        if segment.size > 0:
-            energy = np.sum(segment**2)
-            # Use log10 to compress the range and then scale up
-            log_energy = max(np.log10(energy + 1e-8) * 10, 0)
-            energy_data[round(t, 2)] = float(round(log_energy * 10, 2))
-        else:
-            energy_data[round(t, 2)] = 0.0
-
-    return energy_data
+    if features is None:
+        features = FrameFeatures(audio_path)
+    return features.energy_analysis(segment_duration, hop)
 
 
 def calculate_scores(intensity_values, energy_values):
@@ -86,19 +63,19 @@ def calculate_scores(intensity_values, energy_values):
 
     max_possible_energy = 250
     normalized_energy = (avg_energy / max_possible_energy) * 100
-    energy_score = float(round(np.clip(normalized_energy, 0, 100), 2))
+    energy_score = round(np.clip(normalized_energy, 0, 100), 2)
 
     scaled_intensity = np.log1p(avg_intensity * 30) * 10
-    intensity_score = float(round(np.clip(scaled_intensity, 0, 100), 2))
+    intensity_score = round(np.clip(scaled_intensity, 0, 100), 2)
 
     max_variation = 50
     normalized_variation = (
         np.log1p((intensity_variation + energy_variation) / max_variation) * 100
     )
-    variation_score = float(round(np.clip(normalized_variation, 0, 100), 2))
+    variation_score = round(np.clip(normalized_variation, 0, 100), 2)
 
-    final_energy_score = float(
-        round(0.4 * intensity_score + 0.4 * energy_score + 0.2 * variation_score, 2)
+    final_energy_score = round(
+        0.4 * intensity_score + 0.4 * energy_score + 0.2 * variation_score, 2
     )
 
     return intensity_score, energy_score, variation_score, final_energy_score
@@ -215,21 +192,25 @@ def generate_variation_feedback(variation_score):
         return "Your speech variation is minimal; significant adjustments in pacing and delivery are needed."
 
 
-def analyze_speech_2(audio_path, segment_duration=2.0):
+def analyze_speech_2(audio_path, segment_duration=2.0, features=None):
     """Analyzes the speech in an audio file by calculating intensity and energy scores, and generating feedback.
 
     Parameters
     ----------
-    audio_path (str): The path to the audio file.
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
     segment_duration (float): The duration of each segment in seconds. Default is 2.0 seconds.
+    features (FrameFeatures): Frame-level features shared with the other analyses.
 
     Returns
     -------
     dict: A dictionary containing the final energy score, intensity score, energy score, variation score, base feedback, dynamic feedback, intensity analysis, and energy analysis.
 
     """
-    intensity_data = analyze_intensity(audio_path, segment_duration)
-    energy_data = analyze_energy(audio_path, segment_duration)
+    if features is None:
+        features = FrameFeatures(audio_path)
+    # Both summaries read running sums over the frames, so they run inline
+    intensity_data = analyze_intensity(audio_path, segment_duration, features)
+    energy_data = analyze_energy(audio_path, segment_duration, features)
 
     intensity_values = list(intensity_data.values())
     energy_values = list(energy_data.values())
@@ -0,0 +1,99 @@
+import orjson
+from starlette.responses import JSONResponse
+
+# Levels of detail a /test client can ask for, from least to most
+DETAIL_LEVELS = ("summary", "standard", "full")
+# Per-segment maps, left out below the full level
+SEGMENT_MAP_KEYS = {
+    "jitter_data",
+    "shimmer_data",
+    "hnr_data",
+    "pitch_data",
+    "intensity_analysis",
+    "energy_analysis",
+    "segment_summaries",
+    "energy_curve",
+}
+# Left out of summaries along with the per-segment maps
+SUMMARY_OMITTED_KEYS = SEGMENT_MAP_KEYS | {"transcript"}
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content):
+    """Serializes a result to JSON bytes.
+
+    NumPy scalars and arrays are written natively and numeric dict keys (the
+    segment start times) become strings, as the standard json module does.
+
+    Parameters
+    ----------
+    content: The value to serialize.
+
+    Returns
+    -------
+    bytes: The UTF-8 encoded JSON.
+
+    """
+    return orjson.dumps(content, option=_OPTIONS)
+
+
+def sse_event(event, data):
+    """Formats one Server-Sent Event whose data is a value serialized to JSON on one line."""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+def to_native(content):
+    """Converts a result to plain JSON types, e.g. before it is stored in Firestore."""
+    return orjson.loads(dumps(content))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response serialized with orjson, without FastAPI's jsonable_encoder pass."""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def _scalar(value):
+    return not isinstance(value, (dict, list, tuple))
+
+
+def select_detail(result, detail):
+    """Trims an analysis result to a level of detail.
+
+    ``full`` returns the result unchanged. ``standard`` leaves out the
+    per-segment maps. ``summary`` keeps only the scores, counts and feedback
+    strings, at the top level and one level down.
+
+    Parameters
+    ----------
+    result (dict): The full analysis result.
+    detail (str): One of DETAIL_LEVELS.
+
+    Returns
+    -------
+    dict: The trimmed result.
+
+    """
+    if detail == "full":
+        return result
+    if detail == "standard":
+        return {
+            key: (
+                {k: v for k, v in value.items() if k not in SEGMENT_MAP_KEYS}
+                if isinstance(value, dict)
+                else value
+            )
+            for key, value in result.items()
+            if key not in SEGMENT_MAP_KEYS
+        }
+    summary = {}
+    for key, value in result.items():
+        if key in SUMMARY_OMITTED_KEYS:
+            continue
+        if isinstance(value, dict):
+            summary[key] = {k: v for k, v in value.items() if _scalar(v)}
+        elif _scalar(value):
+            summary[key] = value
+    return summary
@@ -0,0 +1,380 @@
+from datetime import datetime, timezone
+
+from firebase_admin import firestore
+
+from src.progress import (
+    PRIMARY_METRIC,
+    apply_result,
+    metric_values,
+    progress_ref,
+    rebuild_progress,
+)
+from src.response import select_detail
+
+# Subcollection of an account that holds one document per test
+RESULTS_COLLECTION = "Results"
+# Format of the test tags, which also order the tests in time
+TAG_FORMAT = "%Y%m%d%H%M%S"
+MAX_PAGE_SIZE = 50
+# Set on an account once its legacy results map has been copied to the subcollection
+MIGRATED_FIELD = "results_migrated"
+
+
+def account_ref(db, acc_id):
+    return db.collection("User_Accounts").document(acc_id)
+
+
+def results_ref(db, acc_id):
+    return account_ref(db, acc_id).collection(RESULTS_COLLECTION)
+
+
+def result_id(test_kind, test_tag):
+    """Returns the document id of a test, e.g. ``20250101120000_PS_Check``."""
+    return f"{test_tag}_{test_kind}"
+
+
+def primary_score(test_kind, result):
+    """Returns the score that represents a result in listings, or None if it has none."""
+    return metric_values(test_kind, result).get(PRIMARY_METRIC.get(test_kind))
+
+
+def history_entry(result):
+    """Returns the small copy of a result kept in the account's ``results`` map.
+
+    The app lists the tests of an account from this map, so it only holds the
+    scores, counts and feedback of the summary detail level; the full result
+    stays in the results subcollection.
+
+    Parameters
+    ----------
+    result (dict): The JSON-compatible analysis result.
+
+    Returns
+    -------
+    dict: The result without its per-segment maps and transcript.
+
+    """
+    return select_detail(result, "summary")
+
+
+def result_document(test_kind, test_tag, result, created_at):
+    """Builds the stored document of one test.
+
+    The type, time and score are top-level fields so that Firestore indexes them
+    for filtered and ordered history queries.
+
+    Parameters
+    ----------
+    test_kind (str): "PS_Check" or "Stuttering_Check".
+    test_tag (str): The tag of the test.
+    result (dict): The JSON-compatible analysis result.
+    created_at (datetime): When the test was taken.
+
+    Returns
+    -------
+    dict: The document fields.
+
+    """
+    return {
+        "test_type": test_kind,
+        "test_tag": test_tag,
+        "created_at": created_at,
+        "score": primary_score(test_kind, result),
+        "result": result,
+    }
+
+
+def record_result(db, acc_id, test_kind, test_tag, result, created_at=None):
+    """Stores a result as its own document and updates the account in one transaction.
+
+    The account receives a small per-type summary (count, last tag and score)
+    and, for the app's history list, the result's history_entry in its
+    ``results`` map. The progress aggregates are updated alongside.
+
+    Parameters
+    ----------
+    db (firestore.Client): The Firestore client.
+    acc_id (str): The account the result belongs to.
+    test_kind (str): "PS_Check" or "Stuttering_Check".
+    test_tag (str): The tag of the test.
+    result (dict): The JSON-compatible analysis result.
+    created_at (datetime): When the test was taken; defaults to now.
+
+    """
+    created_at = created_at or datetime.now(timezone.utc)
+    get_progress(db, acc_id)
+    aggregates_ref = progress_ref(db, acc_id)
+    document = result_document(test_kind, test_tag, result, created_at)
+
+    @firestore.transactional
+    def write(transaction):
+        snapshot = aggregates_ref.get(transaction=transaction)
+        stored = snapshot.to_dict() if snapshot.exists else {}
+        progress = apply_result(stored.get("progress"), test_kind, test_tag, result)
+        transaction.update(
+            account_ref(db, acc_id),
+            {
+                f"summary.{test_kind}.count": firestore.Increment(1),
+                f"summary.{test_kind}.last_tag": test_tag,
+                f"summary.{test_kind}.last_score": document["score"],
+                f"results.{test_kind}.{test_tag}": history_entry(result),
+            },
+        )
+        transaction.set(
+            results_ref(db, acc_id).document(result_id(test_kind, test_tag)), document
+        )
+        transaction.set(aggregates_ref, {"progress": progress})
+
+    write(db.transaction())
+
+
+def tag_time(test_tag):
+    """Returns the time encoded in a test tag, or None if it is not a valid tag."""
+    try:
+        return datetime.strptime(test_tag, TAG_FORMAT).replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+def legacy_entries(results):
+    """Lists the valid entries of a legacy ``results`` map.
+
+    Accounts are created with placeholders such as ``['']`` in place of the
+    per-type maps, so anything that is not a map of tagged results is skipped.
+
+    Parameters
+    ----------
+    results: The ``results`` field of the account, if any.
+
+    Returns
+    -------
+    list: (test_kind, test_tag, result) tuples ordered by type and tag.
+
+    """
+    if not isinstance(results, dict):
+        return []
+    entries = []
+    for test_kind, tests in results.items():
+        if not isinstance(tests, dict):
+            continue
+        for test_tag, result in tests.items():
+            if isinstance(result, dict) and tag_time(test_tag) is not None:
+                entries.append((test_kind, test_tag, result))
+    return sorted(entries, key=lambda entry: entry[:2])
+
+
+def migrate_legacy_results(db, acc_id):
+    """Copies results stored in the account document into the results subcollection.
+
+    Older accounts keep every result in a ``results`` map on the account. The
+    app's history list still reads that map, so it is left in place; the
+    entries missing from the subcollection are copied and merged into the
+    summary in one transaction, and the account is marked so this runs once.
+
+    Parameters
+    ----------
+    db (firestore.Client): The Firestore client.
+    acc_id (str): The account.
+
+    Returns
+    -------
+    bool: False if the account does not exist, True otherwise.
+
+    """
+    account = account_ref(db, acc_id)
+
+    @firestore.transactional
+    def migrate(transaction):
+        snapshot = account.get(transaction=transaction)
+        if not snapshot.exists:
+            return False
+        data = snapshot.to_dict() or {}
+        if data.get(MIGRATED_FIELD):
+            return True
+
+        # Results written since the move are already stored and counted in the summary
+        missing = {}
+        for test_kind, test_tag, result in legacy_entries(data.get("results")):
+            ref = results_ref(db, acc_id).document(result_id(test_kind, test_tag))
+            if not ref.get(transaction=transaction).exists:
+                missing.setdefault(test_kind, {})[test_tag] = (ref, result)
+
+        summary = data.get("summary", {})
+        for test_kind, tests in missing.items():
+            for test_tag, (ref, result) in tests.items():
+                document = result_document(
+                    test_kind, test_tag, result, tag_time(test_tag)
+                )
+                transaction.set(ref, document)
+            current = summary.get(test_kind, {})
+            last_tag = max(tests)
+            merged = {"count": current.get("count", 0) + len(tests)}
+            if current.get("last_tag", "") > last_tag:
+                merged.update(
+                    last_tag=current["last_tag"], last_score=current["last_score"]
+                )
+            else:
+                merged.update(
+                    last_tag=last_tag,
+                    last_score=primary_score(test_kind, tests[last_tag][1]),
+                )
+            summary[test_kind] = merged
+        transaction.update(account, {"summary": summary, MIGRATED_FIELD: True})
+        return True
+
+    return migrate(db.transaction())
+
+
+def load_results(db, acc_id):
+    """Reads every stored result of an account.
+
+    Parameters
+    ----------
+    db (firestore.Client): The Firestore client.
+    acc_id (str): The account.
+
+    Returns
+    -------
+    dict: The results keyed by test type and tag.
+
+    """
+    results = {}
+    for snapshot in results_ref(db, acc_id).stream():
+        document = snapshot.to_dict()
+        results.setdefault(document["test_type"], {})[document["test_tag"]] = document[
+            "result"
+        ]
+    return results
+
+
+def replace_progress(db, acc_id):
+    """Rebuilds the progress of an account from all its results and stores it.
+
+    Used for accounts created before progress was tracked and after stored
+    results are changed, e.g. by rescoring.
+
+    Parameters
+    ----------
+    db (firestore.Client): The Firestore client.
+    acc_id (str): The account.
+
+    Returns
+    -------
+    dict: The rebuilt progress.
+
+    """
+    progress = rebuild_progress(load_results(db, acc_id))
+    progress_ref(db, acc_id).set({"progress": progress})
+    return progress
+
+
+def get_progress(db, acc_id):
+    """Reads the progress of an account with a single small document read.
+
+    Accounts from before the results subcollection or the aggregates existed are
+    migrated and backfilled once, on their first read or write.
+
+    Parameters
+    ----------
+    db (firestore.Client): The Firestore client.
+    acc_id (str): The account.
+
+    Returns
+    -------
+    dict: The progress keyed by test type and metric, or None if the account does not exist.
+
+    """
+    snapshot = progress_ref(db, acc_id).get()
+    if snapshot.exists:
+        return snapshot.to_dict().get("progress", {})
+    if not migrate_legacy_results(db, acc_id):
+        return None
+    return replace_progress(db, acc_id)
+
+
+def list_results(db, acc_id, test_kind=None, limit=10, cursor=None):
+    """Reads one page of an account's results, newest first.
+
+    Parameters
+    ----------
+    db (firestore.Client): The Firestore client.
+    acc_id (str): The account.
+    test_kind (str): Only return this test type, if given.
+    limit (int): The page size, at most MAX_PAGE_SIZE.
+    cursor (str): The ``next_cursor`` of the previous page.
+
+    Returns
+    -------
+    tuple: The page of results and the cursor of the next page (None on the last page).
+
+    Raises
+    ------
+    LookupError: If the cursor does not name a stored result.
+
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor is None:
+        migrate_legacy_results(db, acc_id)
+    query = results_ref(db, acc_id)
+    if test_kind:
+        query = query.where(filter=firestore.FieldFilter("test_type", "==", test_kind))
+    query = query.order_by("created_at", direction=firestore.Query.DESCENDING)
+    if cursor:
+        start = results_ref(db, acc_id).document(cursor).get()
+        if not start.exists:
+            raise LookupError(f"Unknown cursor {cursor!r}")
+        query = query.start_after(start)
+    # Fetch one extra document to know whether another page follows
+    snapshots = list(query.limit(limit + 1).stream())
+
+    page = []
+    for snapshot in snapshots[:limit]:
+        document = snapshot.to_dict()
+        created_at = document["created_at"]
+        page.append(
+            {
+                "id": snapshot.id,
+                "test_type": document["test_type"],
+                "test_tag": document["test_tag"],
+                "created_at": created_at.isoformat(),
+                "score": document["score"],
+                "result": document["result"],
+            }
+        )
+    next_cursor = page[-1]["id"] if len(snapshots) > limit else None
+    return page, next_cursor
+
+
+def update_result(db, acc_id, test_kind, test_tag, fields):
+    """Merges new fields into a stored result and rebuilds the progress.
+
+    Parameters
+    ----------
+    db (firestore.Client): The Firestore client.
+    acc_id (str): The account.
+    test_kind (str): "PS_Check" or "Stuttering_Check".
+    test_tag (str): The tag of the test.
+    fields (dict): The JSON-compatible fields to merge into the result.
+
+    Returns
+    -------
+    bool: False if no such result is stored.
+
+    """
+    migrate_legacy_results(db, acc_id)
+    ref = results_ref(db, acc_id).document(result_id(test_kind, test_tag))
+    snapshot = ref.get()
+    if not snapshot.exists:
+        return False
+    result = snapshot.to_dict()["result"]
+    result.update(fields)
+    score = primary_score(test_kind, result)
+    ref.update({"result": result, "score": score})
+    account_fields = {f"results.{test_kind}.{test_tag}": history_entry(result)}
+    summary = (account_ref(db, acc_id).get().to_dict() or {}).get("summary", {})
+    if summary.get(test_kind, {}).get("last_tag") == test_tag:
+        account_fields[f"summary.{test_kind}.last_score"] = score
+    account_ref(db, acc_id).update(account_fields)
+    # The aggregates saw the old scores, so rebuild them from every result
+    replace_progress(db, acc_id)
+    return True
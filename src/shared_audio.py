@@ -0,0 +1,132 @@
+import os
+import tempfile
+import uuid
+
+import librosa
+import numpy as np
+import parselmouth
+
+# Prefer the RAM-backed filesystem so mapped samples never touch the disk
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+SHARED_PREFIX = "saymore-samples-"
+
+
+class AudioSamples:
+    """Decoded mono samples of a recording together with their sampling rate."""
+
+    __slots__ = ("samples", "sr")
+
+    def __init__(self, samples, sr):
+        self.samples = samples
+        self.sr = sr
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sr
+
+
+def load_samples(audio_path):
+    """Decodes an audio file once at its native sampling rate.
+
+    Parameters
+    ----------
+    audio_path (str or AudioSamples): The path to the audio file; decoded samples are returned as they are.
+
+    Returns
+    -------
+    AudioSamples: The decoded mono samples.
+
+    """
+    if isinstance(audio_path, AudioSamples):
+        return audio_path
+    y, sr = librosa.load(audio_path, sr=None)
+    return AudioSamples(y, sr)
+
+
+def as_array(audio):
+    """Returns the samples and sampling rate of a path or already decoded audio.
+
+    Parameters
+    ----------
+    audio (str or AudioSamples): The path to the audio file, or its decoded samples.
+
+    Returns
+    -------
+    tuple: The sample array and the sampling rate.
+
+    """
+    if isinstance(audio, AudioSamples):
+        return audio.samples, audio.sr
+    return librosa.load(audio, sr=None)
+
+
+def as_sound(audio):
+    """Returns a Praat sound for a path or already decoded audio.
+
+    Parameters
+    ----------
+    audio (str or AudioSamples): The path to the audio file, or its decoded samples.
+
+    Returns
+    -------
+    parselmouth.Sound: The sound object.
+
+    """
+    if isinstance(audio, AudioSamples):
+        return parselmouth.Sound(
+            audio.samples.astype(np.float64), sampling_frequency=audio.sr
+        )
+    return parselmouth.Sound(audio)
+
+
+class SharedSamples:
+    """Places decoded samples once in a memory-mapped file for worker processes.
+
+    Workers receive only the small ``handle`` and map the same pages read-only, so
+    handing the recording to several workers costs the same for any length. The
+    file is removed when the context exits, including when an analysis failed.
+    """
+
+    def __init__(self, audio):
+        self.path = os.path.join(SHARED_DIR, f"{SHARED_PREFIX}{uuid.uuid4().hex}.npy")
+        mapped = np.lib.format.open_memmap(
+            self.path, mode="w+", dtype=audio.samples.dtype, shape=audio.samples.shape
+        )
+        try:
+            mapped[:] = audio.samples
+            mapped.flush()
+        except Exception:
+            self.close()
+            raise
+        finally:
+            del mapped
+        self.handle = {"path": self.path, "sr": audio.sr}
+
+    def close(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        """Returns the handle that worker processes use to attach to the samples."""
+        return self.handle
+
+    def __exit__(self, exc_type, exc, tb):
+        """Removes the shared file whether or not the analysis succeeded."""
+        self.close()
+
+
+def attach_samples(handle):
+    """Maps shared samples into the current process without copying them.
+
+    Parameters
+    ----------
+    handle (dict): The handle produced by SharedSamples.
+
+    Returns
+    -------
+    AudioSamples: Read-only samples backed by the shared mapping.
+
+    """
+    return AudioSamples(np.load(handle["path"], mmap_mode="r"), handle["sr"])
@@ -0,0 +1,85 @@
+import asyncio
+import os
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its outcome.
+
+    The first caller for a key becomes the leader and starts the call as a task
+    of its own. Callers that arrive with the same key while it runs wait for its
+    result, or its exception, instead of repeating the work. A successful result
+    stays shared for ``ttl`` seconds after the call finishes, so a duplicate that
+    arrives just after it is answered too; failures are forgotten at once. The
+    call outlives its callers: cancelling the leader or any follower only stops
+    that caller from waiting.
+    """
+
+    def __init__(self, ttl=0.0):
+        self._ttl = ttl
+        self._calls = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    async def do(self, key, func):
+        """Runs ``func`` unless a call for ``key`` is in flight or finished within the TTL.
+
+        Parameters
+        ----------
+        key (hashable): Identifies calls that produce the same result.
+        func (callable): Coroutine function taking no arguments.
+
+        Returns
+        -------
+        tuple: The result and whether it was shared from another caller's call.
+
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self._coalesced += 1
+            # A caller that is cancelled must not cancel the shared call
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(func())
+        self._calls[key] = task
+        self._leaders += 1
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task), False
+
+    def _finished(self, key, task):
+        """Keeps a successful result for the TTL and forgets anything else."""
+        if not task.cancelled():
+            # Marks the exception as retrieved when no caller is left waiting
+            task.exception()
+        if task.cancelled() or task.exception() is not None or self._ttl <= 0:
+            self._forget(key, task)
+        else:
+            asyncio.get_running_loop().call_later(self._ttl, self._forget, key, task)
+
+    def _forget(self, key, task):
+        """Drops ``key`` unless a newer call has taken its place."""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def snapshot(self):
+        """Returns the calls run, the callers that shared one, the calls in flight and the results kept."""
+        in_flight = sum(not task.done() for task in self._calls.values())
+        return {
+            "calls": self._leaders,
+            "coalesced": self._coalesced,
+            "in_flight": in_flight,
+            "cached": len(self._calls) - in_flight,
+        }
+
+
+def create_single_flight():
+    """Creates the single flight of /test analyses from environment settings.
+
+    COALESCE_TTL_SECONDS, 30 by default, is how long a finished analysis is
+    shared with duplicate requests.
+
+    Returns
+    -------
+    SingleFlight: The configured single flight.
+
+    """
+    return SingleFlight(ttl=float(os.getenv("COALESCE_TTL_SECONDS", "30")))
@@ -1,41 +1,121 @@
 import json
 import os
 import tempfile
+import threading
 
 from dotenv import load_dotenv
 from google.cloud import speech
 
+from src.governor import get_governor
+
 # Load environment variables from a .env file
 load_dotenv()
 
-# Retrieve Google Cloud credentials from environment variable
-gcs_credentials_json = os.getenv("GOOGLE_APPLICATION_CREDENTIALS_JSON")
-if gcs_credentials_json is None:
-    raise ValueError(
-        "GOOGLE_APPLICATION_CREDENTIALS_JSON environment variable is not set."
-    )
+# Path of the credentials file written on first use
+_credentials_path = None
+_credentials_lock = threading.Lock()
+
+
+def configure_credentials():
+    """Writes the Google Cloud credentials to a file for the client library, once.
+
+    The credentials are only needed to call Speech-to-Text, so they are read on
+    first use and the analyzers that share this module can be imported without
+    them.
+
+    Returns
+    -------
+    str: The path of the credentials file, also set as GOOGLE_APPLICATION_CREDENTIALS.
+
+    Raises
+    ------
+    ValueError: If GOOGLE_APPLICATION_CREDENTIALS_JSON is not set or has no private key.
+
+    """
+    global _credentials_path
+    with _credentials_lock:
+        if _credentials_path is not None:
+            return _credentials_path
+
+        # Retrieve Google Cloud credentials from environment variable
+        gcs_credentials_json = os.getenv("GOOGLE_APPLICATION_CREDENTIALS_JSON")
+        if gcs_credentials_json is None:
+            raise ValueError(
+                "GOOGLE_APPLICATION_CREDENTIALS_JSON environment variable is not set."
+            )
+
+        # Parse the credentials JSON string into a dictionary
+        credentials_dict = json.loads(gcs_credentials_json)
+
+        # Replace escaped newline characters in the private key with actual newlines
+        private_key = credentials_dict.get("private_key")
+        if private_key:
+            credentials_dict["private_key"] = private_key.replace("\\n", "\n")
+        else:
+            raise ValueError("Private key not found in Google Cloud credentials.")
+
+        # Create a temporary file to store the modified credentials
+        temp_credentials_file = tempfile.NamedTemporaryFile(
+            delete=False, suffix=".json"
+        )
+        temp_credentials_file.write(json.dumps(credentials_dict).encode())
+        temp_credentials_file.close()
+
+        # Set the environment variable to point to the temporary credentials file
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = temp_credentials_file.name
+        _credentials_path = temp_credentials_file.name
+        return _credentials_path
+
+
+# Largest audio content Google accepts inline in a synchronous request
+SYNC_INLINE_MAX_BYTES = 10 * 1024 * 1024
+
+
+def use_long_running(duration, size):
+    """Decides whether a recording needs long-running recognition.
 
-# Parse the credentials JSON string into a dictionary
-credentials_dict = json.loads(gcs_credentials_json)
+    Synchronous recognition with inline content returns without an operation
+    to poll, but Google accepts it only for about a minute of audio and 10 MB.
+    Recordings up to STT_SYNC_MAX_SECONDS (55) seconds and SYNC_INLINE_MAX_BYTES
+    are recognized synchronously.
 
-# Replace escaped newline characters in the private key with actual newlines
-private_key = credentials_dict.get("private_key")
-if private_key:
-    credentials_dict["private_key"] = private_key.replace("\\n", "\n")
-else:
-    raise ValueError("Private key not found in Google Cloud credentials.")
+    Parameters
+    ----------
+    duration (float): The length of the recording in seconds.
+    size (int): The size of the recording in bytes.
+
+    Returns
+    -------
+    bool: True if the recording is too long or too large for synchronous recognition.
+
+    """
+    max_seconds = float(os.getenv("STT_SYNC_MAX_SECONDS", "55"))
+    return duration > max_seconds or size > SYNC_INLINE_MAX_BYTES
+
+
+def _recognize(client, config, audio, long_flag):
+    """Sends a single recognition request to Google Cloud Speech-to-Text.
 
-# Create a temporary file to store the modified credentials
-temp_credentials_file = tempfile.NamedTemporaryFile(delete=False, suffix=".json")
-temp_credentials_file.write(json.dumps(credentials_dict).encode())
-temp_credentials_file.close()
+    Parameters
+    ----------
+    client (speech.SpeechClient): The Speech-to-Text client.
+    config (speech.RecognitionConfig): The recognition configuration.
+    audio (speech.RecognitionAudio): The audio to recognize.
+    long_flag (bool): Flag indicating whether to use long-running recognition.
 
-# Set the environment variable to point to the temporary credentials file
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = temp_credentials_file.name
+    Returns
+    -------
+    speech.RecognizeResponse or google.api_core.operation.Operation: The recognition response, or the
+    submitted long-running operation.
+
+    """
+    if long_flag:
+        return client.long_running_recognize(config=config, audio=audio)
+    return client.recognize(config=config, audio=audio)
 
 
 def transcribe_gcs(
-    gcs_uri: str, long_flag: bool, lan_flag: str
+    gcs_uri: str, long_flag: bool, lan_flag: str, content: bytes = None
 ) -> list[dict[str, str]]:
     """Transcribes audio from a Google Cloud Storage URI using Google Cloud Speech-to-Text API.
 
@@ -44,12 +124,14 @@ def transcribe_gcs(
     gcs_uri (str): The URI of the audio file in Google Cloud Storage.
     long_flag (bool): Flag indicating whether to use long-running recognition for longer audio files.
     lan_flag (str): Language flag to specify the language of the audio.
+    content (bytes): The audio itself, sent inline instead of the URI when given.
 
     Returns
     -------
     list[dict[str, str]]: A list of dictionaries containing the transcript and confidence score for each segment.
 
     """
+    configure_credentials()
     try:
         client = speech.SpeechClient()
 
@@ -57,7 +139,10 @@ def transcribe_gcs(
         language_mapping = {"en": "en-US", "si": "si-LK", "ta": "ta-LK"}
         language_code = language_mapping.get(lan_flag, "en-US")
 
-        audio = speech.RecognitionAudio(uri=gcs_uri)
+        if content is not None:
+            audio = speech.RecognitionAudio(content=content)
+        else:
+            audio = speech.RecognitionAudio(uri=gcs_uri)
         config = speech.RecognitionConfig(
             encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
             sample_rate_hertz=16000,
@@ -65,12 +150,14 @@ def transcribe_gcs(
             enable_automatic_punctuation=True,
         )
 
+        response = get_governor("google_stt").call(
+            _recognize, client, config, audio, long_flag
+        )
         if long_flag:
-            operation = client.long_running_recognize(config=config, audio=audio)
+            # Only the submit is retried: an operation that was already submitted
+            # is waited for once, outside the governor, and never resubmitted
             print("Waiting for long-running operation to complete...")
-            response = operation.result(timeout=300)
-        else:
-            response = client.recognize(config=config, audio=audio)
+            response = response.result(timeout=300)
 
         result_list = [
             {
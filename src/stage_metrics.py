@@ -0,0 +1,94 @@
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+import numpy as np
+
+# Number of recent durations kept per stage for the percentiles
+STAGE_SAMPLE_SIZE = 1000
+
+_durations = defaultdict(lambda: deque(maxlen=STAGE_SAMPLE_SIZE))
+_counts = defaultdict(int)
+_lock = threading.Lock()
+
+# Stage timings of the request being handled, used for the Server-Timing header
+_request_stages = ContextVar("request_stages", default=None)
+
+
+def record_stage(name, seconds):
+    """Records the duration of one run of a pipeline stage.
+
+    Parameters
+    ----------
+    name (str): The stage name.
+    seconds (float): How long the stage took.
+
+    """
+    with _lock:
+        _durations[name].append(seconds)
+        _counts[name] += 1
+    request_stages = _request_stages.get()
+    if request_stages is not None:
+        request_stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name):
+    """Context manager that times a pipeline stage and records it, even if it fails."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+@contextmanager
+def request_stages():
+    """Collects the stages timed while handling one request.
+
+    The list is shared with worker threads started from this context, so stages
+    timed inside ``run_in_threadpool`` are included.
+
+    Yields
+    ------
+    list: The ``(name, seconds)`` pairs recorded so far.
+
+    """
+    stages = []
+    token = _request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _request_stages.reset(token)
+
+
+def server_timing(stages):
+    """Formats stage timings as a Server-Timing header value in milliseconds."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages)
+
+
+def stage_metrics():
+    """Returns count, mean and p50/p95/p99 durations in seconds for every stage."""
+    with _lock:
+        snapshot = {name: list(values) for name, values in _durations.items()}
+        counts = dict(_counts)
+    metrics = {}
+    for name, values in snapshot.items():
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        metrics[name] = {
+            "count": counts[name],
+            "mean": round(float(np.mean(values)), 4),
+            "p50": round(float(p50), 4),
+            "p95": round(float(p95), 4),
+            "p99": round(float(p99), 4),
+        }
+    return metrics
+
+
+def reset_stage_metrics():
+    """Clears every recorded stage duration."""
+    with _lock:
+        _durations.clear()
+        _counts.clear()
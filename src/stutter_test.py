@@ -1,9 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import json
+import logging
 import os
+import threading
 
 import azure.cognitiveservices.speech as speechsdk
-import google.generativeai as genai
 from dotenv import load_dotenv
+import google.generativeai as genai
+
+from src.acoustic_events import acoustic_detection_enabled, analyze_acoustic_events
+from src.disfluency import LOCAL_LANGUAGES, analyze_disfluency_local
+from src.governor import RetryableProviderError, get_governor
+from src.micro_batch import MicroBatcher
+from src.stage_metrics import stage
 
 # Load environment variables from a .env file
 load_dotenv()
@@ -19,6 +29,14 @@ google_api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=google_api_key)
 model = genai.GenerativeModel("gemini-2.0-flash")
 
+# Azure cancellation codes that indicate throttling or a transient outage
+RETRYABLE_AZURE_ERRORS = {
+    speechsdk.CancellationErrorCode.TooManyRequests,
+    speechsdk.CancellationErrorCode.ServiceTimeout,
+    speechsdk.CancellationErrorCode.ServiceUnavailable,
+    speechsdk.CancellationErrorCode.ConnectionFailure,
+}
+
 # System prompt for the generative model to analyze stuttering in transcripts
 system_prompt = """
     "You are an expert in speech and language pathology specializing in stuttering detection. "
@@ -37,6 +55,28 @@ system_prompt = """
     "'confidence_score': Confidence score (0-100)."
 """
 
+# "gemini" always asks the model, "auto" skips it when the local detector finds
+# no disfluency at all, "local" never calls it; the last two only apply to the
+# languages in LOCAL_LANGUAGES
+STUTTER_ANALYSIS_MODES = ("gemini", "auto", "local")
+
+# Extra instructions when several transcripts share one request
+batch_prompt = """
+    "Several transcripts follow, each introduced by 'Transcript <n>:'. "
+    "Analyze every transcript on its own, exactly as described above. "
+    "Return a JSON array with one object per transcript, in the same order, "
+    "and add 'index': the transcript number, to every object."
+"""
+
+# Fields every analysis in a batched response must carry to be accepted
+ANALYSIS_FIELDS = (
+    "stutter_count",
+    "stuttered_words",
+    "fluency_score",
+    "stuttering_score",
+    "dynamic_feedback",
+)
+
 
 def transcribe_audio(file_name, language):
     """Transcribe audio from a file using Azure Cognitive Services Speech SDK.
@@ -58,7 +98,7 @@ def transcribe_audio(file_name, language):
     recognizer = speechsdk.SpeechRecognizer(
         speech_config=speech_config, audio_config=audio_config
     )
-    result = recognizer.recognize_once()
+    result = get_governor("azure_speech").call(_recognize_once, recognizer)
 
     if result.reason == speechsdk.ResultReason.RecognizedSpeech:
         return result.text
@@ -66,8 +106,39 @@ def transcribe_audio(file_name, language):
         return None
 
 
-def analyze_stuttering_gemini(transcript):
-    """Analyze a transcript for stuttering patterns using the Google Generative AI model.
+def _recognize_once(recognizer):
+    """Run a single Azure recognition, raising on throttling so it can be retried.
+
+    Args:
+        recognizer (speechsdk.SpeechRecognizer): The configured recognizer.
+
+    Returns:
+        speechsdk.SpeechRecognitionResult: The recognition result.
+
+    Raises:
+        RetryableProviderError: If Azure cancelled the request because of throttling or an outage.
+
+    """
+    result = recognizer.recognize_once()
+    if result.reason == speechsdk.ResultReason.Canceled:
+        details = result.cancellation_details
+        if details.error_code in RETRYABLE_AZURE_ERRORS:
+            raise RetryableProviderError(
+                f"Azure Speech cancelled the request: {details.error_details}"
+            )
+    return result
+
+
+def _strip_code_fence(text):
+    """Removes a Markdown code fence around a model response."""
+    cleaned_text = text.strip()
+    if cleaned_text.startswith("```"):
+        cleaned_text = "\n".join(cleaned_text.splitlines()[1:-1]).strip()
+    return cleaned_text
+
+
+def analyze_stuttering_single(transcript):
+    """Analyze one transcript for stuttering patterns with its own model call.
 
     Args:
         transcript (str): The transcript text to be analyzed.
@@ -79,12 +150,10 @@ def analyze_stuttering_gemini(transcript):
     try:
         prompt = system_prompt + "\n\nTranscript:\n" + transcript
 
-        response = model.generate_content(prompt)
+        response = get_governor("gemini").call(model.generate_content, prompt)
 
         if response and response.text:
-            cleaned_text = response.text.strip()
-            if cleaned_text.startswith("```"):
-                cleaned_text = "\n".join(cleaned_text.splitlines()[1:-1]).strip()
+            cleaned_text = _strip_code_fence(response.text)
             try:
                 return json.loads(cleaned_text)
             except json.JSONDecodeError:
@@ -100,6 +169,143 @@ def analyze_stuttering_gemini(transcript):
         return {"error": str(e)}
 
 
+def split_batch_response(text, count):
+    """Split a batched model response into one analysis per transcript.
+
+    Args:
+        text (str): The response text, expected to be a JSON array of analyses with an 'index' field.
+        count (int): The number of transcripts in the batch.
+
+    Returns:
+        list: One analysis per transcript in prompt order; None where the response had no valid analysis.
+
+    """
+    analyses = [None] * count
+    try:
+        items = json.loads(_strip_code_fence(text))
+    except (json.JSONDecodeError, TypeError):
+        return analyses
+    if not isinstance(items, list):
+        return analyses
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("index", position + 1)
+        if not isinstance(index, int) or not 1 <= index <= count:
+            continue
+        if analyses[index - 1] is None and all(f in item for f in ANALYSIS_FIELDS):
+            analyses[index - 1] = item
+    return analyses
+
+
+def analyze_stuttering_batch(transcripts):
+    """Analyze several transcripts with one model call, falling back to single calls.
+
+    Transcripts whose analysis is missing or invalid in the batched response, or all
+    of them if the batched call fails, are analyzed with their own call.
+
+    Args:
+        transcripts (list): The transcript texts to be analyzed.
+
+    Returns:
+        list: One analysis dictionary per transcript, in the same order.
+
+    """
+    if not transcripts:
+        return []
+    if len(transcripts) == 1:
+        return [analyze_stuttering_single(transcripts[0])]
+
+    analyses = [None] * len(transcripts)
+    try:
+        prompt = system_prompt + batch_prompt
+        for number, transcript in enumerate(transcripts, start=1):
+            prompt += f"\n\nTranscript {number}:\n{transcript}"
+        response = get_governor("gemini").call(model.generate_content, prompt)
+        if response and response.text:
+            analyses = split_batch_response(response.text, len(transcripts))
+    except Exception as e:
+        logging.warning("Batched Gemini call failed, analyzing one by one: %s", e)
+
+    missing = [i for i, analysis in enumerate(analyses) if analysis is None]
+    if missing:
+        with _fallback_lock:
+            batch_fallbacks["calls"] += len(missing)
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            retried = pool.map(
+                analyze_stuttering_single, [transcripts[i] for i in missing]
+            )
+            for i, analysis in zip(missing, retried, strict=True):
+                analyses[i] = analysis
+    return analyses
+
+
+# Collects transcripts that arrive within a few milliseconds into one Gemini call
+gemini_batcher = MicroBatcher(
+    analyze_stuttering_batch,
+    max_batch_size=int(os.getenv("GEMINI_BATCH_MAX_SIZE", "8")),
+    max_wait=float(os.getenv("GEMINI_BATCH_WAIT_MS", "20")) / 1000,
+)
+batch_fallbacks = {"calls": 0}
+_fallback_lock = threading.Lock()
+
+
+def gemini_batch_metrics():
+    """Returns the batching counters of the Gemini stutter analysis."""
+    return {**gemini_batcher.snapshot(), "fallback_calls": batch_fallbacks["calls"]}
+
+
+def analyze_stuttering_gemini(transcript):
+    """Analyze a transcript for stuttering patterns using the Google Generative AI model.
+
+    Concurrent calls are micro-batched into a single model request
+    (GEMINI_BATCH_MAX_SIZE, GEMINI_BATCH_WAIT_MS; a size of 1 turns batching off).
+
+    Args:
+        transcript (str): The transcript text to be analyzed.
+
+    Returns:
+        dict: A dictionary containing the analysis results or an error message.
+
+    """
+    return gemini_batcher.submit(transcript)
+
+
+def stutter_analysis_mode():
+    """Returns the configured STUTTER_ANALYSIS_MODE, "auto" by default."""
+    mode = os.getenv("STUTTER_ANALYSIS_MODE", "auto").lower()
+    return mode if mode in STUTTER_ANALYSIS_MODES else "auto"
+
+
+def analyze_stuttering(transcript, lan_flag="en"):
+    """Analyze a transcript locally, with Gemini, or locally first (STUTTER_ANALYSIS_MODE).
+
+    The local detector only knows English fillers and word lists, so Sinhala and
+    Tamil transcripts always go to Gemini.
+
+    Args:
+        transcript (str): The transcript text to be analyzed.
+        lan_flag (str): The language flag of the test ("en", "si", "ta").
+
+    Returns:
+        dict: A dictionary containing the analysis results or an error message.
+
+    """
+    mode = stutter_analysis_mode()
+    if mode != "gemini" and lan_flag in LOCAL_LANGUAGES:
+        local_result = analyze_disfluency_local(transcript, lan_flag)
+        if mode == "local" or local_result["stutter_count"] == 0:
+            return local_result
+    analysis_result = analyze_stuttering_gemini(transcript)
+    analysis_result["analysis_source"] = "gemini"
+    return analysis_result
+
+
+def _acoustic_events(file_name):
+    with stage("acoustic_events"):
+        return analyze_acoustic_events(file_name)
+
+
 def stutter_test(file_name, lan_flag):
     """Perform a stuttering analysis on an audio file.
 
@@ -115,12 +321,24 @@ def stutter_test(file_name, lan_flag):
         language_mapping = {"en": "en-US", "si": "si-LK", "ta": "ta-LK"}
         language_code = language_mapping.get(lan_flag, "en-US")
 
-        transcript = transcribe_audio(file_name, language_code)
-        if not transcript:
-            return {"error": "Error transcribing audio."}
+        # The acoustic detector runs locally while the transcript is fetched
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            acoustic = None
+            if acoustic_detection_enabled():
+                acoustic = pool.submit(
+                    contextvars.copy_context().run, _acoustic_events, file_name
+                )
+
+            with stage("transcription"):
+                transcript = transcribe_audio(file_name, language_code)
+            if not transcript:
+                return {"error": "Error transcribing audio."}
 
-        analysis_result = analyze_stuttering_gemini(transcript)
-        analysis_result["transcript"] = transcript
+            with stage("stutter_analysis"):
+                analysis_result = analyze_stuttering(transcript, lan_flag)
+            analysis_result["transcript"] = transcript
+            if acoustic is not None:
+                analysis_result["acoustic_events"] = acoustic.result()
         return analysis_result
     except Exception as e:
         return {"error": str(e)}
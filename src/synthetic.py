@@ -0,0 +1,63 @@
+import numpy as np
+import soundfile as sf
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_speech(seconds, seed=0, sr=SAMPLE_RATE, pause_ratio=0.3):
+    """Generates a deterministic speech-like recording.
+
+    The signal alternates voiced "syllables" (a harmonic series with a drifting
+    pitch and an amplitude envelope) with low-level noise pauses, so pitch,
+    jitter, shimmer, formant and energy analyzers all have realistic work to do.
+
+    Parameters
+    ----------
+    seconds (float): The length of the recording in seconds.
+    seed (int): The random seed; the same seed always gives the same samples.
+    sr (int): The sampling rate in Hertz.
+    pause_ratio (float): The approximate fraction of the recording that is silence.
+
+    Returns
+    -------
+    np.ndarray: The samples as float64 values in [-1, 1].
+
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sr)
+    y = np.empty(0)
+    base_pitch = rng.uniform(100, 220)
+    while len(y) < total:
+        voiced = int(rng.uniform(0.15, 0.6) * sr)
+        t = np.arange(voiced) / sr
+        f0 = base_pitch * (1 + 0.08 * np.sin(2 * np.pi * rng.uniform(0.5, 3) * t))
+        f0 *= 1 + 0.005 * rng.standard_normal(voiced)
+        phase = 2 * np.pi * np.cumsum(f0) / sr
+        harmonics = sum(np.sin(k * phase) / k for k in range(1, 10))
+        envelope = np.sin(np.pi * np.linspace(0, 1, voiced)) ** 0.5
+        syllable = 0.25 * envelope * harmonics + 0.002 * rng.standard_normal(voiced)
+        pause_mean = 0.4 * pause_ratio / max(1e-3, 1 - pause_ratio)
+        pause = int(rng.exponential(pause_mean) * sr)
+        y = np.concatenate([y, syllable, 0.001 * rng.standard_normal(pause)])
+    return np.clip(y[:total], -1, 1)
+
+
+def write_synthetic_wav(path, seconds, seed=0, sr=SAMPLE_RATE, pause_ratio=0.3):
+    """Writes a synthetic speech-like recording as 16-bit PCM WAV.
+
+    Parameters
+    ----------
+    path (str): The output path.
+    seconds (float): The length of the recording in seconds.
+    seed (int): The random seed.
+    sr (int): The sampling rate in Hertz.
+    pause_ratio (float): The approximate fraction of the recording that is silence.
+
+    Returns
+    -------
+    str: The output path.
+
+    """
+    y = synthetic_speech(seconds, seed=seed, sr=sr, pause_ratio=pause_ratio)
+    sf.write(path, y, sr, subtype="PCM_16")
+    return path
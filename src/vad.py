@@ -0,0 +1,98 @@
+import os
+
+import librosa
+import numpy as np
+
+from src.shared_audio import as_array
+
+# Frame settings shared by the intensity analysis and the VAD (librosa defaults)
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+
+
+def frame_rms(y, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH):
+    """Computes the root mean square energy of each analysis frame.
+
+    Parameters
+    ----------
+    y (np.ndarray): The audio samples.
+    frame_length (int): The frame length in samples.
+    hop_length (int): The hop between frames in samples.
+
+    Returns
+    -------
+    np.ndarray: The RMS energy of each frame.
+
+    """
+    return librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
+
+
+def vad_enabled():
+    """Returns whether analyzers should skip silence (VAD_ENABLED, on by default)."""
+    return os.getenv("VAD_ENABLED", "1") != "0"
+
+
+def speech_intervals(
+    audio_path,
+    threshold_db=-40.0,
+    floor=1e-4,
+    min_speech=0.1,
+    min_gap=0.3,
+    padding=0.1,
+):
+    """Finds the spans of a recording that contain speech from frame energy.
+
+    A frame counts as speech when its RMS energy is within ``threshold_db`` of the
+    loud (95th percentile) frames and above an absolute ``floor``. Spans are padded,
+    gaps shorter than ``min_gap`` are bridged and bursts shorter than
+    ``min_speech`` are dropped.
+
+    Parameters
+    ----------
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
+    threshold_db (float): The level relative to the loud frames below which a frame is silent.
+    floor (float): The RMS below which a frame is always silent.
+    min_speech (float): The shortest span in seconds kept as speech.
+    min_gap (float): The shortest silence in seconds that separates two spans.
+    padding (float): Seconds added on both sides of every span.
+
+    Returns
+    -------
+    list: Sorted, non-overlapping ``(start, end)`` pairs in seconds.
+
+    """
+    y, sr = as_array(audio_path)
+    if len(y) == 0:
+        return []
+    duration = len(y) / sr
+    rms = frame_rms(y)
+    reference = np.percentile(rms, 95)
+    if reference <= floor:
+        return []
+    level_db = 20 * np.log10(np.maximum(rms, 1e-10) / reference)
+    active = (level_db > threshold_db) & (rms > floor)
+
+    # Frame indices where runs of active frames start and end
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+    starts = edges[0::2] * HOP_LENGTH / sr - padding
+    ends = edges[1::2] * HOP_LENGTH / sr + padding
+
+    intervals = []
+    for start, end in zip(
+        np.maximum(starts, 0.0), np.minimum(ends, duration), strict=True
+    ):
+        if intervals and start - intervals[-1][1] < min_gap:
+            intervals[-1] = (intervals[-1][0], float(end))
+        else:
+            intervals.append((float(start), float(end)))
+    return [(s, e) for s, e in intervals if e - s >= min_speech]
+
+
+def has_speech(intervals, start, end):
+    """Checks whether any speech interval overlaps the span from start to end."""
+    return any(s < end and e > start for s, e in intervals)
+
+
+def speaking_time(intervals):
+    """Returns the total duration in seconds covered by the speech intervals."""
+    return float(sum(e - s for s, e in intervals))
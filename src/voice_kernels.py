@@ -0,0 +1,504 @@
+import os
+
+import numpy as np
+import parselmouth
+
+from src.shared_audio import as_sound
+from src.vad import has_speech
+
+# Praat settings of the voice quality analysis
+PITCH_FLOOR = 75.0
+PITCH_CEILING = 500.0
+PERIOD_FLOOR = 0.0001
+PERIOD_CEILING = 0.02
+MAX_PERIOD_FACTOR = 1.3
+MAX_AMPLITUDE_FACTOR = 1.6
+HNR_TIME_STEP = 0.01
+HNR_SILENCE_THRESHOLD = 0.1
+# Sinc interpolation of the correlation peaks between whole-sample lags, as Praat's
+# accurate cross-correlation (it keeps the 15 strongest peaks of every frame). Praat
+# interpolates 700 samples deep; 70 keeps segment means within 0.01 dB at a tenth of the cost
+HNR_SINC_DEPTH = 70
+HNR_PEAK_STEPS = 4
+HNR_MAX_CANDIDATES = 15
+HNR_CANDIDATE_MARGIN = 0.05
+HNR_BLOCK_FRAMES = 512
+HNR_BLOCK_PEAKS = 64
+
+ENGINES = ("praat", "numpy")
+
+
+def voice_quality_engine():
+    """Returns the engine that computes jitter, shimmer and HNR (VOICE_QUALITY_ENGINE)."""
+    engine = os.getenv("VOICE_QUALITY_ENGINE", "praat").lower()
+    return engine if engine in ENGINES else "praat"
+
+
+def glottal_pulses(sound):
+    """Finds the glottal pulses of a sound with Praat's periodic cc point process.
+
+    Parameters
+    ----------
+    sound (parselmouth.Sound): The sound, e.g. one segment of a recording.
+
+    Returns
+    -------
+    np.ndarray: The pulse times in seconds.
+
+    """
+    point_process = parselmouth.praat.call(
+        sound,
+        "To PointProcess (periodic, cc)",
+        PITCH_FLOOR,
+        PITCH_CEILING,
+    )
+    if parselmouth.praat.call(point_process, "Get number of points") == 0:
+        return np.empty(0)
+    return parselmouth.praat.call(point_process, "To Matrix").values[0].copy()
+
+
+def _valid_neighbours(periods):
+    """Flags the inner pulses whose periods on both sides are usable."""
+    p1, p2 = periods[:-1], periods[1:]
+    factor = np.maximum(p1, p2) / np.minimum(p1, p2)
+    return (
+        (p1 >= PERIOD_FLOOR)
+        & (p1 <= PERIOD_CEILING)
+        & (p2 >= PERIOD_FLOOR)
+        & (p2 <= PERIOD_CEILING)
+        & (factor <= MAX_PERIOD_FACTOR)
+    )
+
+
+def _mean_period(periods):
+    """Mean of the periods in range that differ by at most MAX_PERIOD_FACTOR from a neighbour."""
+    in_range = (periods > 0) & (periods >= PERIOD_FLOOR) & (periods <= PERIOD_CEILING)
+    # Factor to the previous and next period; inf where there is no neighbour
+    ratio = periods[1:] / periods[:-1]
+    ratio = np.maximum(ratio, 1 / ratio)
+    previous = np.concatenate(([np.inf], ratio))
+    following = np.concatenate((ratio, [np.inf]))
+    lone = np.isinf(previous) & np.isinf(following)
+    deviant = (previous > MAX_PERIOD_FACTOR) & (following > MAX_PERIOD_FACTOR)
+    valid = in_range & (lone | ~deviant)
+    return periods[valid].mean() if valid.any() else np.nan
+
+
+def jitter_local(pulses):
+    """Mean absolute difference of consecutive periods divided by the mean period.
+
+    Matches Praat's "Get jitter (local)" with the settings of the voice quality
+    analysis.
+
+    Parameters
+    ----------
+    pulses (np.ndarray): Sorted pulse times in seconds.
+
+    Returns
+    -------
+    float: The local jitter, or NaN with fewer than two usable period pairs.
+
+    """
+    periods = np.diff(pulses)
+    if periods.size < 2:
+        return np.nan
+    valid = _valid_neighbours(periods)
+    if not valid.any():
+        return np.nan
+    differences = np.abs(np.diff(periods))[valid]
+    return float(differences.mean() / _mean_period(periods))
+
+
+def pulse_amplitudes(samples, sr, pulses, x1=None):
+    """Hann-windowed RMS around each inner pulse whose neighbouring periods are usable.
+
+    The window reaches 20% of the period to either side, as in Praat.
+
+    Parameters
+    ----------
+    samples (np.ndarray): The audio samples.
+    sr (int): The sample rate.
+    pulses (np.ndarray): Sorted pulse times in seconds.
+    x1 (float): The time of the first sample; defaults to half a sample.
+
+    Returns
+    -------
+    tuple: The times and amplitudes of the measured pulses.
+
+    """
+    x1 = 0.5 / sr if x1 is None else x1
+    periods = np.diff(pulses)
+    if periods.size < 2:
+        return np.empty(0), np.empty(0)
+    valid = _valid_neighbours(periods)
+    centre = pulses[1:-1][valid]
+    left = 0.2 * periods[:-1][valid]
+    right = 0.2 * periods[1:][valid]
+
+    first = np.maximum(np.ceil((centre - left - x1) * sr), 0).astype(np.int64)
+    last = np.minimum(np.floor((centre + right - x1) * sr), len(samples) - 1)
+    last = last.astype(np.int64)
+    width = int(np.ceil(0.4 * PERIOD_CEILING * sr)) + 2
+    index = first[:, None] + np.arange(width)
+    inside = index <= last[:, None]
+    index = np.minimum(index, len(samples) - 1)
+
+    times = x1 + index / sr
+    offset = times - centre[:, None]
+    phase = offset / np.where(offset < 0, left[:, None], right[:, None])
+    window = np.where(inside, 0.5 + 0.5 * np.cos(np.pi * phase), 0.0)
+    windowed = samples[index] * window
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rms = np.sqrt(np.sum(windowed**2, axis=1) / np.sum(window**2, axis=1))
+    # Praat skips pulses with fewer than three samples in the window
+    measured = (inside.sum(axis=1) >= 3) & (rms > 0)
+    return centre[measured], rms[measured]
+
+
+def shimmer_local(samples, sr, pulses, x1=None):
+    """Mean absolute difference of consecutive pulse amplitudes divided by the mean amplitude.
+
+    Matches Praat's "Get shimmer (local)" with the settings of the voice quality
+    analysis.
+
+    Parameters
+    ----------
+    samples (np.ndarray): The audio samples.
+    sr (int): The sample rate.
+    pulses (np.ndarray): Sorted pulse times in seconds.
+    x1 (float): The time of the first sample; defaults to half a sample.
+
+    Returns
+    -------
+    float: The local shimmer, or NaN without a usable pair of pulses.
+
+    """
+    times, amplitudes = pulse_amplitudes(samples, sr, pulses, x1)
+    if amplitudes.size < 2:
+        return np.nan
+    periods = np.diff(times)
+    a1, a2 = amplitudes[:-1], amplitudes[1:]
+    factor = np.maximum(a1, a2) / np.minimum(a1, a2)
+    valid = (
+        (periods >= PERIOD_FLOOR)
+        & (periods <= PERIOD_CEILING)
+        & (factor <= MAX_AMPLITUDE_FACTOR)
+    )
+    if not valid.any():
+        return np.nan
+    return float(np.abs(a1 - a2)[valid].mean() / amplitudes.mean())
+
+
+def _sinc_interpolate(values, rows, x, depth):
+    """Praat's windowed sinc interpolation of rows of ``values`` at fractional positions.
+
+    Near the ends of a row the depth shrinks to the samples available, down to
+    cubic, linear and nearest-sample interpolation, as in Praat.
+
+    Parameters
+    ----------
+    values (np.ndarray): The sampled functions, one per row.
+    rows (np.ndarray): The row of each interpolated point.
+    x (np.ndarray): The positions, in samples from the start of the row.
+    depth (int): The most samples used on each side.
+
+    Returns
+    -------
+    np.ndarray: The interpolated values.
+
+    """
+    n = values.shape[1]
+    depth = min(depth, n)
+    rows = np.broadcast_to(rows, x.shape)
+    x = np.clip(x, 0, n - 1)
+    midleft = np.minimum(np.floor(x).astype(np.int64), n - 2)
+    midright = midleft + 1
+    fraction = x - midleft
+    d = np.minimum(np.minimum(depth, midleft + 1), n - 1 - midleft)
+
+    def at(index):
+        # Rows broadcast over the sinc offsets as well as the positions
+        rows_of = rows if index.ndim == x.ndim else rows[..., None]
+        return values[rows_of, np.clip(index, 0, n - 1)]
+
+    yl, yr = at(midleft), at(midright)
+    # Cubic interpolation where only two samples are left on one side
+    dyl = 0.5 * (yr - at(midleft - 1))
+    dyr = 0.5 * (at(midright + 1) - yl)
+    cubic = (
+        yl * (1 - fraction)
+        + yr * fraction
+        - fraction
+        * (1 - fraction)
+        * (0.5 * (dyr - dyl) + (fraction - 0.5) * (dyl + dyr - 2 * (yr - yl)))
+    )
+
+    offsets = np.arange(1 - depth, depth + 1)
+    index = midleft[..., None] + offsets
+    left = (midright - d)[..., None]
+    right = (midleft + d)[..., None]
+    distance = x[..., None] - index
+    span = np.where(distance >= 0, x[..., None] - left + 1, right - x[..., None] + 1)
+    # sin(pi * distance) only alternates in sign over the whole-sample offsets
+    sine = np.sin(np.pi * fraction)[..., None] * np.where(offsets % 2, -1.0, 1.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weights = (
+            sine / (np.pi * distance) * (0.5 + 0.5 * np.cos(np.pi * distance / span))
+        )
+    weights = np.where((index >= left) & (index <= right), weights, 0.0)
+    sinc = np.sum(at(index) * weights, axis=-1)
+
+    result = np.where(d >= 3, sinc, cubic)
+    result = np.where(d == 1, yl + fraction * (yr - yl), result)
+    result = np.where(d <= 0, np.where(fraction < 0.5, yl, yr), result)
+    return np.where(fraction == 0, yl, result)
+
+
+def _improve_maxima(values, rows, centre, depth=HNR_SINC_DEPTH):
+    """Height of the interpolated maximum within one sample of each peak.
+
+    Stands in for the Brent search of Praat's NUMimproveMaximum: a grid over
+    the two samples around the peak, a finer grid around its best point and
+    the vertex of a parabola through the three best points of that.
+
+    Parameters
+    ----------
+    values (np.ndarray): The sampled functions, one per row.
+    rows (np.ndarray): The row of each peak.
+    centre (np.ndarray): The position of each peak, in samples from the start of its row.
+    depth (int): The most samples used on each side by the sinc interpolation.
+
+    Returns
+    -------
+    np.ndarray: The interpolated height of every peak.
+
+    """
+    every = np.arange(len(centre))
+    low, high = (centre - 1)[:, None], (centre + 1)[:, None]
+    step = 1.0
+    best = centre
+    for _ in range(2):
+        x = best[:, None] + np.linspace(-step, step, 2 * HNR_PEAK_STEPS + 1)
+        x = np.clip(x, low, high)
+        y = _sinc_interpolate(values, rows[:, None], x, depth)
+        i = np.clip(y.argmax(axis=1), 1, x.shape[1] - 2)
+        best = x[every, i]
+        step /= HNR_PEAK_STEPS
+    before, at, after = y[every, i - 1], y[every, i], y[every, i + 1]
+    curvature = before - 2 * at + after
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = np.where(curvature < 0, 0.5 * (before - after) / curvature, 0.0)
+    vertex = np.clip(best + np.clip(shift, -1, 1) * step, low[:, 0], high[:, 0])
+    return np.maximum(_sinc_interpolate(values, rows, vertex, depth), at)
+
+
+def _frame_strengths(y, centres, mean, period, window):
+    """Strongest correlation peak of the frames around ``centres``.
+
+    The correlated window starts one longest period before the frame centre
+    and is compared with the signal up to one window later, after removing the
+    local mean. Every local maximum of the correlation is a candidate; the
+    strongest ones are refined by sinc interpolation, values above 1 are
+    reflected around 1, and the strongest candidate wins.
+
+    Parameters
+    ----------
+    y (np.ndarray): The samples.
+    centres (np.ndarray): The sample index just before each frame centre.
+    mean (np.ndarray): The local mean of each frame.
+    period (int): The longest period in samples.
+    window (int): The window length in samples, also the longest lag.
+
+    Returns
+    -------
+    np.ndarray: The strength of every frame, -inf where it has no candidate.
+
+    """
+    frames = len(centres)
+    span = 2 * window
+    start = np.maximum(centres - period, 0)
+    available = np.minimum(span, y.size - start)
+    max_lag = available - window
+    index = start[:, None] + np.arange(span)
+    inside = np.arange(span) < available[:, None]
+    chunk = np.where(inside, y[np.minimum(index, y.size - 1)] - mean[:, None], 0.0)
+    head = chunk[:, :window]
+
+    size = 1 << int(np.ceil(np.log2(2 * span)))
+    spectrum = np.conj(np.fft.rfft(head, size)) * np.fft.rfft(chunk, size)
+    cross = np.fft.irfft(spectrum, size)[:, : window + 1]
+    squares = np.cumsum(chunk**2, axis=1)
+    squares = np.concatenate((np.zeros((frames, 1)), squares), axis=1)
+    lags = np.arange(window + 1)
+    # Energy of the lagged window chunk[lag : lag + window] for every lag
+    lagged = squares[:, lags + window] - squares[:, lags]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.nan_to_num(cross / np.sqrt(lagged[:, :1] * lagged))
+    r[:, 0] = 1.0
+    r = np.where(lags <= max_lag[:, None], r, 0.0)
+
+    # Candidates are the positive local maxima from a lag of two samples on
+    before, at, after = r[:, :-2], r[:, 1:-1], r[:, 2:]
+    inner = lags[1:-1]
+    peaks = (
+        (inner >= 2)
+        & (inner < max_lag[:, None])
+        & (at > 0)
+        & (at > before)
+        & (at >= after)
+    )
+    slope = 0.5 * (after - before)
+    curvature = 2 * at - before - after
+    with np.errstate(invalid="ignore", divide="ignore"):
+        parabolic = at + 0.5 * slope * slope / curvature
+    parabolic = np.where(parabolic > 1, 1 / parabolic, parabolic)
+    parabolic = np.where(peaks, parabolic, -np.inf)
+    count = min(HNR_MAX_CANDIDATES, parabolic.shape[1])
+    strongest = np.argsort(-parabolic, axis=1)[:, :count]
+    kept = np.take_along_axis(parabolic, strongest, axis=1)
+    # Refinement moves a peak by a few hundredths at most, even in noisy frames,
+    # so weaker ones cannot win
+    kept = (kept > -np.inf) & (
+        kept >= parabolic.max(axis=1, keepdims=True) - HNR_CANDIDATE_MARGIN
+    )
+    rows, column = np.nonzero(kept)
+
+    # The correlation is symmetric; interpolate on lags -window..window
+    symmetric = np.concatenate((r[:, :0:-1], r), axis=1)
+    strength = np.full(kept.shape, -np.inf)
+    for i in range(0, len(rows), HNR_BLOCK_PEAKS):
+        part = slice(i, i + HNR_BLOCK_PEAKS)
+        lag = strongest[rows[part], column[part]] + 1
+        refined = _improve_maxima(symmetric, rows[part], (lag + window).astype(float))
+        strength[rows[part], column[part]] = np.where(refined > 1, 1 / refined, refined)
+    return strength.max(axis=1)
+
+
+def harmonicity_frames(
+    samples, sr, x1=None, time_step=HNR_TIME_STEP, min_pitch=PITCH_FLOOR
+):
+    """Cross-correlation harmonicity of every analysis frame, as Praat's "To Harmonicity (cc)".
+
+    Frames are laid out as in Praat, centred on the signal; each one's
+    strongest correlation peak ``r`` gives the harmonics-to-noise ratio
+    ``10 * log10(r / (1 - r))``. A frame is unvoiced when its peak amplitude
+    relative to the whole signal makes Praat's silence candidate stronger.
+
+    Parameters
+    ----------
+    samples (np.ndarray): The audio samples.
+    sr (int): The sample rate.
+    x1 (float): The time of the first sample; defaults to half a sample.
+    time_step (float): The hop between frames in seconds.
+    min_pitch (float): The lowest pitch in Hertz, setting window and lag range.
+
+    Returns
+    -------
+    tuple: The frame centre times and their HNR in dB (NaN for unvoiced frames).
+
+    """
+    x1 = 0.5 / sr if x1 is None else x1
+    y = np.asarray(samples, dtype=np.float64)
+    n = y.size
+    period = int(np.floor(sr / min_pitch))
+    window = 2 * (period // 2 - 1)
+    frames = int(np.floor((n / sr - 2 / min_pitch) / time_step)) + 1
+    if frames < 1 or window < 4:
+        return np.empty(0), np.empty(0)
+    times = x1 + 0.5 * ((n - 1) / sr - (frames - 1) * time_step)
+    times = times + time_step * np.arange(frames)
+    centres = np.floor((times - x1) * sr).astype(np.int64)
+
+    # Local mean over one longest period on either side of the centre
+    sums = np.concatenate(([0.0], np.cumsum(y)))
+    first = np.maximum(centres + 1 - period, 0)
+    last = np.minimum(centres + period, n - 1)
+    mean = (sums[last + 1] - sums[first]) / (2 * period)
+
+    # Praat's unvoiced candidate for a voicing threshold of zero, from the
+    # peak of the window centred on the frame
+    index = np.clip((centres + 1 - window // 2)[:, None] + np.arange(window), 0, n - 1)
+    local_peak = np.max(np.abs(y[index] - mean[:, None]), axis=1)
+    global_peak = np.max(np.abs(y - y.mean()))
+    relative = (
+        np.minimum(local_peak / global_peak, 1.0)
+        if global_peak > 0
+        else np.zeros(frames)
+    )
+    unvoiced = np.maximum(0.0, 2 - relative / HNR_SILENCE_THRESHOLD)
+
+    # Frames are processed in blocks to bound the memory of long recordings
+    strength = np.concatenate(
+        [
+            _frame_strengths(
+                y,
+                centres[i : i + HNR_BLOCK_FRAMES],
+                mean[i : i + HNR_BLOCK_FRAMES],
+                period,
+                window,
+            )
+            for i in range(0, frames, HNR_BLOCK_FRAMES)
+        ]
+    )
+    voiced = (local_peak > 0) & (strength > unvoiced)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hnr = 10 * np.log10(strength / (1 - strength))
+    hnr = np.where(strength <= 1e-15, -150.0, hnr)
+    hnr = np.where(strength > 1 - 1e-15, 150.0, hnr)
+    return times, np.where(voiced, hnr, np.nan)
+
+
+def voice_quality(audio_path, segment_duration=2.0, speech=None):
+    """Computes per-segment jitter, shimmer and HNR with NumPy instead of Praat's measurements.
+
+    Every segment is cut and its glottal pulses are found exactly as in the
+    Praat analyzers; jitter, shimmer and HNR are then computed from the
+    segment's samples and pulses.
+
+    Parameters
+    ----------
+    audio_path (str or AudioSamples): The path to the audio file, or its decoded samples.
+    segment_duration (float): The duration of each segment for analysis.
+    speech (list): Speech intervals from the VAD; segments without speech are skipped and scored 0.0.
+
+    Returns
+    -------
+    dict: The jitter, shimmer and HNR results in the shape of the Praat analyzers.
+
+    """
+    snd = as_sound(audio_path)
+    duration = snd.get_total_duration()
+
+    jitter_data, shimmer_data, hnr_data = {}, {}, {}
+    for t in np.arange(0, duration, segment_duration).tolist():
+        key = round(t, 2)
+        if speech is not None and not has_speech(speech, t, t + segment_duration):
+            jitter_data[key] = shimmer_data[key] = hnr_data[key] = 0.0
+            continue
+        segment = snd.extract_part(
+            from_time=t, to_time=min(t + segment_duration, duration)
+        )
+        samples, sr = segment.values[0], segment.sampling_frequency
+        pulses = glottal_pulses(segment)
+        jitter = jitter_local(pulses)
+        shimmer = shimmer_local(samples, sr, pulses, segment.x1)
+        _, hnr = harmonicity_frames(samples, sr, segment.x1)
+        hnr = hnr[~np.isnan(hnr)]
+        jitter_data[key] = round(jitter, 6) if not np.isnan(jitter) else 0.0
+        shimmer_data[key] = round(shimmer, 4) if not np.isnan(shimmer) else 0.0
+        hnr_data[key] = max(round(hnr.mean(), 2), 0.0) if hnr.size else 0.0
+
+    return {
+        "jitter": {
+            "jitter_data": jitter_data,
+            "overall_jitter": float(np.nanmean(list(jitter_data.values()))),
+        },
+        "shimmer": {
+            "shimmer_data": shimmer_data,
+            "overall_shimmer": float(np.nanmean(list(shimmer_data.values()))),
+        },
+        "hnr": {
+            "hnr_data": hnr_data,
+            "overall_hnr": float(np.mean(list(hnr_data.values()))),
+        },
+    }
@@ -0,0 +1,82 @@
+import logging
+import os
+import resource
+import signal
+
+import librosa
+import numpy as np
+import parselmouth
+
+# RSS limit in megabytes above which this worker asks to be replaced, or None
+_max_rss_mb = None
+_recycle_requested = False
+
+
+def preload_engines():
+    """Imports and warms up the heavy audio libraries before workers are forked.
+
+    Running a tiny analysis resolves librosa's lazily loaded submodules and
+    initialises Praat once in the master process, so forked workers share those
+    pages copy-on-write instead of each paying the start-up cost.
+    """
+    sr = 16000
+    t = np.arange(sr // 2) / sr
+    y = (0.1 * np.sin(2 * np.pi * 150 * t)).astype(np.float32)
+    librosa.feature.rms(y=y)
+    librosa.get_duration(y=y, sr=sr)
+    snd = parselmouth.Sound(y.astype(np.float64), sampling_frequency=sr)
+    snd.to_pitch()
+    snd.to_formant_burg()
+    parselmouth.praat.call(snd, "To PointProcess (periodic, cc)", 75, 500)
+
+
+def current_rss_mb():
+    """Returns the resident set size of this process in megabytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak RSS in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def enable_rss_recycling(max_rss_mb):
+    """Enables RSS-based recycling for this worker process.
+
+    Parameters
+    ----------
+    max_rss_mb (float): The RSS limit in megabytes, or None to disable recycling.
+
+    """
+    global _max_rss_mb, _recycle_requested
+    _max_rss_mb = max_rss_mb
+    _recycle_requested = False
+
+
+def check_worker_rss():
+    """Asks for a graceful restart of this worker once its RSS exceeds the limit.
+
+    The worker sends itself SIGTERM, which lets in-flight requests finish before
+    it exits; the process manager then starts a fresh worker in its place.
+
+    Returns
+    -------
+    bool: True if a restart was requested by this call, False otherwise.
+
+    """
+    global _recycle_requested
+    if _max_rss_mb is None or _recycle_requested:
+        return False
+    rss_mb = current_rss_mb()
+    if rss_mb <= _max_rss_mb:
+        return False
+    logging.warning(
+        "Worker %d RSS %.0f MB exceeds %.0f MB; recycling.",
+        os.getpid(),
+        rss_mb,
+        _max_rss_mb,
+    )
+    _recycle_requested = True
+    os.kill(os.getpid(), signal.SIGTERM)
+    return True
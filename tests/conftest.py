@@ -0,0 +1,5 @@
+import os
+
+# Tests reuse file names with different outcomes; share results between
+# concurrent requests only, not across tests
+os.environ.setdefault("COALESCE_TTL_SECONDS", "0")
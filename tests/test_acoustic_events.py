@@ -0,0 +1,54 @@
+import numpy as np
+import soundfile as sf
+
+from src.acoustic_events import analyze_acoustic_events, detect_prolongations
+
+SR = 16000
+
+
+def voiced(seconds, f0_start, f0_end):
+    t = np.arange(int(seconds * SR)) / SR
+    f0 = np.linspace(f0_start, f0_end, t.size)
+    return 0.3 * np.sin(2 * np.pi * np.cumsum(f0) / SR)
+
+
+def test_finds_a_held_sound_a_block_and_a_pause(tmp_path):
+    rng = np.random.default_rng(0)
+    y = np.concatenate(
+        [
+            np.zeros(int(0.3 * SR)),
+            voiced(1.0, 110, 140),  # gliding pitch: fluent
+            np.zeros(int(0.5 * SR)),  # block: the same pitch resumes
+            voiced(1.2, 140, 140),  # held pitch: prolongation
+            voiced(1.0, 180, 110),
+            np.zeros(int(0.5 * SR)),  # pause: the pitch resets
+            voiced(0.8, 160, 120),
+            np.zeros(int(3.0 * SR)),  # pause longer than a block
+            voiced(0.8, 120, 160),
+            np.zeros(int(0.3 * SR)),
+        ]
+    )
+    path = tmp_path / "speech.wav"
+    sf.write(path, y + 0.0005 * rng.standard_normal(y.size), SR)
+
+    result = analyze_acoustic_events(str(path))
+
+    counts = ("prolongation_count", "block_count", "pause_count")
+    assert tuple(result[name] for name in counts) == (1, 1, 1)
+    block, prolongation, pause = result["events"]
+    assert block["type"] == "block"
+    assert abs(block["start"] - 1.3) < 0.1 and abs(block["duration"] - 0.5) < 0.15
+    assert prolongation["type"] == "prolongation"
+    assert abs(prolongation["start"] - 1.8) < 0.1
+    assert prolongation["duration"] >= 1.0
+    assert pause["type"] == "pause"
+    assert abs(pause["start"] - 4.0) < 0.1
+
+
+def test_unvoiced_gaps_split_held_runs():
+    times = np.concatenate((np.arange(0, 0.5, 0.01), np.arange(0.7, 1.2, 0.01)))
+    semitones = np.full(times.size, 5.0)
+
+    assert detect_prolongations(times, semitones) == []
+    events = detect_prolongations(np.arange(0, 0.8, 0.01), np.full(80, 5.0))
+    assert [e["type"] for e in events] == ["prolongation"]
@@ -0,0 +1,184 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+import pytest
+
+from main import app
+from src.admission import AdmissionController, AdmissionRejectedError, account_label
+
+client = TestClient(app)
+
+
+def test_requests_beyond_the_limit_wait_for_a_slot():
+    async def scenario():
+        controller = AdmissionController(
+            max_concurrency=1, max_queue=2, queue_timeout=1
+        )
+        order = []
+
+        async def job(name):
+            async with controller.slot():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(job("a"), job("b"), job("c"))
+        return order, controller.snapshot()
+
+    order, metrics = asyncio.run(scenario())
+    assert order == ["a", "b", "c"]
+    assert metrics["admitted"] == 3
+    assert metrics["max_queue_depth"] == 2
+    assert metrics["active"] == 0
+
+
+def test_full_queue_is_rejected_with_retry_hint():
+    async def scenario():
+        controller = AdmissionController(
+            max_concurrency=1, max_queue=0, queue_timeout=1
+        )
+        await controller.acquire()
+        with pytest.raises(AdmissionRejectedError) as excinfo:
+            await controller.acquire()
+        return excinfo.value, controller.snapshot()
+
+    rejection, metrics = asyncio.run(scenario())
+    assert rejection.retry_after >= 1
+    assert metrics["rejected_queue_full"] == 1
+
+
+def test_queue_wait_times_out():
+    async def scenario():
+        controller = AdmissionController(
+            max_concurrency=1, max_queue=1, queue_timeout=0.01
+        )
+        await controller.acquire()
+        with pytest.raises(AdmissionRejectedError):
+            await controller.acquire()
+        return controller.snapshot()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["rejected_timeout"] == 1
+    assert metrics["queue_depth"] == 0
+
+
+def test_short_jobs_overtake_long_ones_until_a_waiter_is_overdue():
+    async def scenario(max_bypass):
+        controller = AdmissionController(
+            max_concurrency=1, max_queue=3, queue_timeout=1, max_bypass=max_bypass
+        )
+        order = []
+
+        async def job(name, cost):
+            async with controller.slot(cost):
+                order.append(name)
+                await asyncio.sleep(0.02)
+
+        await asyncio.gather(job("first", 1), job("long", 60), job("short", 2))
+        return order, controller.snapshot()
+
+    order, metrics = asyncio.run(scenario(max_bypass=1))
+    assert order == ["first", "short", "long"]
+    assert metrics["reordered"] == 1
+
+    # Once the long job has waited max_bypass seconds it goes first
+    order, _ = asyncio.run(scenario(max_bypass=0))
+    assert order == ["first", "long", "short"]
+
+
+def test_accounts_take_turns_and_respect_their_limit():
+    async def scenario():
+        controller = AdmissionController(
+            max_concurrency=2, max_queue=10, queue_timeout=1, max_per_account=1
+        )
+        order = []
+
+        async def job(account, name):
+            async with controller.slot(1, account):
+                order.append(name)
+                await asyncio.sleep(0.02)
+
+        bulk = [job("school", f"school-{i}") for i in range(4)]
+        await asyncio.sleep(0)
+        jobs = asyncio.gather(*bulk, job("solo", "solo-0"), job("solo", "solo-1"))
+        await asyncio.sleep(0.01)
+        metrics = controller.snapshot()
+        await jobs
+        return order, metrics
+
+    order, metrics = asyncio.run(scenario())
+    # Each account runs one analysis at a time, so the solo user is not queued behind the bulk upload
+    assert order[:2] == ["school-0", "solo-0"]
+    assert order.index("solo-1") < order.index("school-2")
+    assert metrics["active"] == 2
+    assert metrics["accounts"] == {
+        account_label("school"): {"active": 1, "queued": 3},
+        account_label("solo"): {"active": 1, "queued": 1},
+    }
+    # Account ids are not published
+    assert "school" not in str(metrics)
+
+
+def test_full_queue_displaces_the_busiest_account():
+    async def scenario():
+        controller = AdmissionController(
+            max_concurrency=1, max_queue=2, queue_timeout=1
+        )
+        await controller.acquire(1, "school")
+        waiting = [
+            asyncio.ensure_future(controller.acquire(1, "school")) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        solo = asyncio.ensure_future(controller.acquire(1, "solo"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError):
+            await waiting[1]
+        controller.release(account="school")
+        await solo
+        return controller.snapshot()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["rejected_displaced"] == 1
+    assert metrics["accounts"] == {
+        account_label("solo"): {"active": 1, "queued": 0},
+        account_label("school"): {"active": 0, "queued": 1},
+    }
+
+
+class BusyController:
+    def slot(self, cost=None, account=None):
+        raise AdmissionRejectedError("Server is busy; the queue is full.", 7)
+
+
+def probe(size, duration):
+    return {"size": size, "content_type": "audio/wav", "duration": duration}
+
+
+def test_test_endpoint_returns_429_when_saturated(monkeypatch):
+    monkeypatch.setattr("main.probe_audio", lambda blob: probe(32000, 1.0))
+    monkeypatch.setattr("main.admission", BusyController())
+    payload = {
+        "file_name": "dummy_audio.wav",
+        "acc_id": "user123",
+        "test_type": True,
+        "lan_flag": "en",
+    }
+
+    response = client.post("/test", json=payload)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_test_endpoint_rejects_long_recordings_before_download(monkeypatch):
+    monkeypatch.setattr("main.probe_audio", lambda blob: probe(10**9, 3600.0))
+    monkeypatch.setattr("main.admission", BusyController())
+    payload = {
+        "file_name": "dummy_audio.wav",
+        "acc_id": "user123",
+        "test_type": True,
+        "lan_flag": "en",
+    }
+
+    response = client.post("/test", json=payload)
+
+    assert response.status_code == 413
@@ -0,0 +1,68 @@
+import io
+import wave
+
+import pytest
+
+from loadtest.fakes import FakeBucket
+from src.audio_probe import (
+    AudioTooLargeError,
+    check_limits,
+    expected_cost,
+    file_duration,
+    parse_wav_header,
+    probe_audio,
+)
+
+
+def wav_bytes(seconds, sample_rate=16000, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b"\0\0" * channels * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+def test_wav_header_gives_duration():
+    header = parse_wav_header(wav_bytes(2.5, sample_rate=44100, channels=2)[:4096])
+
+    assert header["sample_rate"] == 44100
+    assert header["channels"] == 2
+    assert header["duration"] == pytest.approx(2.5)
+    assert parse_wav_header(b"ID3\x03 not a wav file") is None
+
+
+def test_file_duration_reads_the_header(tmp_path):
+    (tmp_path / "recording.wav").write_bytes(wav_bytes(3.0))
+    (tmp_path / "recording.m4a").write_bytes(b"\0" * 64000)
+
+    assert file_duration(str(tmp_path / "recording.wav")) == pytest.approx(3.0)
+    assert file_duration(str(tmp_path / "recording.m4a")) is None
+
+
+def test_probe_reads_only_the_header():
+    bucket = FakeBucket()
+    bucket.uploads["recording.wav"] = wav_bytes(3.0)
+    bucket.uploads["recording.m4a"] = b"\0" * 64000
+
+    probe = probe_audio(bucket.blob("recording.wav"))
+    assert probe["duration"] == pytest.approx(3.0)
+    assert probe["source"] == "wav_header"
+
+    # Without a readable header the duration is estimated from the size
+    probe = probe_audio(bucket.blob("recording.m4a"))
+    assert probe["duration"] == pytest.approx(2.0)
+    assert probe["source"] == "size"
+
+
+def test_limits_and_cost(monkeypatch):
+    monkeypatch.setenv("MAX_AUDIO_SECONDS", "60")
+    short = {"size": 32000, "duration": 1.0}
+    long = {"size": 32000 * 120, "duration": 120.0}
+
+    check_limits(short)
+    with pytest.raises(AudioTooLargeError):
+        check_limits(long)
+    assert expected_cost(short) < expected_cost(long)
+    assert expected_cost({"size": None, "duration": None}) is None
@@ -0,0 +1,59 @@
+import json
+from types import SimpleNamespace
+
+from src import speech_to_text
+from src.batch import find_recordings, load_completed, read_transcript, run_batch
+from src.synthetic import write_synthetic_wav
+
+
+def test_batch_resumes_and_retries_failures(tmp_path):
+    corpus = tmp_path / "corpus"
+    (corpus / "speaker").mkdir(parents=True)
+    for i, name in enumerate(["a.wav", "speaker/b.wav"]):
+        write_synthetic_wav(str(corpus / name), 2, seed=i)
+    (corpus / "a.txt").write_text("one two three four five")
+    out = tmp_path / "results.jsonl"
+
+    # b.wav has no transcript file yet, so it fails
+    assert run_batch(str(corpus), str(out), 1, transcripts="sidecar") == (1, 1, 0)
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    first = next(r for r in records if r["file"] == "a.wav")
+    assert first["transcript"] == "one two three four five"
+    assert "final_voice_score" in first["voice"]
+    assert "final_energy_score" in first["energy"]
+
+    # A run interrupted mid-line leaves a partial record behind
+    with open(out, "a") as f:
+        f.write('{"file": "speaker/b.wav", "vo')
+    (corpus / "speaker" / "b.txt").write_text("hello")
+
+    assert run_batch(str(corpus), str(out), 1, transcripts="sidecar") == (1, 0, 1)
+    assert load_completed(str(out)) == set(find_recordings(str(corpus)))
+
+
+class TwoUtteranceClient:
+    calls = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def recognize(self, config, audio):
+        TwoUtteranceClient.calls.append(audio)
+        results = [
+            SimpleNamespace(
+                alternatives=[SimpleNamespace(transcript=text, confidence=0.9)]
+            )
+            for text in ("first sentence.", " second sentence.")
+        ]
+        return SimpleNamespace(results=results)
+
+
+def test_stt_transcripts_keep_every_utterance(tmp_path, monkeypatch):
+    monkeypatch.setattr(speech_to_text.speech, "SpeechClient", TwoUtteranceClient)
+    path = write_synthetic_wav(str(tmp_path / "a.wav"), 2)
+
+    text = read_transcript(path, "stt", "en")
+
+    assert text == "first sentence. second sentence."
+    # Short recordings are sent inline for synchronous recognition
+    assert TwoUtteranceClient.calls[-1].content == (tmp_path / "a.wav").read_bytes()
@@ -0,0 +1,68 @@
+from src import stutter_test
+from src.disfluency import analyze_disfluency_local, detect_disfluencies
+
+
+def test_detects_repetitions_fillers_and_prolongations():
+    transcript = (
+        "I I want to, um, b-b-buy the st st store. I want I want it. Ssssso good."
+    )
+
+    word_count, events = detect_disfluencies(transcript)
+
+    assert word_count == 17
+    assert [(e["word"], e["type"]) for e in events] == [
+        ("i", "word repetition"),
+        ("um", "filler"),
+        ("buy", "part-word repetition"),
+        ("store", "part-word repetition"),
+        ("i want", "phrase repetition"),
+        ("so", "prolongation"),
+    ]
+
+
+def test_fluent_speech_has_no_events():
+    result = analyze_disfluency_local("It had had a very very good run.", "en")
+
+    assert result["stutter_count"] == 0
+    assert result["fluency_score"] == 100
+    assert set(result) >= set(stutter_test.ANALYSIS_FIELDS)
+
+
+def test_auto_mode_skips_gemini_for_fluent_transcripts(monkeypatch):
+    calls = []
+
+    def fake_gemini(transcript):
+        calls.append(transcript)
+        return {"stutter_count": 2}
+
+    monkeypatch.setattr(stutter_test, "analyze_stuttering_gemini", fake_gemini)
+
+    assert (
+        stutter_test.analyze_stuttering("We went home.")["analysis_source"] == "local"
+    )
+    assert (
+        stutter_test.analyze_stuttering("We we went home.")["analysis_source"]
+        == "gemini"
+    )
+    monkeypatch.setenv("STUTTER_ANALYSIS_MODE", "local")
+    assert stutter_test.analyze_stuttering("We we went home.")["stutter_count"] == 1
+    monkeypatch.setenv("STUTTER_ANALYSIS_MODE", "gemini")
+    stutter_test.analyze_stuttering("We went home.")
+    assert calls == ["We we went home.", "We went home."]
+
+
+def test_other_languages_always_use_gemini(monkeypatch):
+    calls = []
+
+    def fake_gemini(transcript):
+        calls.append(transcript)
+        return {"stutter_count": 0}
+
+    monkeypatch.setattr(stutter_test, "analyze_stuttering_gemini", fake_gemini)
+
+    for mode in ("auto", "local"):
+        monkeypatch.setenv("STUTTER_ANALYSIS_MODE", mode)
+        for lan_flag in ("si", "ta"):
+            result = stutter_test.analyze_stuttering("අපි ගෙදර ගියා.", lan_flag)
+            assert result["analysis_source"] == "gemini"
+    assert len(calls) == 4
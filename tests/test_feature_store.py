@@ -0,0 +1,79 @@
+from fastapi.testclient import TestClient
+import numpy as np
+import pytest
+import soundfile as sf
+
+from main import app
+from src import ps_test
+from src.feature_store import FeatureNotFoundError, load_features
+
+SR = 16000
+TRANSCRIBE = [
+    {"transcript": "Practice makes every talk ", "confidence": 0.87},
+    {"transcript": "a little better"},
+]
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch):
+    monkeypatch.setenv("FEATURE_STORE_DIR", str(tmp_path / "features"))
+    monkeypatch.setattr(ps_test, "transcribe_gcs", lambda *args, **kwargs: TRANSCRIBE)
+    rng = np.random.default_rng(3)
+    t = np.arange(5 * SR) / SR
+    f0 = 130 * (1 + 0.08 * np.sin(2 * np.pi * 0.5 * t))
+    y = 0.3 * np.sin(2 * np.pi * np.cumsum(f0) / SR) * (np.sin(np.pi * t) ** 2)
+    path = tmp_path / "talk.wav"
+    sf.write(path, y + 0.005 * rng.standard_normal(len(t)), SR, subtype="PCM_16")
+    return str(path)
+
+
+def test_rescoring_reproduces_the_original_result(recording):
+    result = ps_test.ps_test(recording, "en")
+
+    rescored = ps_test.rescore_ps_test(result["feature_key"])
+
+    assert rescored == ps_test.stored_result(result)
+    assert rescored["transcription"] == TRANSCRIBE
+
+
+def test_summaries_are_returned_but_not_stored(recording):
+    result = ps_test.ps_test(recording, "en")
+
+    stored = ps_test.stored_result(result)
+
+    assert set(result) - set(stored) == {"segment_summaries", "energy_curve"}
+    assert "0.5" in result["segment_summaries"]
+
+
+def test_rescoring_applies_new_weights(recording, monkeypatch):
+    result = ps_test.ps_test(recording, "en")
+    monkeypatch.setattr(
+        ps_test, "generate_overall_score", lambda voice, energy, confidence: 42.0
+    )
+
+    rescored = ps_test.rescore_ps_test(result["feature_key"])
+
+    assert rescored["final_public_speaking_score"] == 42.0
+    assert (
+        rescored["Voice_Quality_&_Stability_Data"]
+        == result["Voice_Quality_&_Stability_Data"]
+    )
+
+
+def test_each_language_gets_its_own_key(recording):
+    english = ps_test.ps_test(recording, "en")
+    sinhala = ps_test.ps_test(recording, "si")
+
+    assert english["feature_key"] != sinhala["feature_key"]
+    assert ps_test.ps_test(recording, "en")["feature_key"] == english["feature_key"]
+
+
+def test_unknown_or_malformed_keys_are_not_found(tmp_path, monkeypatch):
+    monkeypatch.setenv("FEATURE_STORE_DIR", str(tmp_path))
+    with pytest.raises(FeatureNotFoundError):
+        load_features("0" * 64)
+    with pytest.raises(FeatureNotFoundError):
+        load_features("../../etc/passwd")
+
+    response = TestClient(app).post("/rescore", json={"feature_key": "0" * 64})
+    assert response.status_code == 404
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from src import frame_features
+from src.frame_features import FrameFeatures, segment_starts
+from src.shared_audio import AudioSamples
+from src.vad import frame_rms
+
+SR = 16000
+
+
+def make_audio(seconds=7.3):
+    rng = np.random.default_rng(1)
+    t = np.arange(int(seconds * SR)) / SR
+    f0 = 140 * (1 + 0.1 * np.sin(2 * np.pi * 0.7 * t))
+    y = 0.3 * np.sin(2 * np.pi * np.cumsum(f0) / SR) * (np.sin(np.pi * t) ** 2)
+    return AudioSamples((y + 0.01 * rng.standard_normal(len(t))).astype(np.float32), SR)
+
+
+def reference_pitch(times, semitones, duration, segment_duration):
+    data = {}
+    for t in segment_starts(duration, segment_duration):
+        values = semitones[(times >= t) & (times < t + segment_duration)]
+        if values.size:
+            data[round(t, 2)] = (
+                np.mean(values),
+                np.median(values),
+                np.std(values),
+                np.max(values) - np.min(values),
+            )
+        else:
+            data[round(t, 2)] = (0.0, 0.0, 0.0, 0.0)
+    return data
+
+
+@pytest.mark.parametrize("segment_duration", [0.25, 1.0, 2.0, 3.0])
+def test_summaries_match_direct_computation(segment_duration):
+    audio = make_audio()
+    features = FrameFeatures(audio)
+    times, semitones = features.pitch_track
+
+    expected = reference_pitch(times, semitones, audio.duration, segment_duration)
+    pitch = features.pitch_analysis(segment_duration)
+    assert pitch.keys() == expected.keys()
+    for key, (mean, median, std, spread) in expected.items():
+        assert pitch[key]["mean_pitch_ST"] == pytest.approx(mean, abs=0.011)
+        assert pitch[key]["median_pitch_ST"] == pytest.approx(median, abs=0.011)
+        assert pitch[key]["std_pitch_ST"] == pytest.approx(std, abs=0.011)
+        assert pitch[key]["pitch_range_ST"] == pytest.approx(spread, abs=0.011)
+
+    rms = frame_rms(audio.samples)
+    frame_times = np.linspace(0, audio.duration, num=len(rms))
+    for t, value in features.intensity_analysis(segment_duration).items():
+        mask = (frame_times >= t) & (frame_times < t + segment_duration)
+        assert value == pytest.approx(np.mean(rms[mask]) * 200, abs=1e-3)
+
+    y = audio.samples.astype(np.float64)
+    for t, value in features.energy_analysis(segment_duration).items():
+        segment = y[int(t * SR) : int((t + segment_duration) * SR)]
+        expected_energy = max(np.log10(np.sum(segment**2) + 1e-8) * 10, 0) * 10
+        assert value == pytest.approx(expected_energy, abs=0.011)
+
+
+def test_resolutions_reuse_one_frame_pass(monkeypatch):
+    calls = []
+    original = frame_features.pitch_track
+    monkeypatch.setattr(
+        frame_features,
+        "pitch_track",
+        lambda audio: calls.append(audio) or original(audio),
+    )
+    features = FrameFeatures(make_audio())
+
+    summaries = features.summaries([0.5, 2.0, 10.0])
+
+    assert len(calls) == 1
+    assert list(summaries) == ["0.5", "2", "10"]
+    assert len(summaries["0.5"]["energy_analysis"]) == 15
+    assert list(summaries["10"]["intensity_analysis"]) == [0.0]
+
+
+def test_summary_resolutions_from_env(monkeypatch):
+    monkeypatch.setenv("SEGMENT_RESOLUTIONS", "1, 5")
+    assert frame_features.summary_resolutions() == [1.0, 5.0]
+    monkeypatch.setenv("SEGMENT_RESOLUTIONS", "")
+    assert frame_features.summary_resolutions() == []
+
+
+@pytest.mark.parametrize("value", ["0", "-1,5", "1,x", "nan"])
+def test_invalid_summary_resolutions_use_the_default(monkeypatch, caplog, value):
+    monkeypatch.setenv("SEGMENT_RESOLUTIONS", value)
+    assert frame_features.summary_resolutions() == [0.5, 10.0]
+    assert frame_features.summary_resolutions() == [0.5, 10.0]
+    assert [record.levelname for record in caplog.records] == ["WARNING"]
+
+
+def test_overlapping_windows_match_direct_slices():
+    audio = make_audio()
+    features = FrameFeatures(audio)
+    y = audio.samples.astype(np.float64)
+
+    starts, energies = features.segment_energies(2.0, hop=0.5)
+
+    assert starts.tolist() == np.arange(0, audio.duration, 0.5).tolist()
+    for t, energy in zip(starts.tolist(), energies, strict=True):
+        segment = y[int(t * SR) : int((t + 2.0) * SR)]
+        assert energy == pytest.approx(np.sum(segment**2), rel=1e-9)
+    curve = features.energy_curve(2.0, 0.5)
+    assert list(curve["energy_analysis"]) == [round(t, 2) for t in starts.tolist()]
+    assert curve["intensity_analysis"][0.0] == features.intensity_analysis(2.0)[0.0]
+    # A hop equal to the window gives the non-overlapping segments
+    assert features.energy_analysis(2.0, hop=2.0) == features.energy_analysis(2.0)
+
+
+def test_blockwise_energy_sums_match_the_full_running_sum():
+    y = np.random.default_rng(3).standard_normal(10_000).astype(np.float32)
+    indexes = np.array([0, 1, 999, 1000, 1001, 4096, 9999, 10_000, 5])
+    full = np.concatenate(([0.0], np.cumsum(np.square(y, dtype=np.float64))))
+
+    sums = frame_features._energy_sums_at(y, indexes, block=1000)
+
+    assert sums == pytest.approx(full[indexes], rel=1e-12, abs=1e-9)
+
+
+def test_energy_curve_window_from_env(monkeypatch):
+    assert frame_features.energy_curve_window() == (2.0, 0.5)
+    monkeypatch.setenv("ENERGY_CURVE", "3:1")
+    assert frame_features.energy_curve_window() == (3.0, 1.0)
+    monkeypatch.setenv("ENERGY_CURVE", "")
+    assert frame_features.energy_curve_window() is None
+
+
+@pytest.mark.parametrize("value", ["2", "2:x", "2:0", "-1:0.5", "1:2:3"])
+def test_invalid_energy_curve_turns_it_off(monkeypatch, caplog, value):
+    monkeypatch.setenv("ENERGY_CURVE", value)
+    assert frame_features.energy_curve_window() is None
+    assert frame_features.energy_curve_window() is None
+    # Validated, and warned about, once per value
+    assert [record.levelname for record in caplog.records] == ["WARNING"]
@@ -0,0 +1,121 @@
+import pytest
+
+from src.governor import (
+    ProviderGovernor,
+    ProviderUnavailableError,
+    RetryableProviderError,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+QUOTA_ERROR = RetryableProviderError("quota exceeded")
+
+
+# Fake provider that fails with a quota error a fixed number of times
+class FlakyProvider:
+    def __init__(self, failures, error=QUOTA_ERROR):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, value):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return f"ok:{value}"
+
+
+def make_governor(clock, **overrides):
+    settings = {
+        "max_concurrency": 2,
+        "rate_per_second": 10.0,
+        "burst": 2,
+        "max_retries": 3,
+        "base_delay": 0.5,
+        "max_delay": 4.0,
+        "failure_threshold": 3,
+        "reset_timeout": 10.0,
+        "acquire_timeout": 5.0,
+    }
+    settings.update(overrides)
+    return ProviderGovernor("fake", clock=clock, sleep=clock.sleep, **settings)
+
+
+def test_retries_transient_errors_until_success():
+    clock = FakeClock()
+    governor = make_governor(clock)
+    provider = FlakyProvider(failures=2)
+
+    assert governor.call(provider, "a") == "ok:a"
+    assert provider.calls == 3
+    metrics = governor.snapshot()
+    assert metrics["retries"] == 2
+    assert metrics["successes"] == 1
+    assert metrics["circuit_state"] == "closed"
+
+
+def test_non_retryable_errors_are_raised_immediately():
+    clock = FakeClock()
+    governor = make_governor(clock)
+    provider = FlakyProvider(failures=1, error=ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        governor.call(provider, "a")
+    assert provider.calls == 1
+
+
+def test_circuit_opens_and_recovers_after_reset_timeout():
+    clock = FakeClock()
+    governor = make_governor(clock, max_retries=0)
+    provider = FlakyProvider(failures=3)
+
+    for _ in range(3):
+        with pytest.raises(ProviderUnavailableError):
+            governor.call(provider, "a")
+    assert governor.snapshot()["circuit_state"] == "open"
+
+    # Calls are rejected without reaching the provider while the circuit is open
+    with pytest.raises(ProviderUnavailableError):
+        governor.call(provider, "a")
+    assert provider.calls == 3
+
+    clock.now += 10.0
+    assert governor.call(provider, "b") == "ok:b"
+    assert governor.snapshot()["circuit_state"] == "closed"
+
+
+def test_token_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=1, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+    with pytest.raises(ProviderUnavailableError):
+        bucket.acquire(timeout=0.1)
+
+
+def test_non_retryable_errors_do_not_close_the_circuit():
+    clock = FakeClock()
+    governor = make_governor(clock, max_retries=0)
+    flaky = FlakyProvider(failures=2)
+    for _ in range(2):
+        with pytest.raises(ProviderUnavailableError):
+            governor.call(flaky, "a")
+
+    with pytest.raises(ValueError):
+        governor.call(FlakyProvider(failures=1, error=ValueError("bad")), "a")
+    with pytest.raises(ProviderUnavailableError):
+        governor.call(FlakyProvider(failures=1), "a")
+
+    assert governor.snapshot()["circuit_state"] == "open"
@@ -1,6 +1,6 @@
 from src.logic import analysing_audio
 
-def fake_ps_test(file_name, lan_flag):
+def fake_ps_test(file_name, lan_flag, blob_name=None, on_stage=None):
     return {"final_public_speaking_score": 90}
 
 def fake_stutter_test(file_name, lan_flag):
@@ -0,0 +1,64 @@
+import threading
+import tracemalloc
+
+from fastapi.testclient import TestClient
+import numpy as np
+
+from main import app
+from src import memory_metrics
+from src.memory_metrics import top_allocations, track_memory
+
+client = TestClient(app)
+
+
+def test_stages_record_rss_and_peak_allocations():
+    tracemalloc.start()
+    try:
+        with track_memory("test_peak"):
+            buffer = np.ones(2_000_000)  # 16 MB, freed before the stage ends
+            del buffer
+        kept = []
+        with track_memory("test_retained"):
+            kept.append(np.ones(1_000_000))
+        sites = top_allocations(limit=5)
+    finally:
+        tracemalloc.stop()
+
+    stages = memory_metrics.memory_metrics()["stages"]
+    assert stages["test_peak"]["count"] == 1
+    assert stages["test_peak"]["peak_alloc_mb_max"] >= 15
+    assert stages["test_peak"]["retained_alloc_mb_total"] < 1
+    assert stages["test_retained"]["retained_alloc_mb_total"] >= 7
+    assert sites and {"site", "size_mb", "size_diff_mb"} <= set(sites[0])
+
+
+def test_overlapping_stages_skip_the_process_wide_peak():
+    inside = threading.Event()
+    release = threading.Event()
+
+    def other_stage():
+        with track_memory("test_other"):
+            inside.set()
+            release.wait()
+
+    tracemalloc.start()
+    try:
+        thread = threading.Thread(target=other_stage)
+        thread.start()
+        inside.wait()
+        with track_memory("test_overlapped"):
+            pass
+        release.set()
+        thread.join()
+    finally:
+        tracemalloc.stop()
+
+    stages = memory_metrics.memory_metrics()["stages"]
+    assert stages["test_overlapped"]["count"] == 1
+    assert "peak_alloc_mb_max" not in stages["test_overlapped"]
+
+
+def test_debug_endpoint_needs_tracing():
+    response = client.get("/debug/memory")
+
+    assert response.status_code == 404
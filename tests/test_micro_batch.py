@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+import time
+
+import pytest
+
+from loadtest.fakes import FakeGeminiModel
+from src import stutter_test
+from src.micro_batch import MicroBatcher
+
+
+def test_concurrent_calls_share_one_handler_call():
+    calls = []
+    all_submitted = threading.Barrier(4)
+
+    def handler(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(handler, max_batch_size=4, max_wait=5.0)
+
+    def submit(item):
+        all_submitted.wait()
+        return batcher.submit(item)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(submit, [1, 2, 3, 4]))
+
+    assert results == [10, 20, 30, 40]
+    assert len(calls) == 1 and sorted(calls[0]) == [1, 2, 3, 4]
+    assert batcher.snapshot()["largest_batch_size"] == 4
+
+
+def test_handler_errors_reach_every_caller():
+    def handler(items):
+        raise RuntimeError("provider down")
+
+    batcher = MicroBatcher(handler, max_batch_size=2, max_wait=0.0)
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        batcher.submit("a")
+
+
+def test_callers_in_a_running_batch_do_not_lead_an_empty_one():
+    calls = []
+    all_submitted = threading.Barrier(2)
+
+    def handler(items):
+        calls.append(list(items))
+        time.sleep(0.1)
+        return items
+
+    batcher = MicroBatcher(handler, max_batch_size=2, max_wait=0.5)
+
+    def submit(item):
+        all_submitted.wait()
+        return batcher.submit(item)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(submit, ["a", "b"]))
+
+    assert results == ["a", "b"]
+    assert all(calls) and sorted(item for call in calls for item in call) == ["a", "b"]
+    assert batcher.snapshot()["batches"] == len(calls)
+
+
+class RecordingModel(FakeGeminiModel):
+    def __init__(self, batch_text=None):
+        super().__init__()
+        self.prompts = []
+        self.batch_text = batch_text
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        response = super().generate_content(prompt)
+        if self.batch_text is not None and "Transcript 1:" in prompt:
+            response.text = self.batch_text
+        return response
+
+
+def test_empty_batches_do_not_call_the_model(monkeypatch):
+    model = RecordingModel()
+    monkeypatch.setattr(stutter_test, "model", model)
+
+    assert stutter_test.analyze_stuttering_batch([]) == []
+    assert model.prompts == []
+
+
+def test_batch_response_is_split_per_transcript(monkeypatch):
+    model = RecordingModel()
+    monkeypatch.setattr(stutter_test, "model", model)
+
+    analyses = stutter_test.analyze_stuttering_batch(["one", "two", "three"])
+
+    assert len(model.prompts) == 1
+    assert [a["fluency_score"] for a in analyses] == [72, 72, 72]
+    assert all("index" not in a for a in analyses)
+
+
+def test_invalid_batch_items_fall_back_to_single_calls(monkeypatch):
+    # Only the second transcript has a usable analysis in the batched response
+    valid = {
+        "stutter_count": 0,
+        "stuttered_words": [],
+        "fluency_score": 95,
+        "stuttering_score": 5,
+        "dynamic_feedback": "Fluent.",
+        "index": 2,
+    }
+    model = RecordingModel(json.dumps([{"index": 1, "fluency_score": 10}, valid]))
+    monkeypatch.setattr(stutter_test, "model", model)
+
+    analyses = stutter_test.analyze_stuttering_batch(["one", "two"])
+
+    assert [a["fluency_score"] for a in analyses] == [72, 95]
+    assert len(model.prompts) == 2
+
+    model.batch_text = "not json"
+    analyses = stutter_test.analyze_stuttering_batch(["one", "two"])
+    assert [a["fluency_score"] for a in analyses] == [72, 72]
+    assert len(model.prompts) == 5
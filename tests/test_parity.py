@@ -0,0 +1,44 @@
+import json
+
+from src.parity import REFERENCE_PATH, compare, run_corpus, score_deltas
+
+
+def test_current_engine_reproduces_the_reference(tmp_path):
+    with open(REFERENCE_PATH) as f:
+        reference = json.load(f)
+    names = ["short", "wideband"]
+
+    results = run_corpus("praat", str(tmp_path), names)
+
+    assert compare({name: reference[name] for name in names}, results) == []
+
+
+def test_deviations_are_measured_against_per_metric_tolerances():
+    reference = {
+        "a": {
+            "voice": {"hnr_data": {"0.0": 20.0}, "jitter_data": {"0.0": 0.004}},
+            "final_public_speaking_score": 70.0,
+        }
+    }
+    candidate = {
+        "a": {
+            "voice": {"hnr_data": {"0.0": 20.5}, "jitter_data": {"0.0": 0.005}},
+            "final_public_speaking_score": 71.5,
+        }
+    }
+
+    deviations = compare(reference, candidate)
+
+    assert [(d["path"], d["ratio"] > 1) for d in deviations] == [
+        ("voice/jitter_data/0.0", True),
+        ("final_public_speaking_score", True),
+        ("voice/hnr_data/0.0", False),
+    ]
+    assert score_deltas(reference, candidate) == [
+        ("a", "final_public_speaking_score", 1.5)
+    ]
+    missing = compare(reference, {"a": {"final_public_speaking_score": 70.0}})
+    assert {d["path"] for d in missing} == {
+        "voice/hnr_data/0.0",
+        "voice/jitter_data/0.0",
+    }
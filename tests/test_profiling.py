@@ -0,0 +1,45 @@
+import os
+import time
+
+from src.profiling import _prune, capture_profile, should_profile
+
+
+def busy_analysis(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+def test_capture_writes_folded_stacks(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_INTERVAL_MS", "1")
+
+    with capture_profile(True, test_type=True, lan_flag="en"):
+        busy_analysis(0.1)
+    with capture_profile(False, test_type=True, lan_flag="en"):
+        busy_analysis(0.01)
+
+    (name,) = os.listdir(tmp_path)
+    assert "_ps_en_" in name and name.endswith(".folded")
+    lines = (tmp_path / name).read_text().splitlines()
+    assert any("busy_analysis (test_profiling.py:" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_prune_keeps_recent_and_slowest(tmp_path):
+    durations = [900, 100, 800, 200, 300]
+    for second, ms in enumerate(durations):
+        (tmp_path / f"20260101T00000{second}_ps_en_{ms}ms_abcd1234.folded").touch()
+
+    _prune(str(tmp_path), keep_recent=2, keep_slowest=2)
+
+    kept = sorted(int(name.split("_")[3][:-2]) for name in os.listdir(tmp_path))
+    assert kept == [200, 300, 800, 900]
+
+
+def test_header_forces_a_profile(monkeypatch):
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "0")
+    assert should_profile("1")
+    assert not should_profile(None)
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "1")
+    assert should_profile(None)
@@ -0,0 +1,73 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from loadtest.fakes import FakeFirestore, fake_firestore_module
+from main import app
+from src import results_store
+from src.progress import apply_result, rebuild_progress
+from src.results_store import record_result
+
+
+def ps_result(score, voice=70.0):
+    return {
+        "final_public_speaking_score": score,
+        "overall_confidence": 90,
+        "Voice_Quality_&_Stability_Data": {"final_voice_score": voice},
+        "Speech_Intensity_&_Energy_Data": {"error": "No valid intensity"},
+    }
+
+
+def test_aggregates_track_count_mean_ewma_and_best():
+    state = None
+    for tag, score in [("20250101", 60.0), ("20250102", 80.0), ("20250103", 70.0)]:
+        state = apply_result(state, "PS_Check", tag, ps_result(score), alpha=0.5)
+
+    score = state["PS_Check"]["final_public_speaking_score"]
+    assert score["count"] == 3
+    assert score["mean"] == pytest.approx(70.0)
+    assert score["ewma"] == pytest.approx(0.5 * 70 + 0.25 * 80 + 0.25 * 60)
+    assert (score["best"], score["best_tag"]) == (80.0, "20250102")
+    assert (score["last"], score["last_tag"]) == (70.0, "20250103")
+    # Missing or non-numeric metrics are skipped
+    assert "final_energy_score" not in state["PS_Check"]
+
+
+def test_rebuild_matches_incremental_updates():
+    results = {
+        "PS_Check": {"20250102": ps_result(80.0), "20250101": ps_result(60.0)},
+        "Stuttering_Check": {
+            "20250103": {"fluency_score": 72, "stutter_count": 3},
+            "20250104": {"fluency_score": "high"},
+        },
+    }
+    incremental = apply_result(None, "PS_Check", "20250101", ps_result(60.0))
+    incremental = apply_result(incremental, "PS_Check", "20250102", ps_result(80.0))
+    incremental = apply_result(
+        incremental,
+        "Stuttering_Check",
+        "20250103",
+        results["Stuttering_Check"]["20250103"],
+    )
+
+    assert rebuild_progress(results) == incremental
+
+
+def test_progress_endpoint(monkeypatch):
+    monkeypatch.setenv("FAKE_FIRESTORE_LATENCY_MS", "0")
+    db = FakeFirestore()
+    monkeypatch.setattr("main.db", db)
+    monkeypatch.setattr(results_store, "firestore", fake_firestore_module())
+    # An account created before progress was tracked
+    db.collection("User_Accounts").document("old").set(
+        {"results": {"PS_Check": {"20240101120000": ps_result(50.0)}}}
+    )
+    client = TestClient(app)
+
+    assert client.get("/users/missing/progress").status_code == 404
+    record_result(db, "old", "PS_Check", "20250101120000", ps_result(90.0))
+    data = client.get("/users/old/progress").json()
+
+    score = data["progress"]["PS_Check"]["final_public_speaking_score"]
+    assert score["count"] == 2
+    assert score["best"] == 90.0
+    assert "User_Accounts/old/Results/20250101120000_PS_Check" in db.store
@@ -37,7 +37,7 @@ def fake_analysing_audio(file_name, test_type, lan_flag):
     return {"final_public_speaking_score": 85, "final_public_speaking_feedback": "Test feedback"}
 
 # Fake transcription function to bypass external API call
-def fake_transcribe_gcs(gcs_uri, long_flag, lan_flag):
+def fake_transcribe_gcs(gcs_uri, long_flag, lan_flag, content=None):
     # Return a dummy transcription result.
     return [{"transcript": "dummy transcript", "confidence": 1.0}]
 
@@ -0,0 +1,84 @@
+import json
+
+from fastapi.testclient import TestClient
+import numpy as np
+
+from main import app
+from src.response import dumps, select_detail, to_native
+
+client = TestClient(app)
+
+RESULT = {
+    "final_public_speaking_score": np.float64(71.5),
+    "final_public_speaking_feedback": "Good.",
+    "transcription": [{"transcript": "hello", "confidence": 0.9}],
+    "Voice_Quality_&_Stability_Data": {
+        "final_voice_score": np.float32(64.25),
+        "dynamic_feedback": "Steady.",
+        "jitter_data": {0.0: np.float64(0.012), 2.0: 0.0},
+        "silent_segments": [2.0],
+    },
+    "segment_summaries": {"0.5": {"energy_analysis": {0.0: 1.0}}},
+    "transcript": "hello hello",
+}
+
+
+def test_numpy_values_and_numeric_keys_serialize_like_json():
+    native = to_native(RESULT)
+
+    assert native["Voice_Quality_&_Stability_Data"]["final_voice_score"] == 64.25
+    assert native["Voice_Quality_&_Stability_Data"]["jitter_data"] == {
+        "0.0": 0.012,
+        "2.0": 0.0,
+    }
+    assert json.loads(dumps({"n": np.int64(3), "a": np.arange(2)})) == {
+        "n": 3,
+        "a": [0, 1],
+    }
+
+
+def test_detail_levels():
+    assert select_detail(RESULT, "full") is RESULT
+
+    standard = select_detail(RESULT, "standard")
+    assert "segment_summaries" not in standard
+    assert "jitter_data" not in standard["Voice_Quality_&_Stability_Data"]
+    assert standard["Voice_Quality_&_Stability_Data"]["silent_segments"] == [2.0]
+    assert standard["transcription"] == RESULT["transcription"]
+
+    summary = select_detail(RESULT, "summary")
+    assert summary == {
+        "final_public_speaking_score": 71.5,
+        "final_public_speaking_feedback": "Good.",
+        "Voice_Quality_&_Stability_Data": {
+            "final_voice_score": np.float32(64.25),
+            "dynamic_feedback": "Steady.",
+        },
+    }
+
+
+def test_test_endpoint_trims_and_compresses_the_result(monkeypatch):
+    full = dict(RESULT, segment_summaries={"0.5": {"energy": np.linspace(0, 1, 500)}})
+
+    async def fake_run_test(request_body, profile=False, on_stage=None):
+        return {"result": full}
+
+    monkeypatch.setattr("main.run_test", fake_run_test)
+    payload = {
+        "file_name": "dummy_audio.wav",
+        "acc_id": "user123",
+        "test_type": True,
+        "lan_flag": "en",
+    }
+
+    response = client.post("/test", json=payload, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.json()["result"]["segment_summaries"]["0.5"]["energy"]) == 500
+
+    response = client.post("/test", json=dict(payload, detail="summary"))
+    assert "Content-Encoding" not in response.headers
+    assert response.json()["result"]["final_public_speaking_score"] == 71.5
+    assert "segment_summaries" not in response.json()["result"]
+
+    response = client.post("/test", json=dict(payload, detail="everything"))
+    assert response.status_code == 422
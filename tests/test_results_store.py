@@ -0,0 +1,138 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from loadtest.fakes import FakeFirestore, fake_firestore_module
+from main import app
+from src import results_store
+from src.results_store import record_result
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setenv("FAKE_FIRESTORE_LATENCY_MS", "0")
+    db = FakeFirestore()
+    monkeypatch.setattr("main.db", db)
+    monkeypatch.setattr(results_store, "firestore", fake_firestore_module())
+    return db
+
+
+def test_results_are_paginated_newest_first(db):
+    legacy = {f"2024010{day}120000": {"fluency_score": day} for day in range(1, 4)}
+    db.collection("User_Accounts").document("u").set(
+        {"name": "Ann", "results": {"Stuttering_Check": legacy}}
+    )
+    for day in range(1, 4):
+        record_result(
+            db,
+            "u",
+            "PS_Check",
+            f"2025010{day}120000",
+            {"final_public_speaking_score": 60 + day},
+        )
+    client = TestClient(app)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/users/u/results", params=params).json()
+        assert len(page["results"]) <= 2
+        seen += [(r["test_type"], r["test_tag"], r["score"]) for r in page["results"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [tag for _, tag, _ in seen] == sorted(
+        [f"2025010{d}120000" for d in range(1, 4)]
+        + [f"2024010{d}120000" for d in range(1, 4)],
+        reverse=True,
+    )
+    assert seen[0] == ("PS_Check", "20250103120000", 63.0)
+
+    account = db.store["User_Accounts/u"]
+    assert account["results"]["Stuttering_Check"] == legacy
+    assert sorted(account["results"]["PS_Check"]) == [
+        f"2025010{d}120000" for d in range(1, 4)
+    ]
+    assert account["name"] == "Ann"
+    assert account["summary"] == {
+        "PS_Check": {"count": 3, "last_tag": "20250103120000", "last_score": 63.0},
+        "Stuttering_Check": {
+            "count": 3,
+            "last_tag": "20240103120000",
+            "last_score": 3.0,
+        },
+    }
+
+    only_ps = client.get("/users/u/results", params={"test_type": "PS_Check"}).json()
+    assert {r["test_type"] for r in only_ps["results"]} == {"PS_Check"}
+    assert client.get("/users/u/results", params={"cursor": "nope"}).status_code == 400
+
+
+def test_placeholders_in_legacy_results_are_skipped(db):
+    db.collection("User_Accounts").document("u").set(
+        {
+            "results": {
+                "PS_Check": [""],
+                "Stuttering_Check": {
+                    "": "",
+                    "yesterday": {"fluency_score": 1},
+                    "20240101120000": {"fluency_score": 7},
+                },
+            }
+        }
+    )
+
+    assert results_store.migrate_legacy_results(db, "u")
+    record_result(
+        db, "u", "PS_Check", "20250101120000", {"final_public_speaking_score": 70}
+    )
+    page, _ = results_store.list_results(db, "u")
+
+    assert [r["id"] for r in page] == [
+        "20250101120000_PS_Check",
+        "20240101120000_Stuttering_Check",
+    ]
+    account = db.store["User_Accounts/u"]
+    assert account["summary"]["Stuttering_Check"]["count"] == 1
+    assert account["summary"]["PS_Check"]["count"] == 1
+    assert account["results"]["PS_Check"] == {
+        "20250101120000": {"final_public_speaking_score": 70}
+    }
+
+
+def test_account_map_keeps_only_the_scores(db):
+    db.collection("User_Accounts").document("u").set({"name": "Ann"})
+    result = {
+        "final_public_speaking_score": 70,
+        "transcription": [{"transcript": "hello", "confidence": 90}],
+        "Voice_Quality_&_Stability_Data": {
+            "final_voice_score": 65,
+            "pitch_data": {"0.0": {"mean_pitch_ST": 12.0}},
+        },
+    }
+    record_result(db, "u", "PS_Check", "20250101120000", result)
+    results_store.update_result(
+        db, "u", "PS_Check", "20250101120000", {"feedback": "Good pace"}
+    )
+
+    entry = db.store["User_Accounts/u"]["results"]["PS_Check"]["20250101120000"]
+    assert entry == {
+        "final_public_speaking_score": 70,
+        "Voice_Quality_&_Stability_Data": {"final_voice_score": 65},
+        "feedback": "Good pace",
+    }
+    stored = db.store["User_Accounts/u/Results/20250101120000_PS_Check"]["result"]
+    assert stored == dict(result, feedback="Good pace")
+
+
+def test_fake_queries_apply_range_and_membership_filters(db):
+    scores = db.collection("Scores")
+    for doc_id, data in {"a": {"score": 40}, "b": {"score": 75}, "c": {}}.items():
+        scores.document(doc_id).set(data)
+
+    def ids(query):
+        return [snapshot.id for snapshot in query.stream()]
+
+    assert ids(scores.where("score", ">=", 50)) == ["b"]
+    assert ids(scores.where("score", "in", [40, 75])) == ["a", "b"]
+    assert ids(scores.where("score", "==", None)) == ["c"]
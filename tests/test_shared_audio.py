@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src import analysis_pool
+from src.shared_audio import (
+    AudioSamples,
+    SharedSamples,
+    as_array,
+    as_sound,
+    attach_samples,
+)
+
+
+def make_wav(path, seconds=1.0, sr=16000):
+    t = np.arange(int(seconds * sr)) / sr
+    sf.write(path, 0.2 * np.sin(2 * np.pi * 150 * t), sr, subtype="PCM_16")
+    return str(path)
+
+
+def test_shared_samples_are_attached_without_copy_and_removed():
+    audio = AudioSamples(np.linspace(-1, 1, 1000, dtype=np.float32), 16000)
+
+    with SharedSamples(audio) as handle:
+        attached = attach_samples(handle)
+        assert isinstance(attached.samples, np.memmap)
+        assert not attached.samples.flags.writeable
+        np.testing.assert_array_equal(attached.samples, audio.samples)
+        assert attached.sr == 16000
+    assert not os.path.exists(handle["path"])
+
+
+def test_shared_samples_are_removed_when_analysis_fails():
+    audio = AudioSamples(np.zeros(10, dtype=np.float32), 16000)
+
+    with pytest.raises(RuntimeError):
+        with SharedSamples(audio) as handle:
+            raise RuntimeError("analyzer failed")
+    assert not os.path.exists(handle["path"])
+
+
+def test_decoded_samples_match_the_file(tmp_path):
+    path = make_wav(tmp_path / "tone.wav")
+    audio = AudioSamples(*as_array(path))
+
+    assert as_sound(audio).values.tolist() == as_sound(path).values.tolist()
+
+
+@pytest.mark.parametrize("workers", ["0", "2"])
+def test_run_analyzers_inline_and_on_process_pool(tmp_path, monkeypatch, workers):
+    monkeypatch.setenv("ANALYSIS_POOL_WORKERS", workers)
+    monkeypatch.setenv("ANALYSIS_POOL_START_METHOD", "fork")
+    path = make_wav(tmp_path / "tone.wav")
+
+    try:
+        results = analysis_pool.run_analyzers(path, {"samples": (as_array, ())})
+    finally:
+        analysis_pool._discard_executor()
+
+    samples, sr = results["samples"]
+    assert sr == 16000
+    assert len(samples) == 16000
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+def test_concurrent_calls_for_one_key_share_the_result():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def analyse(name):
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            return name
+
+        results = await asyncio.gather(
+            flight.do("a.wav", lambda: analyse("first")),
+            flight.do("a.wav", lambda: analyse("duplicate")),
+            flight.do("b.wav", lambda: analyse("other")),
+        )
+        # Once the call has finished the key starts a new one
+        later = await flight.do("a.wav", lambda: analyse("later"))
+        return calls, results, later, flight.snapshot()
+
+    calls, results, later, metrics = asyncio.run(scenario())
+    assert calls == ["first", "other", "later"]
+    assert results == [("first", False), ("first", True), ("other", False)]
+    assert later == ("later", False)
+    assert metrics == {"calls": 3, "coalesced": 1, "in_flight": 0, "cached": 0}
+
+
+def test_results_are_shared_for_the_ttl():
+    async def scenario():
+        flight = SingleFlight(ttl=0.05)
+        calls = []
+
+        async def analyse(name):
+            calls.append(name)
+            return name
+
+        first = await flight.do("a.wav", lambda: analyse("first"))
+        await asyncio.sleep(0)
+        repeat = await flight.do("a.wav", lambda: analyse("repeat"))
+        cached = flight.snapshot()["cached"]
+        await asyncio.sleep(0.1)
+        later = await flight.do("a.wav", lambda: analyse("later"))
+        return calls, [first, repeat, later], cached
+
+    calls, results, cached = asyncio.run(scenario())
+    assert calls == ["first", "later"]
+    assert results == [("first", False), ("first", True), ("later", False)]
+    assert cached == 1
+
+
+def test_cancelling_the_leader_does_not_cancel_followers():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def analyse():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.create_task(flight.do("a.wav", analyse))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("a.wav", analyse))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(scenario()) == (("done", True), True)
+
+
+def test_errors_reach_every_waiting_caller():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("download failed")
+
+        return await asyncio.gather(
+            flight.do("a.wav", fail), flight.do("a.wav", fail), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    with pytest.raises(RuntimeError):
+        raise results[1]
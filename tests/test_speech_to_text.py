@@ -0,0 +1,103 @@
+import threading
+
+import numpy as np
+import soundfile as sf
+
+from src import ps_test, speech_to_text
+from src.frame_features import FrameFeatures
+from src.speech_to_text import SYNC_INLINE_MAX_BYTES, use_long_running
+from src.stage_metrics import request_stages
+
+SR = 16000
+
+
+class RecordingClient:
+    calls = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def recognize(self, config, audio):
+        RecordingClient.calls.append(("recognize", audio))
+        return type("Response", (), {"results": []})()
+
+    def long_running_recognize(self, config, audio):
+        raise AssertionError("short audio must not use a long-running operation")
+
+
+def test_long_running_only_above_the_limits(monkeypatch):
+    assert not use_long_running(10, 320_000)
+    assert use_long_running(56, 1_800_000)
+    assert use_long_running(10, SYNC_INLINE_MAX_BYTES + 1)
+    monkeypatch.setenv("STT_SYNC_MAX_SECONDS", "5")
+    assert use_long_running(10, 320_000)
+
+
+def test_short_recordings_are_sent_inline(tmp_path, monkeypatch):
+    monkeypatch.setattr(speech_to_text.speech, "SpeechClient", RecordingClient)
+    monkeypatch.setenv("FEATURE_STORE_DIR", str(tmp_path / "features"))
+    t = np.arange(3 * SR) / SR
+    path = tmp_path / "short.wav"
+    sf.write(path, 0.3 * np.sin(2 * np.pi * 150 * t), SR, subtype="PCM_16")
+
+    finished = []
+    with request_stages() as stages:
+        result = ps_test.ps_test(
+            str(path),
+            "en",
+            blob_name="recordings/PS_Check/short.wav",
+            on_stage=lambda name, data: finished.append((name, data)),
+        )
+
+    method, audio = RecordingClient.calls[-1]
+    assert method == "recognize"
+    assert audio.content == path.read_bytes()
+    assert not audio.uri
+    assert {"transcription", "transcription_sync"} <= {name for name, _ in stages}
+    assert [name for name, _ in finished] == ["energy", "voice", "transcription"]
+    assert finished[0][1] == result["Speech_Intensity_&_Energy_Data"]
+
+
+def test_transcription_starts_before_the_audio_is_decoded(tmp_path, monkeypatch):
+    monkeypatch.setenv("FEATURE_STORE_DIR", str(tmp_path / "features"))
+    path = tmp_path / "short.wav"
+    sf.write(path, 0.3 * np.sin(2 * np.pi * 150 * np.arange(3 * SR) / SR), SR)
+    started = threading.Event()
+    decoded_after_start = []
+
+    def fake_transcribe(gcs_uri, long_flag, lan_flag, content):
+        started.set()
+        return []
+
+    def features_after_transcription(audio_path):
+        decoded_after_start.append(started.wait(timeout=5))
+        return FrameFeatures(audio_path)
+
+    monkeypatch.setattr(ps_test, "_transcribe", fake_transcribe)
+    monkeypatch.setattr(ps_test, "FrameFeatures", features_after_transcription)
+    ps_test.ps_test(str(path), "en")
+
+    assert decoded_after_start == [True]
+
+
+class SlowOperationClient:
+    submits = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def long_running_recognize(self, config, audio):
+        SlowOperationClient.submits += 1
+        return self
+
+    def result(self, timeout=None):
+        raise TimeoutError("Operation did not complete within the designated timeout.")
+
+
+def test_slow_long_running_operations_are_not_resubmitted(monkeypatch):
+    monkeypatch.setattr(speech_to_text.speech, "SpeechClient", SlowOperationClient)
+
+    result = speech_to_text.transcribe_gcs("gs://bucket/long.wav", True, "en")
+
+    assert SlowOperationClient.submits == 1
+    assert "error" in result[0]
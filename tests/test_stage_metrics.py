@@ -0,0 +1,34 @@
+from loadtest.run import parse_server_timing
+from src.stage_metrics import (
+    record_stage,
+    request_stages,
+    reset_stage_metrics,
+    server_timing,
+    stage,
+    stage_metrics,
+)
+
+
+def test_stage_percentiles_are_reported():
+    reset_stage_metrics()
+    for ms in range(1, 101):
+        record_stage("download", ms / 1000)
+
+    metrics = stage_metrics()["download"]
+    assert metrics["count"] == 100
+    assert metrics["p50"] == 0.0505
+    assert metrics["p99"] > metrics["p95"] > metrics["p50"]
+
+
+def test_request_stages_round_trip_through_server_timing():
+    reset_stage_metrics()
+    with request_stages() as stages:
+        with stage("analysis"):
+            pass
+        record_stage("firestore_write", 0.25)
+    # Stages outside the request context are not attributed to it
+    record_stage("download", 0.1)
+
+    parsed = parse_server_timing(server_timing(stages))
+    assert set(parsed) == {"analysis", "firestore_write"}
+    assert parsed["firestore_write"] == 0.25
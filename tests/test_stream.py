@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+
+from main import app
+from src.audio_probe import AudioTooLargeError
+
+PAYLOAD = {
+    "file_name": "recordings/PS_Check/talk.wav",
+    "acc_id": "user123",
+    "test_type": True,
+    "lan_flag": "en",
+}
+
+
+def read_events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name.removeprefix("event: "), data.removeprefix("data: ")))
+    return events
+
+
+def test_stages_are_streamed_before_the_result(monkeypatch):
+    def analyze(on_stage):
+        on_stage("energy", {"final_energy_score": 61.0, "energy_analysis": {0.0: 1}})
+        on_stage("voice", {"clarity": 80.0})
+        return {"result": {"final_public_speaking_score": 70.0}}
+
+    async def fake_run_test(request_body, profile=False, on_stage=None):
+        # Stages are reported from the analysis thread, as in process_test
+        return await run_in_threadpool(analyze, on_stage)
+
+    monkeypatch.setattr("main.run_test", fake_run_test)
+    with TestClient(app) as client:
+        response = client.post("/test/stream", json=dict(PAYLOAD, detail="standard"))
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert read_events(response) == [
+        ("energy", '{"final_energy_score":61.0}'),
+        ("voice", '{"clarity":80.0}'),
+        ("result", '{"result":{"final_public_speaking_score":70.0}}'),
+    ]
+
+
+def test_rejections_end_the_stream_with_an_error_event(monkeypatch):
+    async def fake_run_test(request_body, profile=False, on_stage=None):
+        raise AudioTooLargeError("Recording too long")
+
+    monkeypatch.setattr("main.run_test", fake_run_test)
+    with TestClient(app) as client:
+        response = client.post("/test/stream", json=PAYLOAD)
+
+    assert response.status_code == 200
+    assert read_events(response) == [
+        ("error", '{"status":413,"detail":"Recording too long"}')
+    ]
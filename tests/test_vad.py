@@ -0,0 +1,61 @@
+import numpy as np
+
+from src import ps_test_cat1
+from src.shared_audio import AudioSamples
+from src.vad import has_speech, speaking_time, speech_intervals
+
+SR = 16000
+
+
+def tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * 150 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    rng = np.random.default_rng(0)
+    return (1e-5 * rng.standard_normal(int(seconds * SR))).astype(np.float32)
+
+
+def make_audio():
+    # 3 s speech, 6 s silence, 3 s speech
+    return AudioSamples(np.concatenate([tone(3), silence(6), tone(3)]), SR)
+
+
+def test_speech_intervals_cover_voiced_spans_only():
+    intervals = speech_intervals(make_audio())
+
+    assert len(intervals) == 2
+    assert intervals[0][0] == 0.0
+    assert 3.0 <= intervals[0][1] < 3.3
+    assert 8.7 < intervals[1][0] <= 9.0
+    assert 5.5 < speaking_time(intervals) < 7.0
+    assert not has_speech(intervals, 4.0, 8.0)
+
+
+def test_silence_is_not_speech():
+    assert speech_intervals(AudioSamples(silence(2) * 0, SR)) == []
+
+
+def test_silent_segments_skip_praat_and_speed_uses_speaking_time(monkeypatch):
+    audio = make_audio()
+    intervals = speech_intervals(audio)
+    calls = []
+    real_call = ps_test_cat1.parselmouth.praat.call
+
+    def counting_call(*args):
+        calls.append(args[1])
+        return real_call(*args)
+
+    monkeypatch.setattr(ps_test_cat1.parselmouth.praat, "call", counting_call)
+    jitter = ps_test_cat1.analyze_jitter(audio, speech=intervals)
+
+    assert jitter["jitter_data"][4.0] == 0.0
+    assert jitter["jitter_data"][6.0] == 0.0
+    # Only the four segments that contain speech reach Praat (two calls each)
+    assert len(calls) == 8
+    assert ps_test_cat1.silent_segments(audio.duration, intervals) == [4.0, 6.0]
+
+    text = "one two three four five six"
+    assert ps_test_cat1.analyze_speaking_speed(audio, text) == 30.0
+    assert ps_test_cat1.analyze_speaking_speed(audio, text, intervals) > 50.0
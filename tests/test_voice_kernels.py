@@ -0,0 +1,75 @@
+import numpy as np
+import parselmouth
+from parselmouth.praat import call
+import pytest
+import soundfile as sf
+
+from src.frame_features import FrameFeatures
+from src.ps_test_cat1 import analyze_speech_1
+from src.voice_kernels import harmonicity_frames, jitter_local, shimmer_local
+
+SR = 16000
+
+
+def voice(seconds=4, seed=1, noise=0.02):
+    """A pulse train with jittered periods and shimmered amplitudes."""
+    rng = np.random.default_rng(seed)
+    pulses, n = [], 0
+    while n < seconds * SR:
+        period = int(SR / (120 * (1 + 0.01 * rng.standard_normal())))
+        k = np.arange(period) / period
+        amplitude = 0.3 * (1 + 0.05 * rng.standard_normal())
+        pulses.append(
+            amplitude
+            * (np.exp(-5 * k) * np.sin(6 * np.pi * k) + 0.5 * np.sin(2 * np.pi * k))
+        )
+        n += period
+    y = np.concatenate(pulses)[: seconds * SR]
+    return y + noise * rng.standard_normal(y.size)
+
+
+@pytest.mark.parametrize("noise", [0.02, 0.1])
+def test_kernels_match_praat(noise):
+    segment = parselmouth.Sound(voice(noise=noise), SR).extract_part(
+        from_time=0, to_time=2
+    )
+    point_process = call(segment, "To PointProcess (periodic, cc)", 75, 500)
+    pulses = call(point_process, "To Matrix").values[0]
+    samples = segment.values[0]
+
+    praat_jitter = call(point_process, "Get jitter (local)", 0, 0, 0.0001, 0.02, 1.3)
+    praat_shimmer = call(
+        [segment, point_process], "Get shimmer (local)", 0, 0, 0.0001, 0.02, 1.3, 1.6
+    )
+    harmonicity = call(segment, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0)
+    praat_hnr = call(harmonicity, "Get mean", 0, 0)
+
+    assert jitter_local(pulses) == pytest.approx(praat_jitter, rel=1e-6)
+    assert shimmer_local(samples, SR, pulses, x1=segment.x1) == pytest.approx(
+        praat_shimmer, rel=1e-2
+    )
+    _, hnr = harmonicity_frames(samples, SR, segment.x1)
+    assert np.nanmean(hnr) == pytest.approx(praat_hnr, abs=0.05)
+
+
+def test_numpy_engine_matches_praat_engine(tmp_path):
+    path = tmp_path / "voice.wav"
+    sf.write(path, voice(seconds=6), SR)
+
+    results = {}
+    for engine in ("praat", "numpy"):
+        features = FrameFeatures(str(path))
+        result = analyze_speech_1(str(path), "one two three", features, engine)
+        results[engine] = (result, features.voice_quality)
+
+    (praat, praat_quality), (fast, fast_quality) = results["praat"], results["numpy"]
+    assert set(fast) == set(praat)
+    assert fast["jitter_data"].keys() == praat["jitter_data"].keys()
+    for name, key, tolerance in [
+        ("jitter", "overall_jitter", {"rel": 1e-6}),
+        ("shimmer", "overall_shimmer", {"rel": 0.01}),
+        ("hnr", "overall_hnr", {"abs": 0.05}),
+    ]:
+        assert fast_quality[name][key] == pytest.approx(
+            praat_quality[name][key], **tolerance
+        )
@@ -0,0 +1,31 @@
+import os
+import signal
+
+from src import workers
+
+
+def test_worker_recycles_once_rss_exceeds_limit(monkeypatch):
+    sent = []
+    monkeypatch.setattr(workers.os, "kill", lambda pid, sig: sent.append((pid, sig)))
+    monkeypatch.setattr(workers, "current_rss_mb", lambda: 900.0)
+
+    workers.enable_rss_recycling(500.0)
+    assert workers.check_worker_rss() is True
+    # A second check must not send another signal while the worker drains
+    assert workers.check_worker_rss() is False
+    assert sent == [(os.getpid(), signal.SIGTERM)]
+
+
+def test_worker_is_kept_below_limit_or_when_disabled(monkeypatch):
+    monkeypatch.setattr(workers.os, "kill", lambda pid, sig: None)
+    monkeypatch.setattr(workers, "current_rss_mb", lambda: 100.0)
+
+    workers.enable_rss_recycling(500.0)
+    assert workers.check_worker_rss() is False
+    workers.enable_rss_recycling(None)
+    assert workers.check_worker_rss() is False
+
+
+def test_preload_engines_runs_and_rss_is_reported():
+    workers.preload_engines()
+    assert workers.current_rss_mb() > 0